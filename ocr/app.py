@@ -1,13 +1,27 @@
 import os
+import atexit
 import sqlite3
 from datetime import datetime
 from functools import wraps
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template, stream_with_context
 from flask_cors import CORS
 import logging
 import json
 import hashlib
 import math
+from blockchain.ledger import ComplaintLedger
+from blockchain.builder import BlockBuilder
+from blockchain.miner import ParallelMiner
+from blockchain.storage import BlockStore
+from dispatch.registry import SPECIALIZATIONS, TechnicianRegistry
+from dispatch.jobs import JobBoard, service_minutes
+from dispatch.routing import RoutePlanner
+from dispatch.batch import BatchAssigner
+from dispatch.specs import DEFAULT_RULES_PATH, SpecializationRules
+from db import Database
+from migrations import bump_data_version, data_version, migrate
+from events import COMPLAINT_EVENT_FIELDS, TECHNICIAN_EVENT_FIELDS, ChangeFeed, EventBroker
+from snapshot import CachedSnapshot
 # No 'random' import needed as technician data is now fixed
 
 # Configure logging for Flask app
@@ -25,92 +39,6 @@ class ComplaintPredictor:
         # This is a placeholder. A real implementation would use an ML model.
         return "24-48 hours"
 
-class ComplaintLedger:
-    def __init__(self):
-        self.chain = []
-        self.current_complaints = []
-        # Create the genesis block
-        self.new_block(previous_hash='1', proof=100)
-        logger.info("ComplaintLedger initialized.")
-
-    def new_block(self, proof, previous_hash=None):
-        """
-        Creates a new Block and adds it to the chain.
-        """
-        block = {
-            'index': len(self.chain) + 1,
-            'timestamp': str(datetime.now()),
-            'complaints': self.current_complaints,
-            'proof': proof,
-            'previous_hash': previous_hash or self.hash_block(self.chain[-1]) if self.chain else '1',
-        }
-        # Reset the current list of complaints
-        self.current_complaints = []
-        self.chain.append(block)
-        return block
-
-    def add_complaint(self, complaint_data: dict) -> str:
-        """
-        Adds a new complaint to the list of complaints in the current block.
-        When enough complaints are accumulated, a new block is mined.
-        """
-        self.current_complaints.append(complaint_data)
-        # For simplicity, we mine a new block immediately after each complaint for now.
-        # In a real scenario, you'd batch complaints or mine on a schedule.
-        last_block = self.chain[-1]
-        proof = self.proof_of_work(last_block['proof'])
-        new_block = self.new_block(proof, self.hash_block(last_block))
-        logger.info(f"New block mined with hash: {self.hash_block(new_block)}")
-        return self.hash_block(new_block)
-
-    def hash_block(self, block):
-        """
-        Creates a SHA-256 hash of a Block.
-        """
-        # We must make sure that the Dictionary is Ordered, or we'll have inconsistent hashes
-        block_string = json.dumps(block, sort_keys=True).encode()
-        return hashlib.sha256(block_string).hexdigest()
-
-    def proof_of_work(self, last_proof):
-        """
-        Simple Proof of Work Algorithm:
-         - Find a number p' such that hash(pp') contains 4 leading zeroes, where p is the previous p'
-        """
-        proof = 0
-        while self.valid_proof(last_proof, proof) is False:
-            proof += 1
-        return proof
-
-    def valid_proof(self, last_proof, proof):
-        """
-        Validates the Proof: Does hash(last_proof, proof) contain 4 leading zeroes?
-        """
-        guess = f'{last_proof}{proof}'.encode()
-        guess_hash = hashlib.sha256(guess).hexdigest()
-        return guess_hash[:4] == "0000"
-
-    def verify_chain(self):
-        """
-        Verify the integrity of the entire blockchain.
-        """
-        if not self.chain:
-            return True # An empty chain is valid
-
-        current_block = self.chain[0]
-        block_index = 1
-
-        while block_index < len(self.chain):
-            next_block = self.chain[block_index]
-            # Check that the hash of the current block is correct
-            if next_block['previous_hash'] != self.hash_block(current_block):
-                return False
-            # Check that the Proof of Work is correct
-            if not self.valid_proof(current_block['proof'], next_block['proof']):
-                return False
-            current_block = next_block
-            block_index += 1
-        return True
-
 class FederatedTrainer:
     def __init__(self):
         logger.info("FederatedTrainer initialized (placeholder).")
@@ -147,9 +75,30 @@ class SimpleRateLimiter:
             return True
         return False
 
+# With debug=True the script's first process only watches for code changes and runs the
+# server in a child (WERKZEUG_RUN_MAIN set). Background workers (miner pool, block builder,
+# change feed, batch assigner) and the startup re-queue run only in the serving process, so the
+# watcher never books jobs or seals blocks the server cannot see.
+SERVING_PROCESS = __name__ != '__main__' or os.environ.get("WERKZEUG_RUN_MAIN") == "true"
+
 # Initialize modules
 predictor = ComplaintPredictor()
-ledger = ComplaintLedger()
+# Proof of Work tuning: raise the difficulty / worker count to match the mining hardware
+MINING_DIFFICULTY_BITS = int(os.environ.get("MINING_DIFFICULTY_BITS", 16)) # 16 bits == "0000" hex prefix
+MINING_WORKERS = int(os.environ.get("MINING_WORKERS", os.cpu_count() or 1))
+miner = ParallelMiner(workers=MINING_WORKERS if SERVING_PROCESS else 1, difficulty_bits=MINING_DIFFICULTY_BITS)
+# Blocks are persisted here so the chain and its receipts survive restarts
+LEDGER_DIR = os.environ.get("LEDGER_DIR", "ledger_data")
+ledger = ComplaintLedger(difficulty_bits=MINING_DIFFICULTY_BITS, miner=miner, store=BlockStore(LEDGER_DIR))
+block_builder = BlockBuilder(ledger, max_block_size=20, max_wait_seconds=10) # Seals blocks off the request path
+if SERVING_PROCESS:
+    block_builder.start()
+
+@atexit.register
+def seal_pending_complaints():
+    """Seals complaints still pending when the server exits (including debug reloads), then stops the miner."""
+    block_builder.stop(flush=True)
+    miner.close()
 trainer = FederatedTrainer()
 limiter = SimpleRateLimiter(max_requests=100, time_window=3600) # 100 requests per hour per IP
 
@@ -161,45 +110,16 @@ def limit_requests():
         logger.warning(f"Rate limit exceeded for IP: {request.remote_addr}")
         return jsonify({"error": "Too many requests"}), 429
 
+# Pooled WAL-mode connections shared by every request and background job
+db = Database("complaints.db")
+
 # Database initialization
 def init_db():
-    """Initialize database with proper schema."""
-    with sqlite3.connect("complaints.db") as conn:
+    """Brings the database up to the current schema version and seeds the technicians."""
+    with db.connection() as conn:
+        migrate(conn)
         cursor = conn.cursor()
 
-        # Complaints table schema (updated for technician assignment and location)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS complaints (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                chat_id INTEGER,
-                problem TEXT,
-                address TEXT,
-                complaint_latitude REAL,  -- Latitude of the complaint
-                complaint_longitude REAL, -- Longitude of the complaint
-                error_code TEXT,
-                contact_no TEXT,
-                media_path TEXT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                status TEXT DEFAULT 'pending', -- e.g., 'pending', 'assigned', 'resolved'
-                assigned_technician_id INTEGER, -- Foreign key to technicians table
-                assigned_technician_name TEXT,  -- Redundant but useful for quick lookup
-                synced_to_server BOOLEAN DEFAULT 0
-            )
-        """)
-
-        # Technicians table schema (with availability status and geographical coordinates)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS technicians (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT,
-                contact_no TEXT,
-                latitude REAL,
-                longitude REAL,
-                status TEXT, -- 'available' or 'busy'
-                specialization TEXT -- e.g., 'AC,Refrigerator,TV'
-            )
-        """)
-
         # Insert 100 fixed sample technicians if table is empty
         cursor.execute("SELECT COUNT(*) FROM technicians")
         if cursor.fetchone()[0] == 0:
@@ -274,7 +194,7 @@ def init_db():
                     contact_num_suffix = str(tech_counter + 1000000000)[-9:] # ensure 9 digits
                     contact_no = f"9{contact_num_suffix}" 
 
-                    status = 'available' if tech_counter % 2 == 0 else 'busy' # Alternate available/busy
+                    status = 'available' if tech_counter % 2 == 0 else 'off_duty' # Alternate on/off duty
                     
                     # Fixed specializations (deterministic based on counter)
                     # Pick 1 to 3 specializations
@@ -299,133 +219,385 @@ def init_db():
 # Call DB initialization on app startup
 init_db()
 
-# --- Haversine Distance Calculation ---
-def haversine_distance(lat1, lon1, lat2, lon2):
+def complaint_ledger_record(complaint: dict) -> dict:
+    """
+    The record sealed on the ledger for a complaint row. It is built from the row alone, so
+    it (and its receipt id) can be rebuilt after a restart.
+    """
+    latitude, longitude = complaint['complaint_latitude'], complaint['complaint_longitude']
+    return {
+        'db_id': complaint['id'],
+        'user_id': complaint['chat_id'],
+        'problem': complaint['problem'],
+        'location_address': complaint['address'],
+        'location_coords': {'lat': latitude, 'lon': longitude} if latitude is not None else None,
+        'error_code': complaint['error_code'],
+        'timestamp': complaint['timestamp'],
+        'assigned_technician': complaint['assigned_technician_name'] or "N/A",
+    }
+
+def _record_sealed(conn, sealed):
+    conn.executemany("INSERT OR IGNORE INTO sealed_complaints (complaint_id, block_index) VALUES (?, ?)", sealed)
+
+def _on_complaints_sealed(block):
+    sealed = [(complaint['db_id'], block['index']) for complaint in block['complaints']
+              if complaint.get('db_id') is not None]
+    if sealed:
+        with db.connection() as conn:
+            _record_sealed(conn, sealed)
+
+ledger.add_listener(_on_complaints_sealed) # Before the re-queue below, whose blocks it must record
+
+def requeue_unsealed_complaints():
     """
-    Calculates the distance between two points on Earth using the Haversine formula.
-    Returns distance in kilometers.
+    Queues every complaint not recorded in sealed_complaints again, e.g. ones still pending
+    when the server was killed, whatever their ids. Complaints the ledger's receipts show as
+    sealed (a block stored just before a crash) are recorded instead. A receipt handed out
+    for a re-queued one resolves again unless its technician changed in the meantime (the
+    rebuilt record then gets a new receipt id); its /api/blockchain/proof/<complaint_id>
+    works either way.
     """
-    R = 6371  # Radius of Earth in kilometers
+    in_ledger = ledger.store.sealed_complaints()
+    with db.connection() as conn:
+        conn.row_factory = sqlite3.Row
+        # status 'pending' rows are the bot's local copies when it shares this file; the
+        # complaint itself arrives through /submit_complaint
+        rows = conn.execute("""
+            SELECT * FROM complaints
+            WHERE status <> 'pending' AND id NOT IN (SELECT complaint_id FROM sealed_complaints)
+            ORDER BY id
+        """).fetchall()
+        _record_sealed(conn, [(row['id'], in_ledger[row['id']]) for row in rows if row['id'] in in_ledger])
+    rows = [row for row in rows if row['id'] not in in_ledger]
+    for row in rows:
+        block_builder.submit(complaint_ledger_record(dict(row)))
+    if rows:
+        logger.warning(f"Re-queued {len(rows)} complaint(s) that were never sealed into a block.")
+
+if SERVING_PROCESS:
+    requeue_unsealed_complaints()
+
+# --- Change versions ---
+# sync_state.version is bumped by every complaint/technician write (SQLite triggers) and by
+# every sealed block. Polling endpoints use it as their ETag and for ?since=<version> deltas,
+# so an idle dashboard is answered with 304s after reading one row.
+def _data_version() -> int:
+    with db.connection() as conn:
+        return data_version(conn)
 
-    lat1_rad = math.radians(lat1)
-    lon1_rad = math.radians(lon1)
-    lat2_rad = math.radians(lat2)
-    lon2_rad = math.radians(lon2)
+# --- Live events ---
+# /api/events clients get complaint and technician changes from one ChangeFeed thread, woken
+# by every local write, and block-sealed events straight from the ledger.
+event_broker = EventBroker()
+change_feed = ChangeFeed(db, event_broker)
+db.add_write_listener(change_feed.notify)
+if SERVING_PROCESS:
+    change_feed.start()
 
-    dlon = lon2_rad - lon1_rad
-    dlat = lat2_rad - lat1_rad
+def _on_block_sealed(block):
+    with db.connection() as conn:
+        version = bump_data_version(conn)
+    event_broker.publish("block-sealed", {
+        "index": block['index'],
+        "hash": block['hash'],
+        "complaint_count": len(block['complaints']),
+        "chain_length": len(ledger.chain),
+        "version": version,
+    })
+
+ledger.add_listener(_on_block_sealed)
+
+# --- Dashboard snapshot ---
+# Everything the dashboard shows, built once and shared by every viewer until a write
+# invalidates it: complaint/technician writes in this process (Database write listener,
+# which also covers sealed blocks through their version bump) and writes by the bot
+# (seen by the ChangeFeed). N viewers polling cost one rebuild per change.
+DASHBOARD_RECENT_COMPLAINTS = 50
+
+def _build_dashboard_snapshot():
+    """Returns (data, JSON body) for the dashboard, so the body is serialized once per rebuild."""
+    with db.connection() as conn:
+        version = data_version(conn) # Read before the rows: a write in between only causes a rebuild
+        technicians = [dict(zip(TECHNICIAN_EVENT_FIELDS, row)) for row in conn.execute(
+            f"SELECT {', '.join(TECHNICIAN_EVENT_FIELDS)} FROM technicians ORDER BY id")]
+        complaints = [dict(zip(COMPLAINT_EVENT_FIELDS, row)) for row in conn.execute(
+            f"SELECT {', '.join(COMPLAINT_EVENT_FIELDS)} FROM complaints ORDER BY timestamp DESC, id DESC LIMIT ?",
+            (DASHBOARD_RECENT_COMPLAINTS,))]
+        by_status = dict(conn.execute("SELECT status, COUNT(*) FROM complaints GROUP BY status").fetchall())
+    with ledger.lock:
+        chain_length = len(ledger.chain)
+        last_block_hash = ledger.chain[-1]['hash'] if ledger.chain else None
+    data = {
+        "version": version,
+        "stats": {
+            "total_complaints": sum(by_status.values()),
+            "complaints_by_status": by_status,
+            "available_technicians": sum(1 for tech in technicians if tech['status'] == 'available'),
+            "total_technicians": len(technicians),
+        },
+        "technicians": technicians,
+        "complaints": complaints,
+        "blockchain": {
+            "valid": ledger.verify_chain(), # Incremental: only blocks sealed since the last check
+            "chain_length": chain_length,
+            "verified_upto": ledger.verified_upto,
+            "last_block_hash": last_block_hash,
+        },
+    }
+    return data, json.dumps(data, default=str)
+
+dashboard_snapshot = CachedSnapshot(_build_dashboard_snapshot)
+db.add_write_listener(dashboard_snapshot.invalidate)
+
+def _on_feed_change(version):
+    # Local writes already invalidated the snapshot; this catches the bot's writes
+    current = dashboard_snapshot.peek()
+    if current is None or current[0]['version'] < version:
+        dashboard_snapshot.invalidate()
+
+change_feed.add_listener(_on_feed_change)
 
-    a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+def _not_modified(version: int):
+    """A 304 response if the client already holds this version (If-None-Match), else None."""
+    if request.if_none_match.contains_weak(str(version)):
+        return _versioned(Response(status=304), version)
+    return None
 
-    distance = R * c
-    return distance # Distance in kilometers
+def _versioned(response, version: int):
+    response.set_etag(str(version))
+    response.headers['Cache-Control'] = 'no-cache' # Revalidate every time; a 304 is cheap
+    return response
+
+def _since():
+    """The ?since=<version> argument as an int (None if absent). Raises ValueError if malformed."""
+    since = request.args.get('since')
+    return int(since) if since not in (None, '') else None
+
+# --- Technician Registry ---
+# Loaded once; assignment reads it instead of re-querying and re-parsing the technicians table
+technician_registry = TechnicianRegistry(db)
+technician_registry.load()
+# Open jobs per technician with predicted completion times, rebuilt from technician_jobs
+job_board = JobBoard(technician_registry, db)
+job_board.load()
+route_planner = RoutePlanner(technician_registry, job_board) # Caches each plan until the technician's jobs change
 
 # --- Technician Assignment Logic ---
-def assign_technician(complaint_lat: float, complaint_lon: float, problem: str, error_code: str) -> dict:
+ETA_CANDIDATES = 10 # Nearest technicians whose predicted completion times are compared
+CLAIM_ROUNDS = 3 # Lookups before giving up when every candidate keeps being taken concurrently
+
+# Keyword/error-code -> specialization table, compiled once and hot-reloaded when the file changes
+specialization_rules = SpecializationRules(os.environ.get("SPECIALIZATION_RULES", DEFAULT_RULES_PATH))
+
+def required_specializations(problem: str, error_code: str) -> set:
+    """Specializations a complaint needs, derived from its problem text and error code."""
+    required_specs = specialization_rules.infer(problem, error_code)
+
+    # If no specific specialization is derived, consider technicians with any of the common skills
+    if not required_specs:
+        logger.info("No specific specialization derived, considering technicians with any specialization.")
+        required_specs = set(SPECIALIZATIONS)
+    return required_specs
+
+def assign_technician(complaint_id: int, complaint_lat: float, complaint_lon: float, problem: str, error_code: str,
+                      exclude_technician_id: int = None) -> dict:
     """
-    Assigns the most suitable available technician based on proximity and specialization.
+    Assigns the suitable available technician who is predicted to finish the job first,
+    counting the jobs already in their queue, travel time and service time.
     """
     logger.info(f"Attempting to assign technician for problem: '{problem}', error: '{error_code}', location: ({complaint_lat}, {complaint_lon})")
-    
-    assigned_tech = None
-    
-    with sqlite3.connect("complaints.db") as conn:
-        conn.row_factory = sqlite3.Row # Allows accessing columns by name
-        cursor = conn.cursor()
-        
-        # Fetch all available technicians with their specializations and locations
-        cursor.execute("""
-            SELECT id, name, contact_no, latitude, longitude, specialization
-            FROM technicians 
-            WHERE status = 'available'
-        """)
-        available_technicians = cursor.fetchall()
-        
-        if not available_technicians:
-            logger.warning("No available technicians found for assignment.")
-            return {"status": "no_available_technician", "details": "No technicians are currently available."}
-
-        # Determine required specializations based on problem/error code
-        required_specs = set()
-        problem_lower = problem.lower()
-        error_code_upper = error_code.upper()
-
-        # Simple keyword-based mapping for specialization
-        if "ac" in problem_lower or "cooling" in problem_lower or "e1" in error_code_upper or "h1" in error_code_upper:
-            required_specs.add("AC")
-        if "refrigerator" in problem_lower or "fridge" in problem_lower or "f0" in error_code_upper:
-            required_specs.add("Refrigerator")
-        if "washing machine" in problem_lower or "wash" in problem_lower:
-            required_specs.add("Washing Machine")
-        if "tv" in problem_lower or "display" in problem_lower:
-            required_specs.add("TV")
-        if "induction" in problem_lower:
-            required_specs.add("Induction")
-        if "microoven" in problem_lower or "microwave" in problem_lower:
-            required_specs.add("Microwave")
-        if "geyser" in problem_lower:
-            required_specs.add("Geyser")
-        if "dishwasher" in problem_lower:
-            required_specs.add("Dishwasher")
-        if "water purifier" in problem_lower:
-            required_specs.add("Water Purifier")
-            
-        # If no specific specialization is derived, consider technicians with any of the common skills
-        if not required_specs:
-            logger.info("No specific specialization derived, considering technicians with any specialization.")
-            # This 'specializations_pool' comes from the init_db function's scope,
-            # so it needs to be accessible here, or redefine it globally/pass it.
-            # For simplicity, assuming it's available or re-defining a common list.
-            common_specializations = ["AC", "Refrigerator", "Washing Machine", "TV", "Geyser",
-                                      "Microwave", "Induction", "Dishwasher", "Water Purifier"]
-            required_specs = set(common_specializations) 
-            if not required_specs: 
-                required_specs.add("General Appliance") # Fallback for extremely broad cases
-
-        # Filter and sort technicians
-        candidate_technicians = []
-        for tech in available_technicians:
-            # Convert technician's specializations to a set of uppercase strings for easy checking
-            tech_specs = {s.strip().upper() for s in tech['specialization'].split(',')}
-            
-            # Check if technician has at least one required specialization
-            has_required_spec = any(req_s.upper() in tech_specs for req_s in required_specs)
-            
-            if has_required_spec:
-                # Calculate distance only if complaint coordinates are valid (not None)
-                if complaint_lat is not None and complaint_lon is not None and tech['latitude'] is not None and tech['longitude'] is not None:
-                    distance = haversine_distance(
-                        complaint_lat, complaint_lon,
-                        tech['latitude'], tech['longitude']
-                    )
-                    candidate_technicians.append((distance, tech))
-                else:
-                    # If no complaint coordinates, assign infinite distance.
-                    # These technicians will be considered after any proximity-matched ones,
-                    # effectively falling back to specialization/random order if no coordinates are provided.
-                    candidate_technicians.append((float('inf'), tech)) 
-
-        # Sort candidates: closest first. If distances are equal (e.g., all inf), their relative order is stable.
-        candidate_technicians.sort(key=lambda x: x[0])
-
-        if candidate_technicians:
-            assigned_tech_row = candidate_technicians[0][1] # Get the top candidate (closest/first available)
-            assigned_tech = dict(assigned_tech_row) # Convert to dictionary for easy access
-
-            # Update technician status to 'busy' in the database
-            cursor.execute("""
-                UPDATE technicians
-                SET status = 'busy'
-                WHERE id = ?
-            """, (assigned_tech['id'],))
-            conn.commit()
-            logger.info(f"Assigned technician: {assigned_tech['name']} (ID: {assigned_tech['id']})")
-            return {"status": "assigned", "technician": assigned_tech}
-        else:
-            logger.warning("No suitable technician found matching criteria (available and specialized).")
-            return {"status": "no_suitable_technician", "details": "No available technician matches your problem's requirements."}
 
+    required_specs = required_specializations(problem, error_code)
+    required_mask = technician_registry.spec_mask(required_specs)
+    service = service_minutes(required_specs)
+
+    # Bitmask AND over the availability sets and a spatial lookup give the nearest candidates,
+    # which are then ranked by predicted completion time. Each is claimed atomically; if a
+    # concurrent request took the last slot we fall back to the next, and look again if all were.
+    for _ in range(CLAIM_ROUNDS):
+        candidates = technician_registry.find_nearest(complaint_lat, complaint_lon, required_mask, k=ETA_CANDIDATES)
+        if not candidates:
+            break
+        ranked = sorted(((job_board.estimate(record, complaint_lat, complaint_lon, service)[1], record.id, record)
+                         for _, record in candidates if record.id != exclude_technician_id), key=lambda item: item[:2])
+        for _, _, record in ranked:
+            job = job_board.assign(record, complaint_id, complaint_lat, complaint_lon, service)
+            if job is not None:
+                assigned_tech = {**record.to_dict(), **job.to_dict(), "queue_position": len(job_board.queue(record.id))}
+                logger.info(f"Assigned technician: {assigned_tech['name']} (ID: {assigned_tech['id']}), ETA {assigned_tech['eta']}")
+                return {"status": "assigned", "technician": assigned_tech}
+            logger.info(f"Technician {record.id} had no free slot left, trying the next candidate.")
+
+    if not technician_registry.has_available():
+        logger.warning("No available technicians found for assignment.")
+        return {"status": "no_available_technician", "details": "No technicians are currently available."}
+    logger.warning("No suitable technician found matching criteria (available and specialized).")
+    return {"status": "no_suitable_technician", "details": "No available technician matches your problem's requirements."}
+
+
+# --- Backlog Assignment ---
+# Complaints left pending_assignment are matched in bulk (min total completion time), both
+# periodically and on demand, instead of waiting for a new submission to retry them.
+BATCH_ASSIGN_INTERVAL = float(os.environ.get("BATCH_ASSIGN_INTERVAL", 60)) # Seconds; 0 disables the periodic job
+batch_assigner = BatchAssigner(technician_registry, job_board, required_specializations, db,
+                               interval_seconds=BATCH_ASSIGN_INTERVAL)
+if BATCH_ASSIGN_INTERVAL > 0 and SERVING_PROCESS:
+    batch_assigner.start()
+
+@app.route('/api/assignments/batch', methods=['POST'])
+def run_batch_assignment():
+    """Assigns the whole pending_assignment backlog now. Returns what was assigned."""
+    try:
+        return jsonify(batch_assigner.run_once())
+    except Exception as e:
+        logger.error(f"Error running batch assignment: {e}", exc_info=True)
+        return jsonify({"error": "Failed to run batch assignment"}), 500
+
+@app.route('/api/technicians/<int:tech_id>/status', methods=['POST'])
+def update_technician_status(tech_id):
+    """
+    Updates a technician's status and/or position, e.g. when they go off duty or move.
+    Expects JSON such as {"status": "available", "latitude": 18.52, "longitude": 73.85}.
+    'busy' is not set by hand: it follows from every job slot being taken.
+    """
+    data = request.get_json(silent=True) or {}
+    status = data.get('status')
+    if status is not None and status not in ('available', 'off_duty'):
+        return jsonify({"error": "status must be 'available' or 'off_duty'"}), 400
+    try:
+        latitude = float(data['latitude']) if data.get('latitude') is not None else None
+        longitude = float(data['longitude']) if data.get('longitude') is not None else None
+    except (ValueError, TypeError):
+        return jsonify({"error": "latitude/longitude must be numbers"}), 400
+    if (latitude is None) != (longitude is None):
+        return jsonify({"error": "latitude and longitude must be given together"}), 400
+
+    if not technician_registry.update(tech_id, status=status, latitude=latitude, longitude=longitude):
+        return jsonify({"error": "Technician not found"}), 404
+    logger.info(f"Technician {tech_id} updated: status={status}, position=({latitude}, {longitude})")
+    record = technician_registry.get(tech_id)
+    return jsonify({"id": tech_id, "status": record.status if record else status,
+                    "position": technician_registry.index.position(tech_id)})
+
+
+@app.route('/api/technicians/<int:tech_id>/jobs', methods=['GET'])
+def get_technician_jobs(tech_id):
+    """A technician's open jobs in service order, with predicted completion times."""
+    record = technician_registry.get(tech_id)
+    if record is None:
+        return jsonify({"error": "Technician not found"}), 404
+    return jsonify({
+        "technician": {**record.to_dict(), "status": record.status,
+                       "capacity": record.capacity, "active_jobs": record.active_jobs},
+        "jobs": [job.to_dict() for job in job_board.queue(tech_id)],
+    })
+
+
+@app.route('/api/technicians/<int:tech_id>/route', methods=['GET'])
+def get_technician_route(tech_id):
+    """Suggested order to visit a technician's open jobs from where they are (nearest neighbour + 2-opt)."""
+    plan = route_planner.plan(tech_id)
+    if plan is None:
+        return jsonify({"error": "Technician not found"}), 404
+    return jsonify(plan)
+
+
+@app.route('/api/jobs/<int:job_id>/complete', methods=['POST'])
+def complete_job(job_id):
+    """Marks a job done: the complaint is resolved and the technician's slot is freed."""
+    job = job_board.complete(job_id)
+    if job is None:
+        return jsonify({"error": "No open job with this id"}), 404
+    with db.connection() as conn:
+        conn.execute("UPDATE complaints SET status = 'resolved' WHERE id = ?", (job.complaint_id,))
+        conn.commit()
+    record = technician_registry.get(job.technician_id)
+    logger.info(f"Job {job_id} (complaint {job.complaint_id}) completed by technician {job.technician_id}.")
+    return jsonify({"job_id": job_id, "complaint_id": job.complaint_id, "status": "completed",
+                    "technician": {"id": job.technician_id, "status": record.status if record else None,
+                                   "remaining_jobs": [j.to_dict() for j in job_board.queue(job.technician_id)]}})
+
+
+@app.route('/api/jobs/<int:job_id>/reassign', methods=['POST'])
+def reassign_job(job_id):
+    """
+    Moves an open job to another technician: the one given as {"technician_id": N}, or
+    otherwise the one predicted to finish it first. The new slot is claimed before the old
+    one is released, so the complaint is never left unassigned.
+    """
+    job = job_board.get(job_id)
+    if job is None:
+        return jsonify({"error": "No open job with this id"}), 404
+    data = request.get_json(silent=True) or {}
+    with db.connection() as conn:
+        complaint = conn.execute("SELECT problem, error_code FROM complaints WHERE id = ?", (job.complaint_id,)).fetchone()
+    problem, error_code = complaint if complaint else ('', '')
+
+    if data.get('technician_id') is not None:
+        try:
+            record = technician_registry.get(int(data['technician_id']))
+        except (ValueError, TypeError):
+            return jsonify({"error": "technician_id must be an integer"}), 400
+        if record is None:
+            return jsonify({"error": "Technician not found"}), 404
+        if record.id == job.technician_id:
+            return jsonify({"error": "Job is already assigned to this technician"}), 400
+        new_job = job_board.assign(record, job.complaint_id, job.latitude, job.longitude, job.service_minutes)
+        if new_job is None:
+            return jsonify({"error": f"Technician {record.id} has no free job slot"}), 409
+        assigned_tech = {**record.to_dict(), **new_job.to_dict(), "queue_position": len(job_board.queue(record.id))}
+    else:
+        result = assign_technician(job.complaint_id, job.latitude, job.longitude, problem or '', error_code or '',
+                                   exclude_technician_id=job.technician_id)
+        if result['status'] != 'assigned':
+            return jsonify({"error": result['details']}), 409
+        assigned_tech = result['technician']
+
+    if job_board.detach(job_id) is None:
+        # Completed (or moved) concurrently: the complaint needs no second job
+        job_board.cancel(assigned_tech['job_id'])
+        logger.info(f"Job {job_id} closed while being reassigned; cancelled its replacement job {assigned_tech['job_id']}.")
+        return jsonify({"error": "Job was closed while being reassigned"}), 409
+    with db.connection() as conn:
+        conn.execute("""
+            UPDATE complaints SET status = 'assigned', assigned_technician_id = ?, assigned_technician_name = ?
+            WHERE id = ?
+        """, (assigned_tech['id'], assigned_tech['name'], job.complaint_id))
+        conn.commit()
+    logger.info(f"Job {job_id} (complaint {job.complaint_id}) moved from technician {job.technician_id} "
+                f"to {assigned_tech['id']} as job {assigned_tech['job_id']}.")
+    return jsonify({"previous_job_id": job_id, "previous_technician_id": job.technician_id,
+                    "assigned_technician": assigned_tech})
+
+
+def _complaint_for_key(idempotency_key: str):
+    with db.connection() as conn:
+        row = conn.execute("SELECT id FROM complaints WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+    return row[0] if row else None
+
+def _already_registered(complaint_id: int):
+    """
+    Answers a retried submission (same idempotency_key) with the complaint its first attempt
+    created, in the shape of a fresh /submit_complaint response.
+    """
+    with db.connection() as conn:
+        conn.row_factory = sqlite3.Row
+        complaint = dict(conn.execute("SELECT * FROM complaints WHERE id = ?", (complaint_id,)).fetchone())
+    record = technician_registry.get(complaint['assigned_technician_id']) if complaint['assigned_technician_id'] else None
+    if complaint['status'] == 'assigned' and record is not None:
+        job = next((job for job in job_board.queue(record.id) if job.complaint_id == complaint_id), None)
+        assigned_tech = {"status": "assigned", **record.to_dict(), **(job.to_dict() if job else {})}
+    else:
+        assigned_tech = {"message": "Technician assignment is still pending."}
+    proof = ledger.complaint_proof(complaint_id)
+    logger.info(f"Retried submission answered with existing complaint {complaint_id}.")
+    return jsonify({
+        "message": "Complaint already registered",
+        "complaint_id": complaint_id,
+        "blockchain_receipt": {"receipt_id": proof['receipt_id'], "status": proof['status']} if proof else None,
+        "details": complaint,
+        "assigned_technician": assigned_tech
+    }), 200
 
 @app.route('/submit_complaint', methods=['POST'])
 def submit_complaint():
@@ -481,83 +653,89 @@ def submit_complaint():
 
         error_code = str(data.get('error_code', 'UNKNOWN')).strip().upper()
 
-        assigned_tech_id = None
-        assigned_tech_name = None
-        assigned_tech_details = {}
-        initial_status = 'pending_assignment' # Default status if no tech is assigned
-
-        # Attempt to assign technician based on location (if provided) and specialization
-        assignment_result = assign_technician(
-            complaint_latitude, complaint_longitude,
-            data['problem'], error_code
-        )
-        
-        if assignment_result['status'] == 'assigned':
-            assigned_tech_details = assignment_result['technician']
-            assigned_tech_id = assigned_tech_details['id']
-            assigned_tech_name = assigned_tech_details['name']
-            initial_status = 'assigned' # Update status if assignment successful
-            logger.info(f"Complaint successfully assigned to technician: {assigned_tech_name}")
-        else:
-            logger.warning(f"Technician assignment failed: {assignment_result['details']}")
-            assigned_tech_details = {"message": assignment_result['details']} # Provide reason for failure
+        # A retry of a submission that already went through (its response was lost) gets
+        # the complaint it created instead of a duplicate
+        idempotency_key = data.get('idempotency_key')
+        if idempotency_key is not None:
+            idempotency_key = str(idempotency_key)
+            existing_id = _complaint_for_key(idempotency_key)
+            if existing_id is not None:
+                return _already_registered(existing_id)
 
         # Connect to SQLite database and insert complaint data
-        with sqlite3.connect("complaints.db") as conn:
+        with db.connection() as conn:
             conn.row_factory = sqlite3.Row # Allows accessing columns by name (e.g., row['column_name'])
             cursor = conn.cursor()
             
             try:
-                cursor.execute("""
-                    INSERT INTO complaints 
-                    (chat_id, problem, address, complaint_latitude, complaint_longitude, 
-                     error_code, contact_no, media_path, synced_to_server, 
-                     assigned_technician_id, assigned_technician_name, status)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    data['chat_id'],
-                    data['problem'],
-                    data['address'],
-                    complaint_latitude,
-                    complaint_longitude,
-                    error_code,
-                    data['contact_no'],
-                    media_path,
-                    1, # Mark as synced to server
-                    assigned_tech_id,
-                    assigned_tech_name,
-                    initial_status 
-                ))
+                # Saved first as pending_assignment: the technician's job row refers to the complaint id
+                try:
+                    cursor.execute("""
+                        INSERT INTO complaints 
+                        (chat_id, problem, address, complaint_latitude, complaint_longitude, 
+                         error_code, contact_no, media_path, synced_to_server, status, idempotency_key)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (
+                        data['chat_id'],
+                        data['problem'],
+                        data['address'],
+                        complaint_latitude,
+                        complaint_longitude,
+                        error_code,
+                        data['contact_no'],
+                        media_path,
+                        1, # Mark as synced to server
+                        'pending_assignment',
+                        idempotency_key
+                    ))
+                except sqlite3.IntegrityError:
+                    if idempotency_key is None:
+                        raise
+                    conn.rollback() # A concurrent retry of the same submission inserted it first
+                    return _already_registered(_complaint_for_key(idempotency_key))
                 
                 complaint_id = cursor.lastrowid # Get the ID of the newly inserted row
                 conn.commit() # Commit changes to the database
 
                 logger.info(f"Complaint {complaint_id} saved to SQLite database.")
 
+                assigned_tech_name = None
+                # Attempt to assign technician based on location (if provided), specialization and workload
+                assignment_result = assign_technician(
+                    complaint_id, complaint_latitude, complaint_longitude,
+                    data['problem'], error_code
+                )
+
+                if assignment_result['status'] == 'assigned':
+                    assigned_tech_details = {"status": "assigned", **assignment_result['technician']}
+                    assigned_tech_name = assigned_tech_details['name']
+                    cursor.execute("""
+                        UPDATE complaints
+                        SET status = 'assigned', assigned_technician_id = ?, assigned_technician_name = ?
+                        WHERE id = ?
+                    """, (assigned_tech_details['id'], assigned_tech_name, complaint_id))
+                    conn.commit()
+                    logger.info(f"Complaint successfully assigned to technician: {assigned_tech_name}")
+                else:
+                    logger.warning(f"Technician assignment failed: {assignment_result['details']}")
+                    assigned_tech_details = {"message": assignment_result['details']} # Provide reason for failure
+
                 # Retrieve the full complaint record for blockchain
                 cursor.execute("SELECT * FROM complaints WHERE id = ?", (complaint_id,))
                 complaint = dict(cursor.fetchone()) # Convert Row object to dictionary
                 
                 # Prepare data for blockchain record
-                complaint_record = {
-                    'db_id': complaint_id,
-                    'user_id': data['chat_id'],
-                    'problem': data['problem'],
-                    'location_address': data['address'],
-                    'location_coords': {'lat': complaint_latitude, 'lon': complaint_longitude} if complaint_latitude is not None else None,
-                    'error_code': error_code,
-                    'timestamp': datetime.now().isoformat(),
-                    'assigned_technician': assigned_tech_name if assigned_tech_name else "N/A"
-                }
-                
-                blockchain_hash = ledger.add_complaint(complaint_record) # Add complaint to blockchain
-                logger.info(f"Complaint {complaint_id} added to blockchain. Hash: {blockchain_hash}")
+                complaint_record = complaint_ledger_record(complaint)
+
+                # Queue complaint for the next block; the block builder mines it in the background
+                blockchain_receipt = block_builder.submit(complaint_record)
+                logger.info(f"Complaint {complaint_id} queued for blockchain. Receipt: {blockchain_receipt['receipt_id']}")
                 
                 # Return successful response to the bot
                 return jsonify({
                     "message": "Complaint registered successfully",
                     "complaint_id": complaint_id,
-                    "blockchain_hash": blockchain_hash,
+                    "blockchain_receipt": blockchain_receipt, # Poll /api/blockchain/receipt/<receipt_id> for the block
                     "details": complaint, # Include all saved complaint details
                     "assigned_technician": assigned_tech_details # Include technician details for bot to display
                 }), 200
@@ -574,79 +752,287 @@ def submit_complaint():
         logger.error(f"Unexpected error during complaint submission: {e}", exc_info=True)
         return jsonify({"error": "Internal server error", "details": str(e)}), 500
 
+BLOCKCHAIN_PAGE_SIZE = 50 # Default blocks per /api/blockchain page
+BLOCKCHAIN_MAX_PAGE_SIZE = 500
+
+def _flag(name):
+    """Reads a boolean query-string flag such as ?headers_only=1."""
+    return request.args.get(name, '0').lower() in ('1', 'true', 'yes')
+
 @app.route('/api/blockchain', methods=['GET'])
 def get_blockchain():
-    """Endpoint to view blockchain data."""
-    logger.info("Blockchain data requested.")
-    return jsonify({
-        "chain": ledger.chain,
-        "length": len(ledger.chain),
-        "pending_complaints": ledger.current_complaints
-    })
+    """
+    Endpoint to view blockchain data, one page at a time.
+    Query params: after=<block index> (cursor, default 0), limit=<n> (default 50, max 500),
+    headers_only=1 to leave out complaint payloads.
+    """
+    try:
+        after = int(request.args.get('after', 0))
+        limit = min(int(request.args.get('limit', BLOCKCHAIN_PAGE_SIZE)), BLOCKCHAIN_MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"error": "'after' and 'limit' must be integers"}), 400
+    if after < 0 or limit < 1:
+        return jsonify({"error": "'after' must be >= 0 and 'limit' >= 1"}), 400
+    headers_only = _flag('headers_only')
+    logger.info(f"Blockchain page requested: after={after}, limit={limit}, headers_only={headers_only}")
+
+    blocks = list(ledger.iter_blocks(after=after, limit=limit, headers_only=headers_only))
+    with ledger.lock:
+        length = len(ledger.chain)
+        pending = list(ledger.current_complaints)
+    response = {
+        "chain": blocks,
+        "length": length,
+        "next_after": blocks[-1]['index'] if blocks and blocks[-1]['index'] < length else None,
+        "pending_count": len(pending),
+    }
+    if not headers_only:
+        response["pending_complaints"] = pending
+    return jsonify(response)
+
+@app.route('/api/blockchain/block/<ref>', methods=['GET'])
+def get_block(ref):
+    """Endpoint to fetch a single block by index or by hash."""
+    block = ledger.get_block(ref)
+    if block is None:
+        return jsonify({"error": "Block not found"}), 404
+    return jsonify(block)
+
+@app.route('/api/blockchain/export', methods=['GET'])
+def export_blockchain():
+    """
+    Streams the chain as newline-delimited JSON, one block per line, without
+    building the whole document in memory. Accepts after= and headers_only=1.
+    """
+    try:
+        after = int(request.args.get('after', 0))
+    except ValueError:
+        return jsonify({"error": "'after' must be an integer"}), 400
+    headers_only = _flag('headers_only')
+    logger.info(f"Blockchain export requested: after={after}, headers_only={headers_only}")
+
+    def generate():
+        for block in ledger.iter_blocks(after=after, headers_only=headers_only):
+            yield json.dumps(block, sort_keys=True) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={"Content-Disposition": "attachment; filename=blockchain.ndjson"})
+
+@app.route('/api/blockchain/receipt/<receipt_id>', methods=['GET'])
+def get_receipt_status(receipt_id):
+    """Endpoint to check whether a complaint receipt has been committed to a block."""
+    status = ledger.receipt_status(receipt_id)
+    if status is None:
+        return jsonify({"error": "Unknown receipt"}), 404
+    return jsonify(status)
+
+@app.route('/api/blockchain/proof/<int:db_id>', methods=['GET'])
+def get_complaint_proof(db_id):
+    """Endpoint to fetch the Merkle inclusion proof for a single complaint."""
+    proof = ledger.complaint_proof(db_id)
+    if proof is None:
+        return jsonify({"error": "Complaint not found in the blockchain"}), 404
+    return jsonify(proof)
+
+COMPLAINTS_PAGE_SIZE = 50 # Default complaints per /api/complaints page
+COMPLAINTS_MAX_PAGE_SIZE = 500
+COMPLAINT_FIELDS = ("id", "chat_id", "problem", "address", "complaint_latitude", "complaint_longitude", "error_code",
+                    "contact_no", "media_path", "timestamp", "status", "assigned_technician_id",
+                    "assigned_technician_name", "synced_to_server", "row_version")
+
+def _db_timestamp(value: str) -> str:
+    """An ISO date/time from the query string in the complaints.timestamp format."""
+    return datetime.fromisoformat(value.strip()).strftime('%Y-%m-%d %H:%M:%S')
 
 @app.route('/api/complaints', methods=['GET'])
 def get_complaints():
-    """Endpoint to fetch all complaints."""
-    logger.info("All complaints requested.")
-    with sqlite3.connect("complaints.db") as conn:
-        conn.row_factory = sqlite3.Row
+    """
+    Endpoint to fetch complaints, newest first, one page at a time.
+    Query params: before=<timestamp,id> (cursor from next_before), limit=<n> (default 50, max 500),
+    fields=<comma-separated columns> (id and timestamp are always included), status=<status>,
+    technician_id=<id>, from=<ISO date/time> (inclusive), until=<ISO date/time> (exclusive),
+    total=1 to also count every matching complaint, since=<version> for only the complaints
+    changed after that change version.
+    Each filter and the cursor are one range scan over the (status|technician, timestamp) and
+    timestamp indexes, so a page costs the same however many complaints there are.
+    Responses carry the change version as ETag and answer If-None-Match with 304.
+    """
+    version = _data_version() # Read before the rows: a write in between only causes a refetch
+    not_modified = _not_modified(version)
+    if not_modified is not None:
+        return not_modified
+    try:
+        limit = min(int(request.args.get('limit', COMPLAINTS_PAGE_SIZE)), COMPLAINTS_MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"error": "'limit' must be an integer"}), 400
+    if limit < 1:
+        return jsonify({"error": "'limit' must be >= 1"}), 400
+
+    fields = COMPLAINT_FIELDS
+    if request.args.get('fields'):
+        fields = [field.strip() for field in request.args['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in COMPLAINT_FIELDS]
+        if unknown:
+            return jsonify({"error": f"Unknown field(s): {', '.join(unknown)}"}), 400
+        fields = ["id", "timestamp"] + [field for field in fields if field not in ("id", "timestamp")]
+
+    conditions, params = [], []
+    try:
+        if request.args.get('status'):
+            conditions.append("status = ?")
+            params.append(request.args['status'])
+        if request.args.get('technician_id'):
+            conditions.append("assigned_technician_id = ?")
+            params.append(int(request.args['technician_id']))
+        if request.args.get('from'):
+            conditions.append("timestamp >= ?")
+            params.append(_db_timestamp(request.args['from']))
+        if request.args.get('until'):
+            conditions.append("timestamp < ?")
+            params.append(_db_timestamp(request.args['until']))
+        since = _since()
+    except ValueError:
+        return jsonify({"error": "'technician_id' and 'since' must be integers and 'from'/'until' ISO dates"}), 400
+    filter_conditions, filter_params = list(conditions), list(params) # Without the cursor or since, for the total
+    source = "complaints"
+    if since is not None:
+        conditions.append("row_version > ?")
+        params.append(since)
+        source = "complaints INDEXED BY idx_complaints_row_version" # A delta is small; don't walk the timestamp index
+    if request.args.get('before'):
+        timestamp, _, before_id = request.args['before'].rpartition(',')
+        try:
+            conditions.append("(timestamp, id) < (?, ?)")
+            params += [timestamp, int(before_id)]
+        except ValueError:
+            return jsonify({"error": "'before' must be <timestamp,id> as returned in next_before"}), 400
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    logger.info(f"Complaints page requested: {dict(request.args)}")
+
+    with db.connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM complaints ORDER BY timestamp DESC")
-        complaints = [dict(row) for row in cursor.fetchall()] # Convert all rows to dictionaries
-        
-        return jsonify({
+        cursor.row_factory = sqlite3.Row
+        cursor.execute(f"SELECT {', '.join(fields)} FROM {source} {where} "
+                       f"ORDER BY timestamp DESC, id DESC LIMIT ?", params + [limit + 1])
+        complaints = [dict(row) for row in cursor.fetchall()]
+        has_more = len(complaints) > limit # One extra row tells whether another page exists
+        complaints = complaints[:limit]
+        response = {
             "complaints": complaints,
-            "count": len(complaints)
-        })
+            "count": len(complaints),
+            "next_before": f"{complaints[-1]['timestamp']},{complaints[-1]['id']}" if has_more else None,
+            "version": version,
+        }
+        if _flag('total'):
+            where = f"WHERE {' AND '.join(filter_conditions)}" if filter_conditions else ""
+            response["total"] = conn.execute(f"SELECT COUNT(*) FROM complaints {where}", filter_params).fetchone()[0]
+    return _versioned(jsonify(response), version)
 
 # NEW: Endpoint to fetch technicians data as JSON for live map updates
 @app.route('/api/technicians_live', methods=['GET'])
 def get_technicians_live():
-    """Endpoint to fetch live technician data for the map."""
-    logger.info("Live technician data requested.")
-    with sqlite3.connect("complaints.db") as conn:
+    """
+    Endpoint to fetch live technician data for the map.
+    ?since=<version> returns only technicians changed after that change version; the
+    version is also the ETag, answered with 304 when nothing changed.
+    """
+    version = _data_version()
+    not_modified = _not_modified(version)
+    if not_modified is not None:
+        return not_modified
+    try:
+        since = _since()
+    except ValueError:
+        return jsonify({"error": "'since' must be an integer"}), 400
+    logger.info(f"Live technician data requested (since={since}).")
+    with db.connection() as conn:
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
-        cursor.execute("SELECT id, name, contact_no, latitude, longitude, status, specialization FROM technicians")
+        query = ("SELECT id, name, contact_no, latitude, longitude, status, specialization, capacity, active_jobs, "
+                 "row_version FROM technicians")
+        if since is not None:
+            cursor.execute(f"{query} WHERE row_version > ?", (since,))
+        else:
+            cursor.execute(query)
         technicians = [dict(row) for row in cursor.fetchall()]
-        return jsonify({"technicians": technicians})
+    return _versioned(jsonify({"technicians": technicians, "version": version}), version)
+
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """
+    Server-Sent Events stream of complaint-created, complaint-updated, technician-status-changed,
+    block-sealed and version events. A client that falls too far behind receives a resync
+    event and the stream ends; EventSource reconnects and the client catches up with ?since=.
+    """
+    subscription = event_broker.subscribe()
+    if subscription is None:
+        return jsonify({"error": "Too many event stream clients"}), 503
+    logger.info(f"Event stream opened ({len(event_broker)} client(s)).")
+
+    def generate():
+        try:
+            yield "retry: 3000\n: connected\n\n" # Reconnect delay; changes before this are fetched with ?since=
+            yield from subscription
+        finally:
+            event_broker.unsubscribe(subscription)
+            logger.info(f"Event stream closed ({len(event_broker)} client(s)).")
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/dashboard_snapshot', methods=['GET'])
+def get_dashboard_snapshot():
+    """
+    Stats, technician markers, recent complaints and ledger status in one response, served
+    from the shared in-memory snapshot. The change version is the ETag (304 when unchanged).
+    """
+    data, body = dashboard_snapshot.get()
+    not_modified = _not_modified(data['version'])
+    if not_modified is not None:
+        return not_modified
+    return _versioned(Response(body, mimetype='application/json'), data['version'])
 
 @app.route('/dashboard')
 def dashboard():
     """Renders the main dashboard HTML page."""
     logger.info("Dashboard requested.")
     try:
-        with sqlite3.connect("complaints.db") as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            # Fetch recent complaints for the dashboard
-            cursor.execute("SELECT * FROM complaints ORDER BY timestamp DESC LIMIT 50")
-            complaints = [dict(row) for row in cursor.fetchall()]
-            
-            # Fetch all technicians for the dashboard (initial load)
-            cursor.execute("SELECT * FROM technicians")
-            technicians = [dict(row) for row in cursor.fetchall()] # This is now for initial render and table
-
-            return render_template('dashboard.html',
-                                   complaints=complaints,
-                                   technicians=technicians, # Still pass initial data
-                                   blockchain_status=len(ledger.chain),
-                                   blockchain_valid=ledger.verify_chain())
+        data, _ = dashboard_snapshot.get()
+        return render_template('dashboard.html',
+                               complaints=data['complaints'],
+                               total_complaints=data['stats']['total_complaints'],
+                               technicians=data['technicians'],
+                               blockchain_status=data['blockchain']['chain_length'],
+                               blockchain_valid=data['blockchain']['valid'])
     except Exception as e:
         logger.error(f"Error rendering dashboard: {e}", exc_info=True)
         return "Error loading dashboard.", 500 # Return a simple error message
 
 @app.route('/api/verify_blockchain', methods=['GET'])
 def verify_blockchain():
-    """Endpoint to verify the integrity of the blockchain."""
-    is_valid = ledger.verify_chain()
-    logger.info(f"Blockchain verification status: {is_valid}")
-    return jsonify({
+    """
+    Endpoint to verify the integrity of the blockchain.
+    Only blocks added since the last check are verified; pass ?full=1 for a full audit.
+    Routine checks carry the change version as ETag: with no new block there is nothing new
+    to verify, so a matching If-None-Match is answered with 304.
+    """
+    full_audit = request.args.get('full', '0').lower() in ('1', 'true', 'yes')
+    version = _data_version()
+    if not full_audit:
+        not_modified = _not_modified(version)
+        if not_modified is not None:
+            return not_modified
+    is_valid = ledger.verify_chain(full=full_audit)
+    logger.info(f"Blockchain verification status: {is_valid} (full audit: {full_audit})")
+    response = jsonify({
         "valid": is_valid,
+        "full_audit": full_audit,
         "chain_length": len(ledger.chain),
-        "last_block_hash": ledger.hash_block(ledger.chain[-1]) if ledger.chain else None
+        "verified_upto": ledger.verified_upto,
+        "last_block_hash": ledger.chain[-1]['hash'] if ledger.chain else None,
+        "version": version,
     })
+    return _versioned(response, version) if not full_audit else response
 
 @app.route('/')
 def home():
@@ -658,9 +1044,21 @@ def home():
         "version": "1.0",
         "endpoints": {
             "submit_complaint": "/submit_complaint (POST)",
-            "get_complaints": "/api/complaints (GET)",
-            "blockchain_data": "/api/blockchain (GET)",
-            "verify_blockchain": "/api/verify_blockchain (GET)",
+            "get_complaints": "/api/complaints (GET, ?before=<timestamp,id>&limit=&fields=&status=&technician_id=&from=&until=&since=<version>)",
+            "blockchain_data": "/api/blockchain (GET, ?after=<index>&limit=<n>&headers_only=1)",
+            "blockchain_block": "/api/blockchain/block/<index_or_hash> (GET)",
+            "blockchain_export": "/api/blockchain/export (GET, NDJSON stream)",
+            "receipt_status": "/api/blockchain/receipt/<receipt_id> (GET)",
+            "complaint_proof": "/api/blockchain/proof/<complaint_id> (GET)",
+            "verify_blockchain": "/api/verify_blockchain (GET, ?full=1 for a full audit)",
+            "events": "/api/events (GET, Server-Sent Events)",
+            "dashboard_snapshot": "/api/dashboard_snapshot (GET, cached; ETag = change version)",
+            "technician_status": "/api/technicians/<id>/status (POST)",
+            "technician_jobs": "/api/technicians/<id>/jobs (GET)",
+            "technician_route": "/api/technicians/<id>/route (GET)",
+            "complete_job": "/api/jobs/<job_id>/complete (POST)",
+            "reassign_job": "/api/jobs/<job_id>/reassign (POST, optional {\"technician_id\": N})",
+            "batch_assignment": "/api/assignments/batch (POST)",
             "dashboard": "/dashboard (GET)",
             "health_check": "/health (GET)"
         }
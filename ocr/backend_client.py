@@ -0,0 +1,90 @@
+# backend_client.py
+import asyncio
+import random
+import logging
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Per-request timeouts (seconds). Reads are long: submission runs the DB write, the ledger
+# append and technician assignment before answering.
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT = 45.0
+WRITE_TIMEOUT = 10.0
+POOL_TIMEOUT = 5.0 # Waiting for a free pooled connection
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE_CONNECTIONS = MAX_CONNECTIONS # Keep them all: bursts would otherwise churn new connections
+KEEPALIVE_EXPIRY = 30.0 # Idle pooled connections are closed after this long
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = 0.5 # First retry waits up to this long, doubling each attempt...
+BACKOFF_CAP = 8.0 # ...up to this cap
+RETRY_STATUSES = {429, 502, 503, 504} # Rate limited or the backend/tunnel is momentarily down
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class BackendClient:
+    """
+    Async client for the Flask backend, shared by every conversation of the bot.
+    - One httpx.AsyncClient: keep-alive connections are pooled and reused across
+      submissions instead of a new TCP/TLS handshake per request.
+    - Awaiting a request never blocks the event loop, so other users' conversations keep
+      being answered while a submission is in flight.
+    - Connection errors, timeouts and RETRY_STATUSES are retried with jittered exponential
+      backoff; the last error is raised once attempts run out. Other HTTP errors
+      (httpx.HTTPStatusError) are raised at once, since retrying cannot fix them.
+    """
+
+    def __init__(self, submit_url: str, max_attempts: int = MAX_ATTEMPTS,
+                 timeout: httpx.Timeout = None, limits: httpx.Limits = None):
+        self.submit_url = submit_url
+        self.max_attempts = max_attempts
+        self.timeout = timeout or httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT,
+                                                write=WRITE_TIMEOUT, pool=POOL_TIMEOUT)
+        self.limits = limits or httpx.Limits(max_connections=MAX_CONNECTIONS,
+                                             max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                                             keepalive_expiry=KEEPALIVE_EXPIRY)
+        # Built up front: creating the client loads the TLS context, which would otherwise
+        # stall the event loop during the first submission
+        self._client = self._new_client()
+
+    def _new_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client.is_closed: # Reopened after aclose()
+            self._client = self._new_client()
+        return self._client
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def post_json(self, url: str, payload: dict, max_attempts: int = None) -> dict:
+        """
+        POSTs payload as JSON and returns the decoded response, retrying transient failures
+        (up to max_attempts, default self.max_attempts).
+        """
+        max_attempts = max_attempts or self.max_attempts
+        for attempt in range(max_attempts):
+            last_attempt = attempt == max_attempts - 1
+            try:
+                response = await self.client.post(url, json=payload)
+                if response.status_code in RETRY_STATUSES and not last_attempt:
+                    logger.warning(f"Attempt {attempt + 1}/{max_attempts}: backend answered "
+                                   f"{response.status_code}, retrying.")
+                else:
+                    response.raise_for_status()
+                    return response.json()
+            except httpx.TransportError as e: # Connection errors and timeouts
+                if last_attempt:
+                    raise
+                logger.warning(f"Attempt {attempt + 1}/{max_attempts} to reach the backend failed: {e!r}")
+            await asyncio.sleep(backoff_delay(attempt))
+
+    async def submit_complaint(self, complaint: dict, max_attempts: int = None) -> dict:
+        return await self.post_json(self.submit_url, complaint, max_attempts)
@@ -0,0 +1,97 @@
+# bench_batch_assignment.py
+# Compares one-at-a-time greedy assignment (what /submit_complaint does) with the batch
+# min-cost matching used for the pending_assignment backlog: solve time and total distance.
+# Usage: python bench_batch_assignment.py [--sizes 100x100,1000x1000,1000x300]
+import argparse
+import time
+
+import numpy as np
+
+from dispatch import batch
+from dispatch.batch import INFEASIBLE_COST, auction, hungarian, solve_assignment
+from dispatch.geo import haversine_matrix
+
+
+def make_problem(complaints, technicians, rng):
+    """Cost matrix for complaints clustered around Pune and technicians spread over the city."""
+    lats = 18.5204 + rng.normal(0, 0.08, complaints)
+    lons = 73.8567 + rng.normal(0, 0.08, complaints)
+    tech_lats = 18.5204 + rng.uniform(-0.2, 0.2, technicians)
+    tech_lons = 73.8567 + rng.uniform(-0.2, 0.2, technicians)
+    cost = haversine_matrix(lats, lons, tech_lats, tech_lons)
+    # One required specialization per complaint, two per technician, out of 9
+    complaint_masks = 1 << rng.integers(0, 9, complaints)
+    tech_masks = (1 << rng.integers(0, 9, technicians)) | (1 << rng.integers(0, 9, technicians))
+    cost[(complaint_masks[:, None] & tech_masks[None, :]) == 0] = INFEASIBLE_COST
+    return cost
+
+
+def greedy(cost):
+    """Each complaint in turn takes its nearest still-free feasible technician."""
+    taken = np.zeros(cost.shape[1], dtype=bool)
+    pairs = []
+    for row in range(cost.shape[0]):
+        costs = np.where(taken, np.inf, cost[row])
+        column = int(np.argmin(costs))
+        if costs[column] < INFEASIBLE_COST:
+            taken[column] = True
+            pairs.append((row, column))
+    return pairs
+
+
+def summarize(cost, pairs):
+    """(assigned count, total km) over the feasible pairs."""
+    feasible = [cost[row, column] for row, column in pairs if cost[row, column] < INFEASIBLE_COST]
+    return len(feasible), float(np.sum(feasible))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Greedy vs batch min-cost technician assignment")
+    parser.add_argument("--sizes", default="100x100,1000x1000,1000x300", help="complaints x technicians")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"SciPy linear_sum_assignment available: {batch.linear_sum_assignment is not None}")
+    print(f"{'size':>10} | {'solver':>9} | {'time':>10} | {'assigned':>8} | {'total km':>10} | {'mean km':>8}")
+    print("-" * 70)
+    for size in args.sizes.split(","):
+        complaints, technicians = (int(x) for x in size.split("x"))
+        cost = make_problem(complaints, technicians, rng)
+        work = cost if complaints <= technicians else cost.T
+
+        runs = [("greedy", lambda: greedy(cost))]
+
+        def pairs_of(columns):
+            rows = np.arange(work.shape[0])
+            return list(zip(rows, columns)) if work is cost else list(zip(columns, rows))
+
+        runs.append(("hungarian", lambda: pairs_of(hungarian(work))))
+        if complaints == technicians:
+            runs.append(("auction", lambda: pairs_of(auction(work))))
+        runs.append(("solve", lambda: list(zip(*solve_assignment(cost)))))
+
+        results = {}
+        for name, fn in runs:
+            pairs, elapsed = timed(fn)
+            assigned, total = summarize(cost, pairs)
+            results[name] = (assigned, total)
+            print(f"{size:>10} | {name:>9} | {elapsed:>7.1f} ms | {assigned:>8} | {total:>10.1f} | {total / max(assigned, 1):>8.3f}")
+
+        # Optimal matchings assign at least as many complaints and never travel further in total
+        greedy_assigned, greedy_total = results["greedy"]
+        solved_assigned, solved_total = results["solve"]
+        assert solved_assigned >= greedy_assigned
+        if solved_assigned == greedy_assigned:
+            assert solved_total <= greedy_total + 1e-6
+        print("-" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# bench_bot_backend.py
+# Load test for the bot's backend calls against a local stub of /submit_complaint that
+# takes --delay seconds per request (and answers 503 to a fraction of them). While the
+# submissions are in flight, a simulated conversation handles a message every 10 ms and
+# records how long each one waits for the event loop. Run once with the old pattern
+# (blocking requests.post inside the async handler) and once with BackendClient.
+# Usage: python bench_bot_backend.py [--submissions 20] [--delay 0.5] [--fail-rate 0.1]
+import argparse
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+
+from backend_client import BackendClient
+
+CHAT_TICK_SECONDS = 0.01 # How often the simulated conversation handles a message
+COMPLAINT = {"chat_id": 1, "problem": "AC not cooling", "address": "Hinjewadi, Pune",
+             "contact_no": "9876543210", "error_code": "E1", "media_path": ""}
+
+
+class StubBackend(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, delay, fail_rate):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self.connections = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/submit_complaint"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive, like the real server behind ngrok
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.server.lock:
+            self.server.requests += 1
+            request_id = self.server.requests
+        time.sleep(self.server.delay) # DB write, ledger append and assignment
+        if random.random() < self.server.fail_rate:
+            status, body = 503, {"error": "Service unavailable"}
+        else:
+            status, body = 201, {"complaint_id": request_id, "assigned_technician": None}
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+async def other_conversation(stop, waits):
+    """Another user chatting: each message should be handled within a tick."""
+    while not stop.is_set():
+        scheduled = time.perf_counter()
+        await asyncio.sleep(CHAT_TICK_SECONDS)
+        waits.append(time.perf_counter() - scheduled - CHAT_TICK_SECONDS)
+
+
+async def blocking_submit(url):
+    """The old handler: requests.post straight from the coroutine, retried after a fixed sleep."""
+    for attempt in range(3):
+        try:
+            response = requests.post(url, json=COMPLAINT, timeout=45)
+            response.raise_for_status() # HTTP errors (the 503s included) were not retried
+            return response.json()
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == 2:
+                raise
+            await asyncio.sleep(2)
+
+
+async def run(submit, submissions):
+    stop, waits = asyncio.Event(), []
+    chat = asyncio.create_task(other_conversation(stop, waits))
+    await asyncio.sleep(CHAT_TICK_SECONDS * 5) # Let the conversation settle
+    started = time.perf_counter()
+    results = await asyncio.gather(*(submit() for _ in range(submissions)), return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await chat
+    failures = sum(isinstance(result, Exception) for result in results)
+    return elapsed, failures, np.array(waits) * 1000
+
+
+def report(name, backend, elapsed, failures, waits):
+    print(f"{name:<28} | {elapsed:>7.2f} s | {failures:>4} failed | {backend.requests:>4} req "
+          f"{backend.connections:>4} conn | chat wait p50 {np.percentile(waits, 50):>7.1f} ms "
+          f"p99 {np.percentile(waits, 99):>7.1f} ms  max {waits.max():>7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bot backend client load test against a local stub")
+    parser.add_argument("--submissions", type=int, default=20, help="Complaints submitted concurrently")
+    parser.add_argument("--delay", type=float, default=0.5, help="Stub backend time per request (s)")
+    parser.add_argument("--fail-rate", type=float, default=0.1, help="Fraction of requests answered 503")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING) # BackendClient logs every retry
+
+    print(f"{args.submissions} concurrent submissions, backend {args.delay:g} s/request, "
+          f"{args.fail_rate:.0%} answered 503")
+    print("-" * 118)
+    for name in ("blocking requests.post", "BackendClient (httpx)"):
+        random.seed(1)
+        backend = StubBackend(args.delay, args.fail_rate)
+        threading.Thread(target=backend.serve_forever, daemon=True).start()
+        if name.startswith("blocking"):
+            submit = lambda: blocking_submit(backend.url)
+            elapsed, failures, waits = asyncio.run(run(submit, args.submissions))
+        else:
+            client = BackendClient(backend.url)
+
+            async def run_client():
+                try:
+                    return await run(lambda: client.submit_complaint(COMPLAINT), args.submissions)
+                finally:
+                    await client.aclose()
+            elapsed, failures, waits = asyncio.run(run_client())
+        backend.shutdown()
+        backend.server_close()
+        report(name, backend, elapsed, failures, waits)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# bench_bot_updates.py
+# Updates/second of the bot's update pipeline without contacting Telegram: a simulated
+# complaint surge (--chats users each going through a 4-step conversation) is fed to a
+# real python-telegram-bot Application whose Bot API calls are answered locally after
+# --api-latency seconds.
+# - polling: updates are fetched with getUpdates, one --poll-rtt round trip per batch
+# - webhook: updates are handed to the application as they arrive (what the webhook
+#   listener does with each POST from Telegram)
+# Each mode runs sequentially (the old main()) and with ChatOrderedUpdateProcessor, plus
+# webhook mode with PTB's plain concurrent_updates (no per-chat order) for comparison.
+# Updates a conversation drops, or steps seen out of order, are counted per chat.
+# Usage: python bench_bot_updates.py [--chats 200] [--concurrency 32] [--api-latency 0.05] [--burst]
+import argparse
+import asyncio
+import json
+import time
+
+from telegram import Update
+from telegram.ext import Application, CommandHandler, ConversationHandler, MessageHandler, filters
+from telegram.request import BaseRequest
+
+from update_processor import ChatOrderedUpdateProcessor
+
+STEPS = ["/start", "AC not cooling", "9876543210", "Hinjewadi, Pune"] # One complaint conversation
+PROBLEM, CONTACT, ADDRESS = range(3)
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+
+
+def simulated_updates(chats: int, burst: bool = False) -> list:
+    """
+    A surge of complaints: every chat sends its steps, interleaved with the other chats'
+    (burst: each chat's steps back to back, like a user typing ahead of the bot's replies).
+    """
+    order = [(chat_id, text) for text in STEPS for chat_id in range(1000, 1000 + chats)]
+    if burst:
+        order.sort(key=lambda item: item[0]) # Stable: each chat's steps stay in order
+    updates = []
+    for chat_id, text in order:
+        update_id = len(updates) + 1
+        message = {"message_id": update_id, "date": int(time.time()), "text": text,
+                   "chat": {"id": chat_id, "type": "private"},
+                   "from": {"id": chat_id, "is_bot": False, "first_name": f"user{chat_id}"}}
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text)}]
+        updates.append({"update_id": update_id, "message": message})
+    return updates
+
+
+class FakeTelegram(BaseRequest):
+    """Answers the Bot API locally: getUpdates serves the simulated updates, sendMessage echoes."""
+
+    def __init__(self, updates, api_latency, poll_rtt):
+        self.pending = list(updates)
+        self.api_latency = api_latency
+        self.poll_rtt = poll_rtt
+        self.sent = 0
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None, write_timeout=None,
+                         connect_timeout=None, pool_timeout=None):
+        endpoint = url.rsplit("/", 1)[-1]
+        params = request_data.parameters if request_data else {}
+        if endpoint == "getMe":
+            result = BOT_USER
+        elif endpoint == "getUpdates":
+            await asyncio.sleep(self.poll_rtt)
+            offset = params.get("offset", 0)
+            self.pending = [update for update in self.pending if update["update_id"] >= offset]
+            result = self.pending[:params.get("limit", 100)]
+            if not result:
+                await asyncio.sleep(0.05) # An empty long poll
+        elif endpoint == "sendMessage":
+            await asyncio.sleep(self.api_latency)
+            self.sent += 1
+            result = {"message_id": self.sent, "date": int(time.time()), "text": params["text"],
+                      "chat": {"id": params["chat_id"], "type": "private"}, "from": BOT_USER}
+        else: # deleteWebhook and friends
+            result = True
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+
+def build_application(fake, processor, steps_seen, progress, total):
+    """A ConversationHandler shaped like the complaint flow, each step answering the user."""
+
+    def step(next_state):
+        async def callback(update, context):
+            steps_seen.setdefault(update.effective_chat.id, []).append(update.message.text)
+            await update.message.reply_text("ok")
+            progress["processed"] += 1
+            progress["last"] = time.perf_counter()
+            if progress["processed"] == total:
+                progress["done"].set()
+            return next_state
+        return callback
+
+    builder = Application.builder().token("1:bench").request(fake).get_updates_request(fake)
+    if processor is not None:
+        builder = builder.concurrent_updates(processor)
+    application = builder.build()
+    application.add_handler(ConversationHandler(
+        entry_points=[CommandHandler("start", step(PROBLEM))],
+        states={
+            PROBLEM: [MessageHandler(filters.TEXT & ~filters.COMMAND, step(CONTACT))],
+            CONTACT: [MessageHandler(filters.TEXT & ~filters.COMMAND, step(ADDRESS))],
+            ADDRESS: [MessageHandler(filters.TEXT & ~filters.COMMAND, step(ConversationHandler.END))],
+        },
+        fallbacks=[],
+    ))
+    return application
+
+
+async def run(mode, processor, args):
+    updates = simulated_updates(args.chats, args.burst)
+    fake = FakeTelegram(updates if mode == "polling" else [], args.api_latency, args.poll_rtt)
+    steps_seen, progress = {}, {"processed": 0, "last": None, "done": asyncio.Event()}
+    application = build_application(fake, processor, steps_seen, progress, len(updates))
+    async with application:
+        await application.start()
+        started = time.perf_counter()
+        if mode == "polling":
+            await application.updater.start_polling(poll_interval=0, timeout=0)
+        else:
+            for update in updates:
+                await application.update_queue.put(Update.de_json(update, application.bot))
+        # Until every step is handled, or nothing moves for a second (updates were dropped)
+        while not progress["done"].is_set():
+            processed = progress["processed"]
+            try:
+                await asyncio.wait_for(progress["done"].wait(), timeout=1.0)
+            except asyncio.TimeoutError:
+                if progress["processed"] == processed:
+                    break
+        elapsed = (progress["last"] or time.perf_counter()) - started
+        if mode == "polling":
+            await application.updater.stop()
+        await application.stop()
+    broken = sum(steps_seen.get(chat_id) != STEPS for chat_id in range(1000, 1000 + args.chats))
+    return progress["processed"] / elapsed, elapsed, broken
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bot update throughput benchmark (no Telegram traffic)")
+    parser.add_argument("--chats", type=int, default=200, help="Users filing a complaint at once")
+    parser.add_argument("--concurrency", type=int, default=32, help="ChatOrderedUpdateProcessor limit")
+    parser.add_argument("--api-latency", type=float, default=0.05, help="Simulated Bot API call time (s)")
+    parser.add_argument("--poll-rtt", type=float, default=0.1, help="Simulated getUpdates round trip (s)")
+    parser.add_argument("--burst", action="store_true", help="Each chat sends its steps back to back")
+    args = parser.parse_args()
+
+    print(f"{args.chats} chats x {len(STEPS)} steps = {args.chats * len(STEPS)} updates, "
+          f"Bot API {args.api_latency * 1000:.0f} ms, getUpdates round trip {args.poll_rtt * 1000:.0f} ms")
+    print(f"{'':<34} | {'updates/s':>10} | {'elapsed':>9} | {'broken conversations':>20}")
+    print("-" * 82)
+    runs = [
+        ("polling", "sequential", lambda: None),
+        ("polling", f"{args.concurrency} concurrent, per chat", lambda: ChatOrderedUpdateProcessor(args.concurrency)),
+        ("webhook", "sequential", lambda: None),
+        ("webhook", f"{args.concurrency} concurrent, per chat", lambda: ChatOrderedUpdateProcessor(args.concurrency)),
+        ("webhook", f"{args.concurrency} concurrent, unordered", lambda: args.concurrency),
+    ]
+    for mode, name, processor in runs:
+        rate, elapsed, broken = asyncio.run(run(mode, processor(), args))
+        print(f"{mode + ', ' + name:<34} | {rate:>10.1f} | {elapsed:>7.2f} s | {broken:>20}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# bench_db.py
+# Mixed concurrency benchmark: threads running the dashboard reads against threads
+# inserting complaints, once with a fresh connection per operation on a rollback-journal
+# database (how every module used to talk to SQLite) and once through the pooled WAL layer
+# in db.py. Both runs work on a private copy of the database.
+# Usage: python bench_db.py [--db complaints.db] [--readers 4] [--writers 2] [--seconds 5]
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from db import Database
+
+DASHBOARD_QUERIES = [
+    "SELECT * FROM complaints ORDER BY timestamp DESC LIMIT 50",
+    "SELECT * FROM technicians",
+]
+INSERT_COMPLAINT = """
+    INSERT INTO complaints (chat_id, problem, address, complaint_latitude, complaint_longitude,
+                            error_code, contact_no, status)
+    VALUES (?, 'AC not cooling', 'Hinjewadi, Pune', 18.5913, 73.7389, 'E1', '9876543210', 'pending_assignment')
+"""
+
+
+def copy_database(source, target, journal_mode):
+    with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+        src.backup(dst)
+        dst.execute(f"PRAGMA journal_mode={journal_mode}")
+
+
+def legacy_connection(path):
+    """A new connection per operation, closed afterwards (the old access pattern)."""
+    class Legacy:
+        def __enter__(self):
+            self.conn = sqlite3.connect(path)
+            return self.conn.__enter__()
+
+        def __exit__(self, *exc):
+            try:
+                return self.conn.__exit__(*exc)
+            finally:
+                self.conn.close()
+    return Legacy()
+
+
+def run(connect, readers, writers, seconds):
+    stop = threading.Event()
+    results = {"read": [], "write": []} # Latencies in seconds
+    errors = {"read": 0, "write": 0}
+    lock = threading.Lock()
+
+    def reader():
+        latencies, failed = [], 0
+        while not stop.is_set():
+            began = time.perf_counter()
+            try:
+                with connect() as conn:
+                    for sql in DASHBOARD_QUERIES:
+                        cursor = conn.cursor()
+                        cursor.row_factory = sqlite3.Row
+                        [dict(row) for row in cursor.execute(sql)]
+                latencies.append(time.perf_counter() - began)
+            except sqlite3.OperationalError:
+                failed += 1
+        with lock:
+            results["read"] += latencies
+            errors["read"] += failed
+
+    def writer(chat_id):
+        latencies, failed = [], 0
+        while not stop.is_set():
+            began = time.perf_counter()
+            try:
+                with connect() as conn:
+                    conn.execute(INSERT_COMPLAINT, (chat_id,))
+                latencies.append(time.perf_counter() - began)
+            except sqlite3.OperationalError: # "database is locked"
+                failed += 1
+        with lock:
+            results["write"] += latencies
+            errors["write"] += failed
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def report(name, results, errors, seconds):
+    cells = []
+    for kind in ("read", "write"):
+        latencies = np.array(results[kind]) * 1000
+        p95 = np.percentile(latencies, 95) if len(latencies) else float('nan')
+        cells.append(f"{len(latencies) / seconds:>8.0f}/s  p95 {p95:>7.2f} ms  {errors[kind]:>4} err")
+    print(f"{name:<22} | {cells[0]} | {cells[1]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite access layer concurrency benchmark")
+    parser.add_argument("--db", default="complaints.db", help="Database to copy (left untouched)")
+    parser.add_argument("--readers", type=int, default=4, help="Threads running the dashboard queries")
+    parser.add_argument("--writers", type=int, default=2, help="Threads inserting complaints")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        pooled_path = os.path.join(tmp, "pooled.db")
+        copy_database(args.db, legacy_path, "DELETE")
+        copy_database(args.db, pooled_path, "WAL")
+
+        print(f"{args.readers} reader(s) x dashboard queries, {args.writers} writer(s) x complaint inserts, "
+              f"{args.seconds:g} s each")
+        print(f"{'':<22} | {'dashboard reads':^36} | {'complaint writes':^36}")
+        print("-" * 100)
+        results, errors = run(lambda: legacy_connection(legacy_path), args.readers, args.writers, args.seconds)
+        report("connect per op", results, errors, args.seconds)
+
+        db = Database(pooled_path, pool_size=args.readers + args.writers)
+        results, errors = run(db.connection, args.readers, args.writers, args.seconds)
+        db.close()
+        report("pooled WAL (db.py)", results, errors, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
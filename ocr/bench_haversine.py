@@ -0,0 +1,58 @@
+# bench_haversine.py
+# Compares the per-technician Python haversine loop with the vectorized NumPy path.
+# Usage: python bench_haversine.py [--sizes 100,10000,100000] [--repeat 5]
+import argparse
+import random
+import time
+
+import numpy as np
+
+from dispatch.geo import haversine_distance, haversine_matrix, nearest_k
+
+
+def best_of(fn, repeat):
+    """Runs fn `repeat` times and returns the fastest wall time in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Haversine loop vs NumPy benchmark")
+    parser.add_argument("--sizes", default="100,10000,100000", help="Technician counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=100, help="Complaints in the batch matrix test")
+    args = parser.parse_args()
+
+    random.seed(42)
+    complaint = (18.5204, 73.8567) # Shivajinagar, Pune
+    print(f"{'technicians':>12} | {'python loop+sort':>17} | {'numpy top-1':>12} | {'numpy top-10':>13} | {args.batch}x matrix")
+    print("-" * 80)
+    for size in [int(s) for s in args.sizes.split(",")]:
+        # Spread technicians over Maharashtra
+        lats = np.array([random.uniform(15.6, 22.0) for _ in range(size)])
+        lons = np.array([random.uniform(72.6, 80.9) for _ in range(size)])
+        rows = list(zip(lats.tolist(), lons.tolist()))
+
+        def python_loop():
+            candidates = [(haversine_distance(complaint[0], complaint[1], lat, lon), i) for i, (lat, lon) in enumerate(rows)]
+            candidates.sort(key=lambda x: x[0])
+            return candidates[0]
+
+        loop_ms = best_of(python_loop, args.repeat)
+        top1_ms = best_of(lambda: nearest_k(complaint[0], complaint[1], lats, lons, k=1), args.repeat)
+        top10_ms = best_of(lambda: nearest_k(complaint[0], complaint[1], lats, lons, k=10), args.repeat)
+        batch_lats = lats[:args.batch] + 0.01
+        batch_lons = lons[:args.batch] + 0.01
+        matrix_ms = best_of(lambda: haversine_matrix(batch_lats, batch_lons, lats, lons), max(1, args.repeat // 2))
+
+        # Both paths must agree on the nearest technician
+        assert python_loop()[1] == nearest_k(complaint[0], complaint[1], lats, lons, k=1)[0][0]
+        print(f"{size:>12} | {loop_ms:>14.2f} ms | {top1_ms:>9.2f} ms | {top10_ms:>10.2f} ms | {matrix_ms:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# bench_media.py
+# Per-photo latency and peak memory of the bot's photo ingestion, before and after
+# zero-copy saving, on the sample photos in media/ (optionally upscaled to phone-camera size).
+# - before: download_as_bytearray, full imdecode, imwrite of a re-encoded JPEG, and the OCR
+#   model decoding the saved file again at full size
+# - after:  the original bytes written to disk as received, and one reduced-size decode
+#   (IMREAD_REDUCED_*, see media_pool.ocr_read_mode) as the OCR input
+# Each pipeline runs in a fresh process, so its peak RSS is its own.
+# Usage: python bench_media.py [--media media] [--scale 1] [--rounds 5]
+import argparse
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from media_pool import ocr_read_mode
+
+
+def ingest_before(source, target):
+    with open(source, "rb") as f:
+        img_bytes = bytearray(f.read()) # download_as_bytearray()
+    img = cv2.imdecode(np.frombuffer(img_bytes, np.uint8), cv2.IMREAD_COLOR)
+    cv2.imwrite(target, img)
+    return cv2.imread(target, cv2.IMREAD_COLOR) # OCR input
+
+
+def ingest_after(source, target):
+    shutil.copyfile(source, target) # download_to_drive(): the bytes as received
+    return cv2.imread(target, ocr_read_mode(target)) # OCR input
+
+
+PIPELINES = {"before (decode + re-encode)": ingest_before, "after (original bytes)": ingest_after}
+
+
+def peak_rss_mib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 # KiB on Linux
+
+
+def run_pipeline(name, photos, rounds, results):
+    ingest = PIPELINES[name]
+    baseline = peak_rss_mib()
+    latencies, saved_bytes, ocr_pixels = [], 0, 0
+    with tempfile.TemporaryDirectory() as out_dir:
+        for _ in range(rounds):
+            for i, photo in enumerate(photos):
+                target = os.path.join(out_dir, f"{i}.jpg")
+                started = time.perf_counter()
+                ocr_input = ingest(photo, target)
+                latencies.append(time.perf_counter() - started)
+                saved_bytes += os.path.getsize(target)
+                ocr_pixels += ocr_input.shape[0] * ocr_input.shape[1]
+    results.put((name, latencies, saved_bytes, ocr_pixels, peak_rss_mib(), peak_rss_mib() - baseline))
+
+
+def prepare(media_dir, scale, work_dir):
+    photos = sorted(os.path.join(media_dir, name) for name in os.listdir(media_dir)
+                    if name.lower().endswith((".jpg", ".jpeg")))
+    if scale == 1:
+        return photos
+    scaled = []
+    for i, photo in enumerate(photos):
+        img = cv2.imread(photo)
+        path = os.path.join(work_dir, f"{i}.jpg")
+        cv2.imwrite(path, cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC))
+        scaled.append(path)
+    return scaled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Photo ingestion latency and memory benchmark")
+    parser.add_argument("--media", default="media", help="Directory of sample JPEG photos")
+    parser.add_argument("--scale", type=float, default=1.0, help="Upscale the samples (e.g. 3 for ~12 MP)")
+    parser.add_argument("--rounds", type=int, default=5, help="Passes over the photos")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn") # Clean process per pipeline: its own peak RSS
+    with tempfile.TemporaryDirectory() as work_dir:
+        photos = prepare(args.media, args.scale, work_dir)
+        megapixels = np.mean([np.prod(cv2.imread(photo).shape[:2]) for photo in photos]) / 1e6
+        print(f"{len(photos)} photos (mean {megapixels:.1f} MP) x {args.rounds} rounds")
+        print(f"{'':<28} | {'mean':>9} | {'p95':>9} | {'saved':>9} | {'OCR input':>9} | {'peak RSS (over imports)':>23}")
+        print("-" * 102)
+        for name in PIPELINES:
+            results = context.Queue()
+            process = context.Process(target=run_pipeline, args=(name, photos, args.rounds, results))
+            process.start()
+            name, latencies, saved_bytes, ocr_pixels, rss, growth = results.get()
+            process.join()
+            count = len(latencies)
+            latencies = np.array(latencies) * 1000
+            print(f"{name:<28} | {latencies.mean():>6.2f} ms | {np.percentile(latencies, 95):>6.2f} ms | "
+                  f"{saved_bytes / count / 1024:>6.0f} KB | {ocr_pixels / count / 1e6:>6.2f} MP | "
+                  f"{rss:>6.1f} MiB (+{growth:>5.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
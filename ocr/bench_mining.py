@@ -0,0 +1,64 @@
+# bench_mining.py
+# Benchmarks Proof of Work mining time against worker count and difficulty.
+# Usage: python bench_mining.py [--workers 1,2,4] [--difficulty 12,16,20] [--rounds 5]
+import argparse
+import hashlib
+import os
+import time
+
+from blockchain.miner import ParallelMiner, check_proof
+
+
+def legacy_proof_of_work(last_proof):
+    """The original single-threaded loop (hexdigest + string slice), for comparison."""
+    proof = 0
+    while hashlib.sha256(f'{last_proof}{proof}'.encode()).hexdigest()[:4] != "0000":
+        proof += 1
+    return proof
+
+
+def time_rounds(mine, rounds):
+    """Mines `rounds` chained proofs and returns the mean seconds per proof."""
+    last_proof = 100
+    start = time.perf_counter()
+    for _ in range(rounds):
+        last_proof = mine(last_proof)
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    cpu_count = os.cpu_count() or 1
+    default_workers = sorted({1, 2, 4, cpu_count})
+    parser = argparse.ArgumentParser(description="Proof of Work mining benchmark")
+    parser.add_argument("--workers", default=",".join(str(w) for w in default_workers))
+    parser.add_argument("--difficulty", default="12,16,20", help="Leading zero bits")
+    parser.add_argument("--rounds", type=int, default=5, help="Proofs mined per measurement")
+    args = parser.parse_args()
+
+    workers_list = [int(w) for w in args.workers.split(",")]
+    difficulties = [int(d) for d in args.difficulty.split(",")]
+
+    print(f"CPUs: {cpu_count}, rounds per cell: {args.rounds}")
+    legacy = time_rounds(legacy_proof_of_work, args.rounds)
+    print(f"Legacy hexdigest loop (16 bits, 1 thread): {legacy * 1000:9.1f} ms/proof\n")
+
+    print(f"{'bits':>5} | " + " | ".join(f"{w:>3} worker(s)" for w in workers_list))
+    print("-" * (8 + 16 * len(workers_list)))
+    for bits in difficulties:
+        cells = []
+        for workers in workers_list:
+            miner = ParallelMiner(workers=workers, difficulty_bits=bits)
+            try:
+                miner.mine(1) # Warm up the pool
+                def mine(last_proof):
+                    proof = miner.mine(last_proof)
+                    assert check_proof(last_proof, proof, bits)
+                    return proof
+                cells.append(time_rounds(mine, args.rounds))
+            finally:
+                miner.close()
+        print(f"{bits:>5} | " + " | ".join(f"{t * 1000:8.1f} ms  " for t in cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# bench_routing.py
+# Times the technician route planner (nearest neighbour + 2-opt) and compares its route
+# length with visiting jobs in assignment order, nearest neighbour alone and, for small
+# routes, the brute-force optimum.
+# Usage: python bench_routing.py [--sizes 5,8,30,100] [--repeat 20]
+import argparse
+import itertools
+import random
+import time
+
+import numpy as np
+
+from dispatch.geo import haversine_matrix
+from dispatch.routing import nearest_neighbour_order, plan_route, route_length, two_opt
+
+BRUTE_FORCE_MAX_STOPS = 8
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Route planner benchmark")
+    parser.add_argument("--sizes", default="5,8,30,100", help="Stops per route")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(42)
+    start = (18.5913, 73.7389) # Hinjewadi
+    print(f"{'stops':>6} | {'plan time':>10} | {'queue order':>11} | {'NN only':>8} | {'NN+2-opt':>8} | optimum")
+    print("-" * 72)
+    for size in [int(s) for s in args.sizes.split(",")]:
+        # Jobs clustered around a few Pune neighbourhoods, in random assignment order
+        centres = [(18.5913, 73.7389), (18.5137, 73.9310), (18.5082, 73.7915)]
+        stops = [(c[0] + random.gauss(0, 0.01), c[1] + random.gauss(0, 0.01))
+                 for c in (random.choice(centres) for _ in range(size))]
+        lats = [lat for lat, _ in stops]
+        lons = [lon for _, lon in stops]
+
+        timings = []
+        for _ in range(args.repeat):
+            began = time.perf_counter()
+            plan_route(start[0], start[1], lats, lons)
+            timings.append(time.perf_counter() - began)
+
+        points_lat = np.array([start[0]] + lats)
+        points_lon = np.array([start[1]] + lons)
+        dist = haversine_matrix(points_lat, points_lon, points_lat, points_lon)
+        queue_km = route_length(dist, list(range(size + 1)))
+        nn = nearest_neighbour_order(dist)
+        planned = two_opt(dist, nn)
+        optimum = "-"
+        if size <= BRUTE_FORCE_MAX_STOPS:
+            best = min(route_length(dist, [0] + list(p)) for p in itertools.permutations(range(1, size + 1)))
+            optimum = f"{best:.2f} km ({route_length(dist, planned) / best - 1:+.1%})"
+        print(f"{size:>6} | {min(timings) * 1000:>7.2f} ms | {queue_km:>8.2f} km | {route_length(dist, nn):>5.2f} km | "
+              f"{route_length(dist, planned):>5.2f} km | {optimum}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# bench_specializations.py
+# Compares the old substring if-chain with the compiled specialization rules:
+# inference speed over a complaint corpus and accuracy on labelled samples.
+# Usage: python bench_specializations.py [--corpus complaints.tsv] [--db complaints.db] [--repeat 200]
+#   --corpus: optional file with one "problem<TAB>error_code" complaint per line
+import argparse
+import os
+import sqlite3
+import time
+
+from dispatch.specs import SpecializationRules
+
+# Labelled complaints in the style users send to the bot: (problem, error code, expected specializations)
+LABELLED = [
+    ("AC not cooling", "NOT_PROVIDED", {"AC"}),
+    ("My split AC is leaking water inside the room", "NOT_PROVIDED", {"AC"}),
+    ("air conditioner making loud noise", "E6", {"AC"}),
+    ("Refrigerator making strange noise", "NOT_PROVIDED", {"Refrigerator"}),
+    ("Fridge not cooling properly", "F01", {"Refrigerator"}),
+    ("freezer has too much ice", "NOT_PROVIDED", {"Refrigerator"}),
+    ("Washing machine not spinning", "UE", {"Washing Machine"}),
+    ("washer drum makes banging sound during spin", "NOT_PROVIDED", {"Washing Machine"}),
+    ("front load machine door will not open", "DE", {"Washing Machine"}),
+    ("tv is not working", "1234", {"TV"}),
+    ("Television shows no picture, only sound", "E10", {"TV"}),
+    ("smart tv remote not responding", "NOT_PROVIDED", {"TV"}),
+    ("screen flickering", "E11", {"TV"}),
+    ("Geyser not heating water", "NOT_PROVIDED", {"Geyser"}),
+    ("no hot water from bathroom heater", "NOT_PROVIDED", {"Geyser"}),
+    ("Microwave sparks when running", "NOT_PROVIDED", {"Microwave"}),
+    ("micro oven display not working", "NOT_PROVIDED", {"Microwave"}),
+    ("induction cooktop shows error and stops", "NOT_PROVIDED", {"Induction"}),
+    ("dishwasher not draining", "NOT_PROVIDED", {"Dishwasher"}),
+    ("dish washer leaves plates dirty", "NOT_PROVIDED", {"Dishwasher"}),
+    ("Water purifier noise", "NOT_PROVIDED", {"Water Purifier"}),
+    ("RO purifier water tastes bad", "NOT_PROVIDED", {"Water Purifier"}),
+    ("machine is making a loud noise", "NOT_PROVIDED", set()),
+    ("Please send someone to check it, the display is blank", "NOT_PROVIDED", {"TV"}),
+    ("Technician did not reach, very bad service", "NOT_PROVIDED", set()),
+    ("unit shows code", "E12", set()),
+]
+
+
+def legacy_required_specs(problem, error_code):
+    """The substring if-chain assign_technician used before the compiled rules."""
+    required_specs = set()
+    problem_lower = problem.lower()
+    error_code_upper = error_code.upper()
+    if "ac" in problem_lower or "cooling" in problem_lower or "e1" in error_code_upper or "h1" in error_code_upper:
+        required_specs.add("AC")
+    if "refrigerator" in problem_lower or "fridge" in problem_lower or "f0" in error_code_upper:
+        required_specs.add("Refrigerator")
+    if "washing machine" in problem_lower or "wash" in problem_lower:
+        required_specs.add("Washing Machine")
+    if "tv" in problem_lower or "display" in problem_lower:
+        required_specs.add("TV")
+    if "induction" in problem_lower:
+        required_specs.add("Induction")
+    if "microoven" in problem_lower or "microwave" in problem_lower:
+        required_specs.add("Microwave")
+    if "geyser" in problem_lower:
+        required_specs.add("Geyser")
+    if "dishwasher" in problem_lower:
+        required_specs.add("Dishwasher")
+    if "water purifier" in problem_lower:
+        required_specs.add("Water Purifier")
+    return required_specs
+
+
+def load_corpus(corpus_path, db_path):
+    """Complaint (problem, error_code) pairs from the corpus file, the complaints table and the labelled set."""
+    corpus = [(problem, code) for problem, code, _ in LABELLED]
+    if corpus_path:
+        with open(corpus_path, "r", encoding="utf-8") as f:
+            for line in f:
+                problem, _, code = line.rstrip("\n").partition("\t")
+                if problem:
+                    corpus.append((problem, code or "NOT_PROVIDED"))
+    if db_path and os.path.exists(db_path):
+        with sqlite3.connect(f"file:{db_path}?mode=ro", uri=True) as conn:
+            corpus += [(problem or "", code or "") for problem, code in
+                       conn.execute("SELECT problem, error_code FROM complaints")]
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Specialization inference benchmark")
+    parser.add_argument("--corpus", help="File with one 'problem<TAB>error_code' complaint per line")
+    parser.add_argument("--db", default="complaints.db", help="Also read complaints from this SQLite DB")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rules = SpecializationRules()
+    corpus = load_corpus(args.corpus, args.db)
+    print(f"Corpus: {len(corpus)} complaints, {args.repeat} passes")
+
+    for name, infer in (("legacy if-chain", legacy_required_specs), ("compiled rules", rules.infer)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for problem, code in corpus:
+                infer(problem, code)
+        elapsed = time.perf_counter() - start
+        per_call_us = elapsed / (args.repeat * len(corpus)) * 1e6
+        correct = sum(infer(problem, code) == expected for problem, code, expected in LABELLED)
+        print(f"{name:>16}: {per_call_us:6.2f} us/complaint | labelled accuracy {correct}/{len(LABELLED)}")
+
+    print("\nDisagreements (legacy -> compiled):")
+    for problem, code, expected in LABELLED:
+        old, new = legacy_required_specs(problem, code), rules.infer(problem, code)
+        if old != new:
+            mark = "ok " if new == expected else "BAD"
+            print(f"  [{mark}] {problem!r} ({code}): {sorted(old)} -> {sorted(new)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# blockchain/builder.py
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class BlockBuilder:
+    """
+    Background block builder for a ComplaintLedger.
+    Complaints are queued in the ledger's pending list (the "mempool") and a single
+    worker thread seals them into blocks once either threshold is reached:
+    - max_block_size complaints are pending, or
+    - the oldest pending complaint has waited max_wait_seconds.
+    """
+
+    def __init__(self, ledger, max_block_size: int = 20, max_wait_seconds: float = 10.0):
+        self.ledger = ledger
+        self.max_block_size = max_block_size
+        self.max_wait_seconds = max_wait_seconds
+        self._wakeup = threading.Condition()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Starts the worker thread (idempotent)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="block-builder", daemon=True)
+        self._thread.start()
+        logger.info(f"BlockBuilder started (max_block_size={self.max_block_size}, max_wait_seconds={self.max_wait_seconds}).")
+
+    def stop(self, flush: bool = True):
+        """
+        Stops the worker thread.
+        Args:
+            flush (bool): Seal whatever is still pending before returning.
+        """
+        self._stopped.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        if self._thread:
+            self._thread.join()
+        if flush:
+            self.flush()
+        logger.info("BlockBuilder stopped.")
+
+    def submit(self, complaint_data: dict) -> dict:
+        """
+        Queues a complaint for the next block and returns its pending receipt immediately.
+        Args:
+            complaint_data (dict): The complaint details.
+        Returns:
+            dict: The pending receipt from ComplaintLedger.add_complaint.
+        """
+        receipt = self.ledger.add_complaint(complaint_data)
+        with self._wakeup:
+            self._wakeup.notify()
+        return receipt
+
+    def flush(self) -> list:
+        """Seals every pending complaint right now. Returns the new blocks."""
+        blocks = []
+        while True:
+            block = self.ledger.seal_block(self.max_block_size)
+            if block is None:
+                return blocks
+            blocks.append(block)
+
+    def _seconds_until_due(self):
+        """Seconds until the pending list must be sealed: 0 if due now, None if nothing is pending."""
+        with self.ledger.lock:
+            pending = len(self.ledger.current_complaints)
+            pending_since = self.ledger.pending_since
+        if pending == 0:
+            return None
+        if pending >= self.max_block_size:
+            return 0
+        return max(0.0, self.max_wait_seconds - (time.monotonic() - pending_since))
+
+    def _run(self):
+        while not self._stopped.is_set():
+            with self._wakeup:
+                wait = self._seconds_until_due()
+                if wait != 0:
+                    self._wakeup.wait(timeout=wait) # None waits until the next submit
+                    continue
+            try:
+                self.ledger.seal_block(self.max_block_size)
+            except Exception as e:
+                logger.error(f"BlockBuilder failed to seal a block: {e}", exc_info=True)
+                self._stopped.wait(1) # Avoid a hot loop if sealing keeps failing
@@ -1,138 +1,378 @@
 # blockchain/ledger.py
 import hashlib
 import json
+import threading
+import time
 from datetime import datetime
 import logging
 
+from blockchain.merkle import merkle_proof, merkle_root
+from blockchain.miner import DEFAULT_DIFFICULTY_BITS, check_proof, search_proof
+
 logger = logging.getLogger(__name__)
 
 class ComplaintLedger:
-    def __init__(self):
-        self.chain = []
+    def __init__(self, difficulty_bits: int = DEFAULT_DIFFICULTY_BITS, miner=None, store=None):
+        """
+        Args:
+            difficulty_bits (int): Leading zero bits required of each new block's proof.
+            miner (ParallelMiner, optional): Process-pool miner; without one, proofs are
+                searched in the calling thread.
+            store (BlockStore, optional): Durable block storage. The chain is kept in
+                memory only when no store is given.
+        """
+        self.difficulty_bits = difficulty_bits
+        self.miner = miner
+        self.store = store
+        self.chain = store if store is not None else []
         self.current_complaints = []
+        self.receipts = {} # {receipt_id: block index, or None while still pending}
+        self.complaint_receipts = {} # {complaint db_id: receipt_id} for the in-memory chain
+        self.pending_since = None # Time the oldest pending complaint arrived
+        self.lock = threading.RLock() # Guards chain/pending state shared with the block builder
+        self.verified_upto = 0 # Blocks [0, verified_upto) passed verification; routine checks resume here
+        self._listeners = [] # Called with each new block, see add_listener
+        if self.chain:
+            # Resume an existing on-disk chain
+            self.verified_upto = store.load_checkpoint()
+            logger.info(f"ComplaintLedger resumed with {len(self.chain)} block(s), verified up to {self.verified_upto}.")
+            return
         # Create the genesis block
         self.new_block(proof=1, previous_hash='1') # Changed genesis proof to 1
         logger.info("ComplaintLedger initialized with genesis block.")
 
-    def new_block(self, proof, previous_hash=None):
+    def new_block(self, proof, previous_hash=None, complaints=None):
         """
         Creates a new Block in the Blockchain.
         Args:
             proof (int): The proof given by the Proof of Work algorithm.
             previous_hash (str, optional): Hash of previous Block. Defaults to None.
+            complaints (list, optional): Complaints to seal into the block.
+                Defaults to (and clears) the whole pending list.
         Returns:
             dict: The new Block.
         """
-        block = {
-            'index': len(self.chain) + 1,
-            'timestamp': str(datetime.now()),
-            'complaints': self.current_complaints,
-            'proof': proof,
-            'previous_hash': previous_hash or self.hash_block(self.chain[-1]) if self.chain else '1',
-        }
-        # Reset the current list of complaints
-        self.current_complaints = []
-        self.chain.append(block)
+        with self.lock:
+            if complaints is None:
+                complaints = self.current_complaints
+                # Reset the current list of complaints
+                self.current_complaints = []
+                self.pending_since = None
+            block = {
+                'index': len(self.chain) + 1,
+                'timestamp': str(datetime.now()),
+                'complaints': complaints,
+                'proof': proof,
+                'difficulty_bits': self.difficulty_bits,
+                'previous_hash': previous_hash or self.chain[-1]['hash'] if self.chain else '1',
+            }
+            receipt_ids = [self.hash_complaint(complaint) for complaint in complaints]
+            block['merkle_root'] = merkle_root(receipt_ids)
+            block['hash'] = self.hash_block(block) # Computed once; verify_chain compares against it
+            if self.store is not None:
+                # The store indexes committed receipts on disk, so drop them from memory
+                self.store.append(block, [(receipt_id, complaint.get('db_id'))
+                                          for receipt_id, complaint in zip(receipt_ids, complaints)])
+                for receipt_id in receipt_ids:
+                    self.receipts.pop(receipt_id, None)
+            else:
+                self.chain.append(block)
+                for receipt_id, complaint in zip(receipt_ids, complaints):
+                    self.receipts[receipt_id] = block['index']
+                    if complaint.get('db_id') is not None:
+                        self.complaint_receipts[complaint['db_id']] = receipt_id
         logger.info(f"New block created: Index {block['index']}, Proof {block['proof']}")
+        for listener in list(self._listeners):
+            try:
+                listener(block)
+            except Exception as e:
+                logger.error(f"Block listener failed for block {block['index']}: {e}", exc_info=True)
         return block
 
-    def add_complaint(self, complaint_data: dict) -> str:
+    def add_listener(self, callback):
+        """
+        Registers callback(block) to run after every new block is stored, outside the ledger lock.
+        A failing listener is logged and does not affect the block.
+        """
+        self._listeners.append(callback)
+
+    def add_complaint(self, complaint_data: dict) -> dict:
         """
         Adds a new complaint to the list of complaints to be included in the next block.
-        After adding, it immediately mines a new block for simplicity.
+        Mining is left to the caller (see blockchain.builder.BlockBuilder), so this returns
+        straight away with a pending receipt.
         Args:
             complaint_data (dict): The complaint details.
         Returns:
-            str: The hash of the newly mined block.
+            dict: The pending receipt ({'receipt_id': ..., 'status': 'pending'}).
+        """
+        receipt_id = self.hash_complaint(complaint_data)
+        with self.lock:
+            if not self.current_complaints:
+                self.pending_since = time.monotonic()
+            self.current_complaints.append(complaint_data)
+            self.receipts[receipt_id] = None
+        logger.info(f"Complaint added to pending list: {complaint_data.get('db_id', 'N/A')} (receipt {receipt_id[:12]})")
+        return {'receipt_id': receipt_id, 'status': 'pending'}
+
+    def seal_block(self, max_complaints=None):
+        """
+        Mines the pending complaints (at most max_complaints of them) into a new block.
+        Proof of Work runs without holding the lock, so complaints keep arriving while mining.
+        Only one caller should seal at a time (the block builder thread).
+        Args:
+            max_complaints (int, optional): Upper bound on complaints per block.
+        Returns:
+            dict: The new Block, or None if nothing was pending.
         """
-        self.current_complaints.append(complaint_data)
-        logger.info(f"Complaint added to pending list: {complaint_data.get('db_id', 'N/A')}")
+        with self.lock:
+            if not self.current_complaints:
+                return None
+            batch = self.current_complaints[:max_complaints]
+            self.current_complaints = self.current_complaints[len(batch):]
+            self.pending_since = time.monotonic() if self.current_complaints else None
+            last_block = self.chain[-1]
 
-        # Mine a block immediately after adding a complaint for real-time updates
-        # In a production blockchain, mining occurs periodically or based on a transaction threshold.
-        last_block = self.chain[-1]
         proof = self.proof_of_work(last_block['proof'])
-        new_block = self.new_block(proof, self.hash_block(last_block))
-        new_block_hash = self.hash_block(new_block)
-        logger.info(f"New block mined after complaint: {new_block_hash}")
-        return new_block_hash
+        new_block = self.new_block(proof, last_block['hash'], complaints=batch)
+        logger.info(f"Sealed {len(batch)} complaint(s) into block {new_block['index']}")
+        return new_block
+
+    def receipt_status(self, receipt_id: str):
+        """
+        Looks up a receipt returned by add_complaint.
+        Args:
+            receipt_id (str): The receipt id.
+        Returns:
+            dict: Receipt status, or None if the receipt is unknown.
+        """
+        with self.lock:
+            if receipt_id in self.receipts:
+                block_index = self.receipts[receipt_id]
+            elif self.store is not None:
+                block_index = self.store.find_receipt(receipt_id)
+                if block_index is None:
+                    return None
+            else:
+                return None
+            if block_index is None:
+                return {'receipt_id': receipt_id, 'status': 'pending'}
+            block = self.chain[block_index - 1]
+        return {
+            'receipt_id': receipt_id,
+            'status': 'committed',
+            'block_index': block_index,
+            'block_hash': block['hash'],
+        }
+
+    def complaint_proof(self, db_id: int):
+        """
+        Builds a Merkle inclusion proof for the complaint with this database id.
+        A client checks it by hashing the complaint to its receipt id, folding the audit
+        path up to merkle_root, and hashing the header to block_hash.
+        Args:
+            db_id (int): The complaint's SQLite id.
+        Returns:
+            dict: The proof ('status' is 'pending' if the complaint is not sealed yet),
+                  or None if the complaint is unknown to the ledger.
+        """
+        with self.lock:
+            for complaint in self.current_complaints:
+                if complaint.get('db_id') == db_id:
+                    return {'db_id': db_id, 'receipt_id': self.hash_complaint(complaint), 'status': 'pending'}
+            if self.store is not None:
+                found = self.store.find_complaint(db_id)
+                if found is None:
+                    return None
+                receipt_id, block_index = found
+            else:
+                receipt_id = self.complaint_receipts.get(db_id)
+                block_index = self.receipts.get(receipt_id)
+                if block_index is None:
+                    return None
+            block = self.chain[block_index - 1]
+
+        leaves = [self.hash_complaint(complaint) for complaint in block['complaints']]
+        position = leaves.index(receipt_id)
+        return {
+            'db_id': db_id,
+            'receipt_id': receipt_id,
+            'status': 'committed',
+            'complaint': block['complaints'][position],
+            'block_index': block_index,
+            'block_hash': block['hash'],
+            'block_header': self.block_header(block),
+            'merkle_root': block['merkle_root'],
+            'proof': merkle_proof(leaves, position),
+        }
+
+    def iter_blocks(self, after: int = 0, limit: int = None, headers_only: bool = False):
+        """
+        Yields blocks in chain order, starting after a block index (cursor pagination).
+        Args:
+            after (int): Yield blocks whose 'index' is greater than this (0 = from genesis).
+            limit (int, optional): Maximum number of blocks to yield.
+            headers_only (bool): Yield block headers (plus hash and complaint count)
+                instead of full blocks with complaint payloads.
+        """
+        with self.lock:
+            length = len(self.chain)
+        start = max(after, 0)
+        stop = length if limit is None else min(length, start + limit)
+        for position in range(start, stop):
+            block = self.chain[position]
+            if headers_only:
+                header = self.block_header(block)
+                header.pop('complaints', None)
+                header['hash'] = block['hash']
+                header['complaint_count'] = len(block['complaints'])
+                yield header
+            else:
+                yield block
+
+    def get_block(self, ref: str):
+        """
+        Looks up a single block.
+        Args:
+            ref (str): A block index (e.g. "12") or a block hash.
+        Returns:
+            dict: The block, or None if there is no such block.
+        """
+        if ref.isdigit():
+            position = int(ref) - 1
+            with self.lock:
+                if not 0 <= position < len(self.chain):
+                    return None
+            return self.chain[position]
+        if self.store is not None:
+            return self.store.get_by_hash(ref.lower())
+        with self.lock:
+            return next((block for block in self.chain if block['hash'] == ref.lower()), None)
+
+    @staticmethod
+    def block_header(block: dict) -> dict:
+        """
+        Returns the hashed part of a block: everything except its complaints and stored hash.
+        Blocks written before Merkle roots were added have no header/body split.
+        """
+        if 'merkle_root' not in block:
+            return {key: value for key, value in block.items() if key != 'hash'}
+        return {key: value for key, value in block.items() if key not in ('hash', 'complaints')}
+
+    @staticmethod
+    def hash_complaint(complaint_data: dict) -> str:
+        """
+        Creates the SHA-256 receipt id of a single complaint record.
+        Args:
+            complaint_data (dict): The complaint details.
+        Returns:
+            str: SHA-256 hash string.
+        """
+        complaint_string = json.dumps(complaint_data, sort_keys=True).encode()
+        return hashlib.sha256(complaint_string).hexdigest()
 
     @staticmethod
     def hash_block(block) -> str:
         """
-        Creates a SHA-256 hash of a Block.
+        Creates a SHA-256 hash of a Block's header.
+        Complaints are committed through the header's merkle_root, and the block's own
+        stored 'hash' field is not part of the hashed content.
         Args:
             block (dict): Block to hash.
         Returns:
             str: SHA-256 hash string.
         """
-        block_string = json.dumps(block, sort_keys=True).encode()
+        block_string = json.dumps(ComplaintLedger.block_header(block), sort_keys=True).encode()
         return hashlib.sha256(block_string).hexdigest()
 
     def proof_of_work(self, last_proof: int) -> int:
         """
         Simple Proof of Work Algorithm:
-        - Find a number p' such that hash(pp') contains leading 4 zeroes
+        - Find a number p' such that hash(pp') has difficulty_bits leading zero bits
         - Where p is the previous proof, and p' is the new proof.
         Args:
             last_proof (int): The proof from the previous block.
         Returns:
             int: The new proof.
         """
-        proof = 0
-        while self.valid_proof(last_proof, proof) is False:
-            proof += 1
-        return proof
+        if self.miner is not None:
+            return self.miner.mine(last_proof, self.difficulty_bits)
+        return search_proof(last_proof, self.difficulty_bits)
 
     @staticmethod
-    def valid_proof(last_proof: int, proof: int) -> bool:
+    def valid_proof(last_proof: int, proof: int, difficulty_bits: int = DEFAULT_DIFFICULTY_BITS) -> bool:
         """
-        Validates the Proof: Does hash(last_proof, proof) contain 4 leading zeroes?
+        Validates the Proof: Does hash(last_proof, proof) have difficulty_bits leading zero bits?
         Args:
             last_proof (int): Previous proof.
             proof (int): Current proof.
+            difficulty_bits (int): Required leading zero bits (16 == four hex zeroes).
         Returns:
             bool: True if valid, False otherwise.
         """
-        guess = f'{last_proof}{proof}'.encode()
-        guess_hash = hashlib.sha256(guess).hexdigest()
-        return guess_hash[:4] == "0000"
+        return check_proof(last_proof, proof, difficulty_bits)
 
-    def verify_chain(self) -> bool:
+    def verify_chain(self, full: bool = False) -> bool:
         """
-        Determines if the entire blockchain is valid.
-        Checks hash linking and Proof of Work for each block.
+        Determines if the blockchain is valid.
+        Checks each block's stored hash, hash linking and Proof of Work.
+        Routine checks only look at blocks added since the last successful check
+        (the verified_upto checkpoint), so their cost is O(new blocks).
+        Args:
+            full (bool): Audit the whole chain from the genesis block instead.
         Returns:
             bool: True if valid, False otherwise.
         """
-        if not self.chain:
+        with self.lock:
+            chain_length = len(self.chain)
+            start = 0 if full else self.verified_upto
+        if chain_length == 0:
             logger.warning("Blockchain is empty, cannot verify.")
             return False
 
-        current_block_index = 0
-        while current_block_index < len(self.chain):
+        for current_block_index in range(start, chain_length):
             current_block = self.chain[current_block_index]
-            
-            if current_block_index > 0:
-                previous_block = self.chain[current_block_index - 1]
-                # Check that the hash of the previous block in the chain is correct
-                if current_block['previous_hash'] != self.hash_block(previous_block):
-                    logger.error(f"Chain validation failed: Block {current_block_index} previous_hash mismatch.")
-                    return False
+
+            # Check that the block's content still matches the hash stored when it was created
+            if current_block.get('hash') != self.hash_block(current_block):
+                logger.error(f"Chain validation failed: Block {current_block_index} hash mismatch.")
+                return self._checkpoint_failed(current_block_index)
+
+            # Check that the complaints still match the Merkle root committed in the header
+            if 'merkle_root' in current_block and current_block['merkle_root'] != merkle_root(
+                    [self.hash_complaint(complaint) for complaint in current_block['complaints']]):
+                logger.error(f"Chain validation failed: Block {current_block_index} Merkle root mismatch.")
+                return self._checkpoint_failed(current_block_index)
+
+            # The genesis block has no predecessor to link to or prove against
+            if current_block_index == 0:
+                continue
+
+            previous_block = self.chain[current_block_index - 1]
+            # Check that the block links to the stored hash of the previous block
+            if current_block['previous_hash'] != previous_block['hash']:
+                logger.error(f"Chain validation failed: Block {current_block_index} previous_hash mismatch.")
+                return self._checkpoint_failed(current_block_index)
 
             # Check that the Proof of Work is correct for the current block
             # (validates proof based on previous block's proof)
-            # For the genesis block, this might be handled specially or use a predefined valid proof.
-            if current_block_index > 0:
-                if not self.valid_proof(self.chain[current_block_index - 1]['proof'], current_block['proof']):
-                    logger.error(f"Chain validation failed: Block {current_block_index} Proof of Work invalid.")
-                    return False
-            else: # For genesis block, check if its proof is valid as per initial setup
-                if not self.valid_proof(current_block['proof'], 1): # Check if genesis proof is "valid" with itself or fixed val
-                     # Adjust this logic if your genesis proof is not '1' for example
-                    pass # Or implement specific genesis block PoW check
-
-            current_block_index += 1
-        
-        logger.info("Blockchain verified successfully.")
-        return True
\ No newline at end of file
+            difficulty_bits = current_block.get('difficulty_bits', DEFAULT_DIFFICULTY_BITS)
+            if not self.valid_proof(previous_block['proof'], current_block['proof'], difficulty_bits):
+                logger.error(f"Chain validation failed: Block {current_block_index} Proof of Work invalid.")
+                return self._checkpoint_failed(current_block_index)
+
+        with self.lock:
+            if chain_length > self.verified_upto and self.store is not None:
+                self.store.save_checkpoint(chain_length)
+            self.verified_upto = max(self.verified_upto, chain_length)
+        if start < chain_length:
+            logger.info(f"Blockchain verified successfully ({'full audit' if full else f'blocks {start}-{chain_length - 1}'}).")
+        return True
+
+    def _checkpoint_failed(self, block_index: int) -> bool:
+        """Pulls the checkpoint back to a failing block so routine checks keep reporting it."""
+        with self.lock:
+            self.verified_upto = min(self.verified_upto, block_index)
+            if self.store is not None:
+                self.store.save_checkpoint(self.verified_upto)
+        return False
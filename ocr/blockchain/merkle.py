@@ -0,0 +1,72 @@
+# blockchain/merkle.py
+import hashlib
+
+# Hash of an empty block's complaint list
+EMPTY_ROOT = hashlib.sha256(b'').hexdigest()
+
+
+def _parent(left: bytes, right: bytes) -> bytes:
+    # The 0x01 prefix keeps interior nodes from ever colliding with leaf (complaint) hashes
+    return hashlib.sha256(b'\x01' + left + right).digest()
+
+
+def _levels(leaves: list) -> list:
+    """Returns every level of the tree, leaves first. An odd node out is promoted unchanged."""
+    level = [bytes.fromhex(leaf) for leaf in leaves]
+    levels = [level]
+    while len(level) > 1:
+        next_level = [_parent(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            next_level.append(level[-1])
+        level = next_level
+        levels.append(level)
+    return levels
+
+
+def merkle_root(leaves: list) -> str:
+    """
+    Computes the Merkle root over a list of leaf hashes.
+    Args:
+        leaves (list): Hex SHA-256 leaf hashes (complaint receipt ids), in block order.
+    Returns:
+        str: Hex root hash.
+    """
+    if not leaves:
+        return EMPTY_ROOT
+    return _levels(leaves)[-1][0].hex()
+
+
+def merkle_proof(leaves: list, position: int) -> list:
+    """
+    Builds the audit path for one leaf.
+    Args:
+        leaves (list): Hex leaf hashes, in block order.
+        position (int): Index of the leaf to prove.
+    Returns:
+        list: O(log n) steps of {'hash': sibling hex hash, 'side': 'left' | 'right'},
+              where side is the sibling's position relative to the running hash.
+    """
+    proof = []
+    for level in _levels(leaves)[:-1]:
+        sibling = position ^ 1
+        if sibling < len(level):
+            proof.append({'hash': level[sibling].hex(), 'side': 'left' if sibling < position else 'right'})
+        position //= 2
+    return proof
+
+
+def verify_proof(leaf: str, proof: list, root: str) -> bool:
+    """
+    Checks an audit path from merkle_proof.
+    Args:
+        leaf (str): Hex leaf hash (the complaint's receipt id).
+        proof (list): Audit path from merkle_proof.
+        root (str): Expected hex Merkle root from the block header.
+    Returns:
+        bool: True if the leaf is committed under root.
+    """
+    running = bytes.fromhex(leaf)
+    for step in proof:
+        sibling = bytes.fromhex(step['hash'])
+        running = _parent(sibling, running) if step['side'] == 'left' else _parent(running, sibling)
+    return running.hex() == root
@@ -0,0 +1,129 @@
+# blockchain/miner.py
+import hashlib
+import multiprocessing
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 16 leading zero bits is the same work as the original "0000" hex-prefix rule
+DEFAULT_DIFFICULTY_BITS = 16
+# Nonces a worker tests between checks of the shared stop flag
+DEFAULT_CHUNK_SIZE = 20000
+
+_stop_event = None # Set in each pool worker by _init_worker
+
+
+def target_bytes(difficulty_bits: int) -> bytes:
+    """
+    Returns the 32-byte big-endian target a digest must be below.
+    A digest below 2**(256 - difficulty_bits) has difficulty_bits leading zero bits,
+    so the check is a single bytes comparison instead of hex-encoding and slicing.
+    """
+    if not 0 < difficulty_bits < 256:
+        raise ValueError(f"difficulty_bits must be between 1 and 255, got {difficulty_bits}")
+    return (1 << (256 - difficulty_bits)).to_bytes(32, 'big')
+
+
+def check_proof(last_proof: int, proof: int, difficulty_bits: int = DEFAULT_DIFFICULTY_BITS) -> bool:
+    """Does sha256(f'{last_proof}{proof}') have difficulty_bits leading zero bits?"""
+    digest = hashlib.sha256(f'{last_proof}{proof}'.encode()).digest()
+    return digest < target_bytes(difficulty_bits)
+
+
+def search_proof(last_proof: int, difficulty_bits: int, start: int = 0, step: int = 1,
+                 limit: int = None, stop_event=None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Tests nonces start, start + step, start + 2*step, ... and returns the first valid one.
+    The last_proof prefix is hashed once and the midstate copied for every nonce.
+    Args:
+        last_proof (int): The proof from the previous block.
+        difficulty_bits (int): Required leading zero bits.
+        start (int): First nonce to test.
+        step (int): Stride between nonces (the number of workers sharing the space).
+        limit (int, optional): Give up once nonces reach this value.
+        stop_event (optional): Checked every chunk_size nonces; return None once set.
+        chunk_size (int): Nonces tested between stop_event checks.
+    Returns:
+        int: A valid proof, or None if stopped or the limit was reached.
+    """
+    target = target_bytes(difficulty_bits)
+    prefix = hashlib.sha256(str(last_proof).encode())
+    nonce = start
+    while limit is None or nonce < limit:
+        if stop_event is not None and stop_event.is_set():
+            return None
+        chunk_end = nonce + chunk_size * step
+        if limit is not None:
+            chunk_end = min(chunk_end, limit)
+        for proof in range(nonce, chunk_end, step):
+            h = prefix.copy()
+            h.update(str(proof).encode())
+            if h.digest() < target:
+                return proof
+        nonce = chunk_end + (start - chunk_end) % step # Next nonce in this worker's stride
+    return None
+
+
+def _init_worker(stop_event):
+    global _stop_event
+    _stop_event = stop_event
+
+
+def _search_worker(args):
+    last_proof, difficulty_bits, start, step, chunk_size = args
+    return search_proof(last_proof, difficulty_bits, start=start, step=step,
+                        stop_event=_stop_event, chunk_size=chunk_size)
+
+
+class ParallelMiner:
+    """
+    Proof of Work search spread over a process pool.
+    Worker i tests nonces i, i + W, i + 2W, ... (W = number of workers). The first worker
+    to find a valid proof wins and a shared event stops the others within one chunk.
+    With workers=1 the search runs in the calling process and no pool is started.
+    """
+
+    def __init__(self, workers: int = None, difficulty_bits: int = DEFAULT_DIFFICULTY_BITS,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        target_bytes(difficulty_bits) # Validate early
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.difficulty_bits = difficulty_bits
+        self.chunk_size = chunk_size
+        self._pool = None
+        self._stop_event = None
+        if self.workers > 1:
+            self._stop_event = multiprocessing.Event()
+            self._pool = multiprocessing.Pool(self.workers, initializer=_init_worker,
+                                              initargs=(self._stop_event,))
+        logger.info(f"ParallelMiner ready: {self.workers} worker(s), difficulty {difficulty_bits} bits.")
+
+    def mine(self, last_proof: int, difficulty_bits: int = None) -> int:
+        """
+        Finds a proof for last_proof.
+        Args:
+            last_proof (int): The proof from the previous block.
+            difficulty_bits (int, optional): Override the miner's difficulty for this search.
+        Returns:
+            int: A valid proof.
+        """
+        difficulty_bits = difficulty_bits or self.difficulty_bits
+        if self._pool is None:
+            return search_proof(last_proof, difficulty_bits, chunk_size=self.chunk_size)
+
+        self._stop_event.clear()
+        tasks = [(last_proof, difficulty_bits, i, self.workers, self.chunk_size) for i in range(self.workers)]
+        found = None
+        # Drain every result so no worker is still searching when the next mine() starts
+        for proof in self._pool.imap_unordered(_search_worker, tasks):
+            if proof is not None and found is None:
+                found = proof
+                self._stop_event.set()
+        return found
+
+    def close(self):
+        """Shuts down the worker pool."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
@@ -0,0 +1,371 @@
+# blockchain/storage.py
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Segment record: [payload length u32][crc32 of payload u32][JSON payload]
+RECORD_HEADER = struct.Struct('<II')
+# Index entry, one per block: segment number, offset in segment, record length, block hash
+INDEX_ENTRY = struct.Struct('<IQI32s')
+# Receipt entry, one per sealed complaint: receipt id, block index, complaint db_id (-1 if none)
+RECEIPT_ENTRY = struct.Struct('<32sIq')
+
+DEFAULT_SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_CACHE_SIZE = 1024
+
+
+class BlockStore:
+    """
+    Durable append-only block storage for ComplaintLedger.
+
+    Layout of the store directory:
+    - segment-NNNNNN.log: length-prefixed, CRC-checked JSON blocks, appended in order.
+      A new segment starts once the active one passes segment_max_bytes.
+    - index.bin: fixed-size INDEX_ENTRY per block, so block i is found by seeking to i * 48.
+    - receipts.bin: fixed-size RECEIPT_ENTRY per sealed complaint.
+    - checkpoint: how many blocks have passed verify_chain (see ComplaintLedger.verified_upto).
+
+    Opening the store reads the two small index files and only the tip block; block
+    payloads are read on demand, through mmap for sealed segments. A torn final write
+    (partial record or index entry) is detected and truncated during recovery.
+    The store behaves like the ledger's chain list: len(), store[i], store[-1], iteration
+    and append(block).
+    """
+
+    def __init__(self, directory: str, segment_max_bytes: int = DEFAULT_SEGMENT_MAX_BYTES,
+                 cache_size: int = DEFAULT_CACHE_SIZE, fsync: bool = True):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.cache_size = cache_size
+        self.fsync = fsync
+        self._lock = threading.RLock()
+        self._cache = OrderedDict() # {block index: block}, most recently used last
+        self._sealed_maps = {} # {segment number: mmap} for segments no longer written to
+        os.makedirs(directory, exist_ok=True)
+
+        self._index = bytearray(self._read_whole(self._path('index.bin')))
+        self._receipts = bytearray(self._read_whole(self._path('receipts.bin')))
+        self._recover()
+
+        self._index_file = open(self._path('index.bin'), 'ab')
+        self._receipts_file = open(self._path('receipts.bin'), 'ab')
+        self._active_segment = self._segment_count() - 1 if self._index else 0
+        self._active_file = open(self._segment_path(self._active_segment), 'ab')
+        self._active_fd = os.open(self._segment_path(self._active_segment), os.O_RDONLY)
+        logger.info(f"BlockStore opened at {directory}: {len(self)} block(s), {self._active_segment + 1} segment(s).")
+
+    # --- Paths and raw file helpers ---
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _segment_path(self, segment):
+        return self._path(f'segment-{segment:06d}.log')
+
+    @staticmethod
+    def _read_whole(path):
+        if not os.path.exists(path):
+            return b''
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def _segment_count(self):
+        segment, _, _, _ = self._entry(len(self) - 1)
+        return segment + 1
+
+    def _entry(self, index):
+        return INDEX_ENTRY.unpack_from(self._index, index * INDEX_ENTRY.size)
+
+    def _sync(self, f):
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+
+    # --- Recovery ---
+
+    def _recover(self):
+        """
+        Brings the index and receipt files back in line with the segments after a crash.
+        Blocks are written segment first, then index, then receipts, so:
+        - a partial trailing index/receipt entry is dropped,
+        - index entries pointing past the end of their segment (or failing CRC) are dropped,
+        - complete records after the last indexed one are re-indexed,
+        - anything after the last complete record is truncated,
+        - receipts missing for indexed blocks (re-indexed ones, or a crash between the index
+          and receipts writes) are rebuilt from the blocks' complaints.
+        """
+        torn_index = len(self._index) % INDEX_ENTRY.size
+        if torn_index:
+            logger.warning(f"BlockStore recovery: dropping {torn_index} byte(s) of torn index entry.")
+            del self._index[-torn_index:]
+
+        # Drop index entries whose record is missing or corrupt (index must never lead the segments)
+        while self._index:
+            segment, offset, length, _ = self._entry(len(self) - 1)
+            if self._read_record(segment, offset, length) is not None:
+                break
+            logger.warning(f"BlockStore recovery: index entry for block {len(self) - 1} has no valid record, dropping it.")
+            del self._index[-INDEX_ENTRY.size:]
+
+        # Re-index complete records written after the last indexed block, then truncate the rest
+        if self._index:
+            segment, offset, length, _ = self._entry(len(self) - 1)
+            position = offset + length
+        else:
+            segment, position = 0, 0
+        while True:
+            path = self._segment_path(segment)
+            if not os.path.exists(path):
+                break
+            with open(path, 'rb') as f:
+                data = f.read()
+            while position < len(data):
+                payload = self._decode_record(data, position)
+                if payload is None:
+                    logger.warning(f"BlockStore recovery: truncating torn write in {os.path.basename(path)} at byte {position}.")
+                    with open(path, 'r+b') as f:
+                        f.truncate(position)
+                    data = data[:position]
+                    break
+                block = json.loads(payload)
+                self._index += INDEX_ENTRY.pack(segment, position, RECORD_HEADER.size + len(payload), bytes.fromhex(block['hash']))
+                logger.warning(f"BlockStore recovery: re-indexed block {block['index']} from {os.path.basename(path)}.")
+                position += RECORD_HEADER.size + len(payload)
+            if not os.path.exists(self._segment_path(segment + 1)):
+                break
+            segment, position = segment + 1, 0
+
+        # Receipts can only refer to indexed blocks
+        torn_receipts = len(self._receipts) % RECEIPT_ENTRY.size
+        if torn_receipts:
+            del self._receipts[-torn_receipts:]
+        while self._receipts:
+            _, block_index, _ = RECEIPT_ENTRY.unpack_from(self._receipts, len(self._receipts) - RECEIPT_ENTRY.size)
+            if block_index <= len(self):
+                break
+            del self._receipts[-RECEIPT_ENTRY.size:]
+        self._rebuild_receipts()
+
+        with open(self._path('index.bin'), 'wb') as f:
+            f.write(self._index)
+        with open(self._path('receipts.bin'), 'wb') as f:
+            f.write(self._receipts)
+
+    def _rebuild_receipts(self):
+        """
+        Re-derives receipt entries for blocks after the last one with receipts on file.
+        A block's receipts are written together, so the last such block's entries are
+        rewritten too in case that write was cut short.
+        """
+        from blockchain.ledger import ComplaintLedger # Receipt ids are the ledger's complaint hashes
+        last_block = 0
+        if self._receipts:
+            _, last_block, _ = RECEIPT_ENTRY.unpack_from(self._receipts, len(self._receipts) - RECEIPT_ENTRY.size)
+        while self._receipts and RECEIPT_ENTRY.unpack_from(self._receipts, len(self._receipts) - RECEIPT_ENTRY.size)[1] == last_block:
+            del self._receipts[-RECEIPT_ENTRY.size:]
+        kept = len(self._receipts)
+        for position in range(max(last_block - 1, 0), len(self)):
+            block = self[position]
+            for complaint in block['complaints']:
+                db_id = complaint.get('db_id')
+                self._receipts += RECEIPT_ENTRY.pack(bytes.fromhex(ComplaintLedger.hash_complaint(complaint)),
+                                                     block['index'], -1 if db_id is None else db_id)
+        if len(self) > max(last_block, 1):
+            rebuilt = (len(self._receipts) - kept) // RECEIPT_ENTRY.size
+            logger.warning(f"BlockStore recovery: rebuilt {rebuilt} receipt(s) for blocks {max(last_block, 1)}-{len(self)}.")
+
+    @staticmethod
+    def _decode_record(data, position):
+        """Returns the payload of the record at position, or None if it is partial or corrupt."""
+        if position + RECORD_HEADER.size > len(data):
+            return None
+        length, crc = RECORD_HEADER.unpack_from(data, position)
+        start = position + RECORD_HEADER.size
+        payload = bytes(data[start:start + length])
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            return None
+        return payload
+
+    # --- Reads ---
+
+    def _read_record(self, segment, offset, length):
+        """Returns the JSON payload of a record, or None if it cannot be read intact."""
+        if segment in self._sealed_maps:
+            return self._decode_record(self._sealed_maps[segment], offset)
+        if getattr(self, '_active_segment', None) == segment:
+            return self._decode_record(os.pread(self._active_fd, length, offset), 0)
+        path = self._segment_path(segment)
+        if not os.path.exists(path) or os.path.getsize(path) < offset + length:
+            return None
+        if getattr(self, '_active_segment', segment) != segment:
+            # Sealed segments never change again, so map them once and slice on demand
+            with open(path, 'rb') as f:
+                self._sealed_maps[segment] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._decode_record(self._sealed_maps[segment], offset)
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            return self._decode_record(f.read(length), 0)
+
+    def __len__(self):
+        return len(self._index) // INDEX_ENTRY.size
+
+    def __getitem__(self, index):
+        if not isinstance(index, int):
+            raise TypeError("BlockStore indices must be integers")
+        with self._lock:
+            count = len(self)
+            if index < 0:
+                index += count
+            if not 0 <= index < count:
+                raise IndexError("block index out of range")
+            block = self._cache.get(index)
+            if block is not None:
+                self._cache.move_to_end(index)
+                return block
+            payload = self._read_record(*self._entry(index)[:3])
+            if payload is None:
+                raise IOError(f"Block {index} is unreadable in {self.directory}")
+            block = json.loads(payload)
+            self._remember(index, block)
+            return block
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def _remember(self, index, block):
+        self._cache[index] = block
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _find_aligned(buffer, needle, entry_size, field_offset, reverse=False):
+        """Finds the entry whose field at field_offset equals needle. Returns its entry number or None."""
+        find = buffer.rfind if reverse else buffer.find
+        start, end = 0, len(buffer)
+        while True:
+            position = find(needle, start, end)
+            if position < 0:
+                return None
+            if (position - field_offset) % entry_size == 0:
+                return (position - field_offset) // entry_size
+            if reverse:
+                end = position + len(needle) - 1
+            else:
+                start = position + 1
+
+    def index_of_hash(self, block_hash: str):
+        """Returns the chain position (0-based) of the block with this hash, or None."""
+        try:
+            needle = bytes.fromhex(block_hash)
+        except ValueError:
+            return None
+        if len(needle) != 32:
+            return None
+        return self._find_aligned(self._index, needle, INDEX_ENTRY.size, INDEX_ENTRY.size - 32)
+
+    def get_by_hash(self, block_hash: str):
+        """Returns the block with this hash, or None."""
+        position = self.index_of_hash(block_hash)
+        return None if position is None else self[position]
+
+    def find_receipt(self, receipt_id: str):
+        """Returns the index of the block that sealed this receipt id, or None."""
+        try:
+            needle = bytes.fromhex(receipt_id)
+        except ValueError:
+            return None
+        if len(needle) != 32:
+            return None
+        # Recent receipts are the ones most often polled, so search from the end
+        entry = self._find_aligned(self._receipts, needle, RECEIPT_ENTRY.size, 0, reverse=True)
+        if entry is None:
+            return None
+        return RECEIPT_ENTRY.unpack_from(self._receipts, entry * RECEIPT_ENTRY.size)[1]
+
+    def find_complaint(self, db_id: int):
+        """Returns (receipt_id, block index) for the complaint with this database id, or None."""
+        entry = self._find_aligned(self._receipts, struct.pack('<q', db_id), RECEIPT_ENTRY.size, 36, reverse=True)
+        if entry is None:
+            return None
+        receipt_id, block_index, _ = RECEIPT_ENTRY.unpack_from(self._receipts, entry * RECEIPT_ENTRY.size)
+        return receipt_id.hex(), block_index
+
+    def sealed_complaints(self) -> dict:
+        """Returns {complaint database id: block index} for every complaint with a receipt."""
+        return {db_id: block_index for _, block_index, db_id in RECEIPT_ENTRY.iter_unpack(self._receipts) if db_id >= 0}
+
+    # --- Writes ---
+
+    def append(self, block: dict, receipts=()):
+        """
+        Durably appends a block.
+        Args:
+            block (dict): The block; must carry its 'hash'.
+            receipts (iterable): (receipt_id, db_id) pairs for the complaints it seals.
+        """
+        payload = json.dumps(block, sort_keys=True).encode()
+        record = RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        with self._lock:
+            if self._active_file.tell() and self._active_file.tell() + len(record) > self.segment_max_bytes:
+                self._roll_segment()
+            offset = self._active_file.tell()
+            self._active_file.write(record)
+            self._sync(self._active_file)
+
+            entry = INDEX_ENTRY.pack(self._active_segment, offset, len(record), bytes.fromhex(block['hash']))
+            self._index_file.write(entry)
+            self._sync(self._index_file)
+            self._index += entry
+
+            receipt_bytes = b''.join(
+                RECEIPT_ENTRY.pack(bytes.fromhex(receipt_id), block['index'], -1 if db_id is None else db_id)
+                for receipt_id, db_id in receipts
+            )
+            if receipt_bytes:
+                self._receipts_file.write(receipt_bytes)
+                self._sync(self._receipts_file)
+                self._receipts += receipt_bytes
+            self._remember(len(self) - 1, block)
+
+    def _roll_segment(self):
+        """Closes the active segment (mapping it read-only) and starts the next one."""
+        self._active_file.close()
+        os.close(self._active_fd)
+        with open(self._segment_path(self._active_segment), 'rb') as f:
+            self._sealed_maps[self._active_segment] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._active_segment += 1
+        self._active_file = open(self._segment_path(self._active_segment), 'ab')
+        self._active_fd = os.open(self._segment_path(self._active_segment), os.O_RDONLY)
+        logger.info(f"BlockStore rolled over to segment {self._active_segment}.")
+
+    # --- Verification checkpoint ---
+
+    def load_checkpoint(self) -> int:
+        """Returns the persisted verify_chain checkpoint (0 if none)."""
+        data = self._read_whole(self._path('checkpoint'))
+        return min(int(data), len(self)) if data.strip().isdigit() else 0
+
+    def save_checkpoint(self, verified_upto: int):
+        """Persists the verify_chain checkpoint (written atomically via rename)."""
+        temp_path = self._path('checkpoint.tmp')
+        with open(temp_path, 'w') as f:
+            f.write(str(verified_upto))
+        os.replace(temp_path, self._path('checkpoint'))
+
+    def close(self):
+        with self._lock:
+            self._active_file.close()
+            self._index_file.close()
+            self._receipts_file.close()
+            os.close(self._active_fd)
+            for mapped in self._sealed_maps.values():
+                mapped.close()
+            self._sealed_maps.clear()
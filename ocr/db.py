@@ -0,0 +1,96 @@
+# db.py
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.environ.get("COMPLAINTS_DB", "complaints.db")
+POOL_SIZE = 8 # Idle connections kept open for reuse
+BUSY_TIMEOUT_SECONDS = 5.0 # How long a writer waits for the write lock before "database is locked"
+CACHE_SIZE_KIB = 16 * 1024 # Page cache per connection
+MMAP_SIZE_BYTES = 64 * 1024 * 1024
+STATEMENT_CACHE_SIZE = 256 # Prepared statements kept per connection (sqlite3's cached_statements)
+
+
+class Database:
+    """
+    Pooled SQLite access shared by the app and the bot.
+    - Connections are opened once and handed out from a pool, so each keeps its page cache
+      and prepared statements across requests instead of re-parsing them on every connect.
+      (Flask's threaded server runs every request on a fresh thread, so per-thread
+      connections would be thrown away after one request.)
+    - WAL journal mode: readers never block the writer and the writer never blocks readers.
+    - synchronous=NORMAL (durable across application crashes in WAL mode), a larger page
+      cache, memory-mapped reads, in-memory temp tables and a busy timeout so concurrent
+      writers queue up instead of failing with "database is locked".
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, pool_size: int = POOL_SIZE,
+                 busy_timeout: float = BUSY_TIMEOUT_SECONDS):
+        self.path = path
+        self.pool_size = pool_size
+        self.busy_timeout = busy_timeout
+        self._idle = [] # Connections ready to be handed out
+        self._lock = threading.Lock()
+        self._write_listeners = []
+        with self.connection() as conn:
+            # WAL is a property of the database file: set once, kept by every later connection
+            mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        if mode.lower() != "wal":
+            logger.warning(f"Could not switch {path} to WAL mode (journal_mode={mode}).")
+
+    def _open(self) -> sqlite3.Connection:
+        # Only one caller holds a connection at a time, so it may move between threads
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KIB}")
+        conn.execute(f"PRAGMA mmap_size={MMAP_SIZE_BYTES}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """
+        Checks a connection out of the pool; drop-in for `with sqlite3.connect(path) as conn:`.
+        The block's transaction is committed on success and rolled back on error, then the
+        connection goes back to the pool (row_factory is reset, so setting it is safe).
+        """
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._open()
+        changes = conn.total_changes
+        try:
+            with conn:
+                yield conn
+            wrote = conn.total_changes != changes
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = None
+            with self._lock:
+                if len(self._idle) < self.pool_size:
+                    self._idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+        if wrote:
+            for listener in list(self._write_listeners):
+                listener()
+
+    def add_write_listener(self, callback):
+        """Registers callback() to run after every connection() block that committed changes."""
+        self._write_listeners.append(callback)
+
+    def close(self):
+        """Closes the idle connections (connections still checked out are closed on return)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self.pool_size = 0
+        for conn in idle:
+            conn.close()
@@ -0,0 +1,297 @@
+# dispatch/batch.py
+import threading
+import time
+import logging
+
+import numpy as np
+
+from dispatch.geo import haversine_matrix
+from dispatch.jobs import (AVERAGE_SPEED_KMH, DEFAULT_SERVICE_MINUTES, ROAD_DISTANCE_FACTOR,
+                           UNKNOWN_TRAVEL_MINUTES, service_minutes)
+
+try:
+    # SciPy is optional; when installed its C implementation replaces the solvers below
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+logger = logging.getLogger(__name__)
+
+# Cost of a pair that must not be matched (wrong specialization); far above any real completion time
+INFEASIBLE_COST = 1e6
+# Backlog complaints must be at least this old, so fresh submissions are not assigned twice
+BACKLOG_MIN_AGE_SECONDS = 30
+# The auction is used for large, near-square problems; the Hungarian solver (O(n^2 m) for
+# n <= m rows) handles small or lopsided ones, where the auction's dummy rows slow it down
+HUNGARIAN_MAX_SIZE = 300
+AUCTION_MIN_SQUARENESS = 0.9
+
+
+# --- Min-cost matching solvers ---
+def hungarian(cost: np.ndarray):
+    """
+    Exact min-cost assignment (Hungarian algorithm, shortest augmenting path form).
+    The inner loop over columns is vectorized, giving O(n^2 m) NumPy work.
+    Args:
+        cost (np.ndarray): (n, m) cost matrix with n <= m.
+    Returns:
+        np.ndarray: assigned column for each row.
+    """
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=np.intp) # p[j]: row (1-based) matched to column j, 0 = free
+    way = np.zeros(m + 1, dtype=np.intp)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            free = ~used[1:]
+            improve = free & (reduced < minv[1:])
+            minv[1:][improve] = reduced[improve]
+            way[1:][improve] = j0
+            masked = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(masked)) + 1
+            delta = masked[j1 - 1]
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[~used] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    assignment = np.full(n, -1, dtype=np.intp)
+    columns = np.flatnonzero(p[1:])
+    assignment[p[1:][columns] - 1] = columns
+    return assignment
+
+
+def auction(cost: np.ndarray, scale: int = 1000, epsilon_factor: float = 7.0):
+    """
+    Min-cost assignment with Bertsekas' auction algorithm and epsilon scaling.
+    All unassigned rows bid in parallel each round (Jacobi auction), so every round is a
+    handful of NumPy operations. Costs are rounded to 1/scale units (thousandths of a minute
+    for BatchAssigner's completion-time costs); on those integer costs the final
+    epsilon < 1/n makes the result optimal.
+    Args:
+        cost (np.ndarray): (n, m) cost matrix with n <= m.
+        scale (int): Cost resolution used for the integer rounding.
+        epsilon_factor (float): How fast epsilon shrinks between scaling phases.
+    Returns:
+        np.ndarray: assigned column for each row.
+    """
+    n, m = cost.shape
+    benefit = -np.rint(cost * scale)
+    if n < m:
+        # Dummy rows that value every column equally absorb the surplus columns
+        benefit = np.vstack([benefit, np.zeros((m - n, m))])
+    size = m
+    prices = np.zeros(size)
+    final_epsilon = 1.0 / (size + 1)
+    epsilon = max(float(benefit.max() - benefit.min()) / epsilon_factor, final_epsilon)
+    rows = np.arange(size)
+    while True:
+        owner = np.full(size, -1, dtype=np.intp) # column -> row
+        assigned = np.full(size, -1, dtype=np.intp) # row -> column
+        unassigned = rows
+        while unassigned.size:
+            values = benefit[unassigned] - prices
+            best = np.argmax(values, axis=1)
+            best_value = values[np.arange(unassigned.size), best]
+            if size > 1:
+                values[np.arange(unassigned.size), best] = -np.inf
+                second_value = values.max(axis=1)
+            else:
+                second_value = best_value
+            bids = prices[best] + (best_value - second_value) + epsilon
+            # Each column goes to its highest bidder this round
+            order = np.lexsort((bids, best))
+            won = np.r_[best[order][1:] != best[order][:-1], True]
+            winners = unassigned[order[won]]
+            columns = best[order[won]]
+            previous = owner[columns]
+            assigned[previous[previous >= 0]] = -1
+            owner[columns] = winners
+            assigned[winners] = columns
+            prices[columns] = bids[order[won]]
+            unassigned = np.flatnonzero(assigned < 0)
+        if epsilon <= final_epsilon:
+            return assigned[:n]
+        epsilon = max(epsilon / epsilon_factor, final_epsilon)
+
+
+def solve_assignment(cost: np.ndarray):
+    """
+    Min-cost matching of rows to columns on a rectangular cost matrix.
+    Uses SciPy when installed, else the Hungarian solver for small or lopsided problems
+    and the auction algorithm for large, near-square ones.
+    Returns:
+        tuple: (row indices, column indices) of the matched pairs.
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    if cost.size == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    if linear_sum_assignment is not None:
+        return linear_sum_assignment(cost)
+    transposed = cost.shape[0] > cost.shape[1]
+    work = cost.T if transposed else cost
+    n, m = work.shape
+    if m > HUNGARIAN_MAX_SIZE and n >= AUCTION_MIN_SQUARENESS * m:
+        columns = auction(work)
+    else:
+        columns = hungarian(work)
+    rows = np.arange(work.shape[0])
+    if transposed:
+        rows, columns = columns, rows
+        order = np.argsort(rows)
+        return rows[order], columns[order]
+    return rows, columns
+
+
+# --- Backlog assignment engine ---
+class BatchAssigner:
+    """
+    Assigns the whole pending_assignment backlog at once.
+    Every free job slot of every available technician is a column of the cost matrix;
+    the cost of a complaint in a slot is its predicted completion time in minutes (the
+    technician's current queue, earlier slots, travel from where their queue ends, and
+    service time), built in one vectorized pass. Specialization mismatches are
+    infeasible. The min-cost matching is then booked through the JobBoard, which claims
+    each slot atomically (a slot taken by a concurrent request simply leaves that
+    complaint for the next run).
+    Can run on demand (run_once) or as a periodic background job (start).
+    """
+
+    def __init__(self, registry, job_board, infer_specializations, db,
+                 interval_seconds: float = 60.0, min_age_seconds: float = BACKLOG_MIN_AGE_SECONDS):
+        """
+        Args:
+            registry (TechnicianRegistry): Technician roster used for candidates.
+            job_board (JobBoard): Technician job queues that assignments are booked into.
+            infer_specializations (callable): (problem, error_code) -> set of specialization names.
+            db (db.Database): Database holding the complaints table.
+            interval_seconds (float): Period of the background job.
+            min_age_seconds (float): Complaints younger than this are still being assigned
+                by /submit_complaint and are left alone.
+        """
+        self.registry = registry
+        self.job_board = job_board
+        self.infer_specializations = infer_specializations
+        self.db = db
+        self.interval_seconds = interval_seconds
+        self.min_age_seconds = min_age_seconds
+        self._run_lock = threading.Lock() # One batch at a time
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def run_once(self) -> dict:
+        """Runs one batch assignment. Returns a summary of what was assigned."""
+        with self._run_lock:
+            started = time.perf_counter()
+            with self.db.connection() as conn:
+                pending = conn.execute("""
+                    SELECT id, problem, error_code, complaint_latitude, complaint_longitude
+                    FROM complaints
+                    WHERE status = 'pending_assignment' AND timestamp <= datetime('now', ?)
+                    ORDER BY id
+                """, (f"-{self.min_age_seconds} seconds",)).fetchall()
+            technicians = self.registry.available_records()
+            summary = {"pending": len(pending), "available_technicians": len(technicians), "assigned": []}
+            if not pending or not technicians:
+                return summary
+
+            slots = [(technician, slot) for technician in technicians
+                     for slot in range(max(technician.capacity - technician.active_jobs, 1))]
+            services = [service_minutes(self.infer_specializations(row[1] or '', row[2] or '')) for row in pending]
+            cost = self.build_cost_matrix(pending, services, slots)
+            rows, columns = solve_assignment(cost)
+            # Book each technician's slots in order, so their real queue matches the plan
+            for row, column in sorted(zip(rows.tolist(), columns.tolist()), key=lambda pair: slots[pair[1]][1]):
+                if cost[row, column] >= INFEASIBLE_COST:
+                    continue
+                complaint_id, _, _, lat, lon = pending[row]
+                technician = slots[column][0]
+                job = self.job_board.assign(technician, complaint_id, lat, lon, services[row])
+                if job is None:
+                    continue
+                with self.db.connection() as conn:
+                    cursor = conn.execute("""
+                        UPDATE complaints
+                        SET status = 'assigned', assigned_technician_id = ?, assigned_technician_name = ?
+                        WHERE id = ? AND status = 'pending_assignment'
+                    """, (technician.id, technician.name, complaint_id))
+                    conn.commit()
+                if cursor.rowcount == 0:
+                    # The complaint was handled elsewhere meanwhile; give the slot back
+                    self.job_board.detach(job.id)
+                    continue
+                summary["assigned"].append({
+                    "complaint_id": complaint_id,
+                    "technician_id": technician.id,
+                    "technician_name": technician.name,
+                    **job.to_dict(),
+                })
+            summary["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            logger.info(f"Batch assignment: {len(summary['assigned'])} of {len(pending)} pending complaint(s) assigned "
+                        f"in {summary['elapsed_ms']} ms.")
+            return summary
+
+    def build_cost_matrix(self, pending, services, slots) -> np.ndarray:
+        """Predicted completion minutes of each pending complaint in each free slot; INFEASIBLE_COST on skill mismatch."""
+        technicians = list({technician.id: technician for technician, _ in slots}.values())
+        column_of = {technician.id: i for i, technician in enumerate(technicians)}
+        now = time.time()
+        ends = [self.job_board.queue_end(technician, now) for technician in technicians]
+        ready = np.array([(ready_at - now) / 60.0 for ready_at, _, _ in ends], dtype=np.float64)
+        tech_lats = np.array([lat if lat is not None else np.nan for _, lat, _ in ends], dtype=np.float64)
+        tech_lons = np.array([lon if lon is not None else np.nan for _, _, lon in ends], dtype=np.float64)
+        lats = np.array([row[3] if row[3] is not None else np.nan for row in pending], dtype=np.float64)
+        lons = np.array([row[4] if row[4] is not None else np.nan for row in pending], dtype=np.float64)
+
+        travel = haversine_matrix(lats, lons, tech_lats, tech_lons) * (ROAD_DISTANCE_FACTOR / AVERAGE_SPEED_KMH * 60.0)
+        travel[:, np.isnan(tech_lons)] = UNKNOWN_TRAVEL_MINUTES
+        travel[np.isnan(lats)] = 0.0 # No complaint location: only the queue and service time matter
+
+        tech_masks = np.array([technician.spec_mask for technician in technicians], dtype=np.int64)
+        complaint_masks = np.array([
+            self.registry.spec_mask(self.infer_specializations(row[1] or '', row[2] or ''))
+            for row in pending
+        ], dtype=np.int64)
+        per_technician = travel + ready[None, :] + np.asarray(services, dtype=np.float64)[:, None]
+        per_technician[(complaint_masks[:, None] & tech_masks[None, :]) == 0] = INFEASIBLE_COST
+
+        # Expand technicians to their slots; each further slot starts about one visit later
+        slot_columns = np.array([column_of[technician.id] for technician, _ in slots])
+        slot_offsets = np.array([slot * DEFAULT_SERVICE_MINUTES for _, slot in slots], dtype=np.float64)
+        return np.minimum(per_technician[:, slot_columns] + slot_offsets[None, :], INFEASIBLE_COST)
+
+    # --- Periodic job ---
+
+    def start(self):
+        """Starts the periodic background job (idempotent)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="batch-assigner", daemon=True)
+        self._thread.start()
+        logger.info(f"BatchAssigner started (every {self.interval_seconds}s).")
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval_seconds):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Batch assignment failed: {e}", exc_info=True)
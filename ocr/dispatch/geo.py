@@ -0,0 +1,74 @@
+# dispatch/geo.py
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371 # Radius of Earth in kilometers
+KM_PER_DEGREE = EARTH_RADIUS_KM * math.pi / 180 # Length of one degree of latitude (~111.19 km)
+
+
+# --- Haversine Distance Calculation ---
+def haversine_distance(lat1, lon1, lat2, lon2):
+    """
+    Calculates the distance between two points on Earth using the Haversine formula.
+    Returns distance in kilometers.
+    """
+    lat1_rad = math.radians(lat1)
+    lon1_rad = math.radians(lon1)
+    lat2_rad = math.radians(lat2)
+    lon2_rad = math.radians(lon2)
+
+    dlon = lon2_rad - lon1_rad
+    dlat = lat2_rad - lat1_rad
+
+    a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    return EARTH_RADIUS_KM * c # Distance in kilometers
+
+
+# --- Vectorized (NumPy) distances ---
+def haversine_matrix(lats1, lons1, lats2, lons2):
+    """
+    Haversine distances from every point in set 1 to every point in set 2 in one NumPy pass.
+    Args:
+        lats1, lons1: Latitudes/longitudes (degrees) of the query points (scalars or 1-D arrays).
+        lats2, lons2: Latitudes/longitudes (degrees) of the targets, e.g. all technicians.
+    Returns:
+        np.ndarray: (len(set 1), len(set 2)) matrix of distances in kilometers.
+    """
+    lat1 = np.radians(np.atleast_1d(np.asarray(lats1, dtype=np.float64)))[:, None]
+    lon1 = np.radians(np.atleast_1d(np.asarray(lons1, dtype=np.float64)))[:, None]
+    lat2 = np.radians(np.atleast_1d(np.asarray(lats2, dtype=np.float64)))[None, :]
+    lon2 = np.radians(np.atleast_1d(np.asarray(lons2, dtype=np.float64)))[None, :]
+
+    a = np.sin((lat2 - lat1) / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2)**2
+    # arcsin(sqrt(a)) equals atan2(sqrt(a), sqrt(1 - a)); clip guards against rounding above 1
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_vector(lat, lon, lats, lons):
+    """Distances (km) from one point to every target point, as a 1-D array."""
+    return haversine_matrix(lat, lon, lats, lons)[0]
+
+
+def nearest_k(lat, lon, lats, lons, k: int = 1):
+    """
+    The k targets closest to (lat, lon), using argpartition instead of a full sort.
+    Args:
+        lat, lon (float): Query point.
+        lats, lons: Target coordinate arrays.
+        k (int): Number of targets wanted.
+    Returns:
+        tuple: (indices into the target arrays, distances in km), both closest first.
+    """
+    distances = haversine_vector(lat, lon, lats, lons)
+    k = min(k, len(distances))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp), np.empty(0)
+    if k < len(distances):
+        candidates = np.argpartition(distances, k - 1)[:k]
+    else:
+        candidates = np.arange(len(distances))
+    order = candidates[np.argsort(distances[candidates], kind='stable')]
+    return order, distances[order]
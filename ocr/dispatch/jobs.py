@@ -0,0 +1,260 @@
+# dispatch/jobs.py
+import sqlite3
+import threading
+import time
+from datetime import datetime
+import logging
+
+from dispatch.geo import haversine_distance
+
+logger = logging.getLogger(__name__)
+
+# --- Travel / service time model ---
+AVERAGE_SPEED_KMH = 20.0 # City traffic
+ROAD_DISTANCE_FACTOR = 1.3 # Roads are longer than the straight line
+UNKNOWN_TRAVEL_MINUTES = 60.0 # Used when either end of a trip has no coordinates
+DEFAULT_SERVICE_MINUTES = 45.0
+SERVICE_MINUTES = {
+    "AC": 60.0, "Refrigerator": 60.0, "Washing Machine": 50.0, "TV": 40.0, "Geyser": 45.0,
+    "Microwave": 30.0, "Induction": 30.0, "Dishwasher": 50.0, "Water Purifier": 35.0,
+}
+DEFAULT_CAPACITY = 3 # Open jobs per technician unless set otherwise in the technicians table
+
+
+def travel_minutes(distance_km: float) -> float:
+    """Estimated driving time for a straight-line distance."""
+    if distance_km is None or distance_km == float('inf'):
+        return UNKNOWN_TRAVEL_MINUTES
+    return distance_km * ROAD_DISTANCE_FACTOR / AVERAGE_SPEED_KMH * 60.0
+
+
+def service_minutes(specializations) -> float:
+    """Estimated on-site time: the longest of the required specializations' service times."""
+    return max((SERVICE_MINUTES.get(spec, DEFAULT_SERVICE_MINUTES) for spec in specializations),
+               default=DEFAULT_SERVICE_MINUTES)
+
+
+def _trip_minutes(from_lat, from_lon, to_lat, to_lon) -> float:
+    if None in (from_lat, from_lon, to_lat, to_lon):
+        return UNKNOWN_TRAVEL_MINUTES
+    return travel_minutes(haversine_distance(from_lat, from_lon, to_lat, to_lon))
+
+
+def _iso(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch).isoformat(timespec='seconds')
+
+
+class Job:
+    """One open job in a technician's queue; eta is the predicted completion time (epoch seconds)."""
+    __slots__ = ('id', 'technician_id', 'complaint_id', 'latitude', 'longitude',
+                 'travel_minutes', 'service_minutes', 'eta')
+
+    def __init__(self, id, technician_id, complaint_id, latitude, longitude, travel_minutes, service_minutes, eta):
+        self.id = id
+        self.technician_id = technician_id
+        self.complaint_id = complaint_id
+        self.latitude = latitude
+        self.longitude = longitude
+        self.travel_minutes = travel_minutes
+        self.service_minutes = service_minutes
+        self.eta = eta
+
+    def to_dict(self) -> dict:
+        return {
+            'job_id': self.id,
+            'technician_id': self.technician_id,
+            'complaint_id': self.complaint_id,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'travel_minutes': round(self.travel_minutes, 1),
+            'service_minutes': round(self.service_minutes, 1),
+            'eta': _iso(self.eta),
+        }
+
+
+class JobBoard:
+    """
+    Per-technician job queues with predicted completion times.
+    Each technician works through their queue in order: a new job starts when the
+    previous one is predicted to finish, after driving from its location. The queues
+    live in memory ({technician id: [Job, ...]}) and every change is written through to
+    the technician_jobs table, so they are rebuilt on restart by load().
+    Slots are reserved with TechnicianRegistry.claim/release in the same transaction
+    as the job row, so a technician can never hold more open jobs than their capacity.
+    """
+
+    def __init__(self, registry, db):
+        self.registry = registry
+        self.db = db # db.Database holding the technician_jobs table
+        self._queues = {} # {technician id: [Job, ...]} in service order
+        self._jobs = {} # {job id: Job}
+        self._lock = threading.Lock()
+
+    def load(self):
+        """(Re)loads every open job from SQLite."""
+        with self.db.connection() as conn:
+            rows = conn.execute("""
+                SELECT id, technician_id, complaint_id, latitude, longitude, travel_minutes, service_minutes, eta
+                FROM technician_jobs
+                WHERE status = 'queued'
+                ORDER BY technician_id, id
+            """).fetchall()
+        with self._lock:
+            self._queues.clear()
+            self._jobs.clear()
+            for row in rows:
+                job = Job(*row[:7], datetime.fromisoformat(row[7]).timestamp())
+                self._queues.setdefault(job.technician_id, []).append(job)
+                self._jobs[job.id] = job
+        logger.info(f"JobBoard loaded {len(rows)} open job(s) for {len(self._queues)} technician(s).")
+
+    # --- Queries ---
+
+    def get(self, job_id):
+        """Returns the open Job with this id, or None."""
+        return self._jobs.get(job_id)
+
+    def queue(self, tech_id) -> list:
+        """Open jobs of a technician, in service order."""
+        with self._lock:
+            return list(self._queues.get(tech_id, ()))
+
+    def queue_end(self, record, now: float = None):
+        """When and where a technician will be free: (epoch seconds, lat, lon)."""
+        with self._lock:
+            return self._queue_end(record, time.time() if now is None else now)
+
+    def _queue_end(self, record, now: float):
+        """When and where a technician will be free: (epoch seconds, lat, lon)."""
+        jobs = self._queues.get(record.id)
+        if not jobs:
+            return now, record.latitude, record.longitude
+        last = jobs[-1]
+        if last.latitude is None or last.longitude is None:
+            return max(now, last.eta), record.latitude, record.longitude
+        return max(now, last.eta), last.latitude, last.longitude
+
+    def estimate(self, record, lat, lon, service: float, now: float = None):
+        """
+        Predicts a new job for a technician if appended to their queue.
+        Returns:
+            tuple: (travel_minutes, predicted completion epoch seconds).
+        """
+        with self._lock:
+            return self._estimate(record, lat, lon, service, time.time() if now is None else now)
+
+    def _estimate(self, record, lat, lon, service, now):
+        ready_at, from_lat, from_lon = self._queue_end(record, now)
+        trip = 0.0 if lat is None or lon is None else _trip_minutes(from_lat, from_lon, lat, lon)
+        return trip, ready_at + (trip + service) * 60.0
+
+    def ready_minutes(self, record, now: float = None) -> float:
+        """Minutes until a technician has worked through their current queue."""
+        now = time.time() if now is None else now
+        with self._lock:
+            return (self._queue_end(record, now)[0] - now) / 60.0
+
+    # --- Changes ---
+
+    def assign(self, record, complaint_id, lat, lon, service: float):
+        """
+        Reserves a slot with the technician and appends the job to their queue.
+        Returns:
+            Job: The new job, or None if the technician had no free slot (taken concurrently).
+        """
+        job = None
+        try:
+            with self.db.connection() as conn:
+                if not self.registry.claim(record.id, conn=conn):
+                    return None
+                with self._lock:
+                    # Timed and queued together, so concurrent assignments chain their ETAs
+                    trip, eta = self._estimate(record, lat, lon, service, time.time())
+                    job = Job(None, record.id, complaint_id, lat, lon, trip, service, eta)
+                    self._queues.setdefault(record.id, []).append(job)
+                cursor = conn.execute("""
+                    INSERT INTO technician_jobs
+                    (technician_id, complaint_id, latitude, longitude, travel_minutes, service_minutes, eta)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (record.id, complaint_id, lat, lon, trip, service, _iso(eta)))
+                conn.commit()
+        except sqlite3.Error:
+            if job is not None:
+                with self._lock:
+                    self._queues[record.id].remove(job)
+            self.registry.refresh(record.id) # The slot reservation was rolled back with the job
+            raise
+        with self._lock:
+            job.id = cursor.lastrowid
+            self._jobs[job.id] = job
+        return job
+
+    def complete(self, job_id):
+        """
+        Marks an open job done, frees the technician's slot and re-times the rest of their queue.
+        Returns:
+            Job: The completed job, or None if there is no such open job.
+        """
+        return self._close(job_id, 'completed')
+
+    def detach(self, job_id):
+        """Takes an open job away from its technician (status 'reassigned'), freeing the slot."""
+        return self._close(job_id, 'reassigned')
+
+    def cancel(self, job_id):
+        """Withdraws an open job that should not have been opened (status 'cancelled'), freeing the slot."""
+        return self._close(job_id, 'cancelled')
+
+    def _close(self, job_id, status: str):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        try:
+            with self.db.connection() as conn:
+                cursor = conn.execute("""
+                    UPDATE technician_jobs SET status = ?, completed_at = ?
+                    WHERE id = ? AND status = 'queued'
+                """, (status, datetime.now().isoformat(timespec='seconds'), job_id))
+                if cursor.rowcount == 0:
+                    return None # Closed concurrently
+                self.registry.release(job.technician_id, conn=conn)
+                conn.commit()
+        except sqlite3.Error:
+            self.registry.refresh(job.technician_id)
+            raise
+        with self._lock:
+            self._jobs.pop(job_id, None)
+            jobs = self._queues.get(job.technician_id, [])
+            position = jobs.index(job) if job in jobs else len(jobs)
+            if position < len(jobs):
+                del jobs[position]
+            if position > 0:
+                # Jobs ahead are unaffected; the next one starts where the previous one ends
+                previous = jobs[position - 1]
+                start, origin = previous.eta, (previous.latitude, previous.longitude)
+            elif status == 'completed':
+                start, origin = time.time(), (job.latitude, job.longitude) # Technician is at the finished job
+            else:
+                start, origin = time.time(), None
+        self._retime(job.technician_id, position, start, origin)
+        return job
+
+    def _retime(self, tech_id, position: int, start: float, origin):
+        """Recomputes predicted completion times of a technician's queue from `position` on."""
+        if origin is None or None in origin:
+            record = self.registry.get(tech_id)
+            origin = (record.latitude, record.longitude) if record else (None, None)
+        with self._lock:
+            jobs = list(self._queues.get(tech_id, ())[position:])
+            at, (lat, lon) = start, origin
+            for job in jobs:
+                if job.latitude is not None and job.longitude is not None:
+                    job.travel_minutes = _trip_minutes(lat, lon, job.latitude, job.longitude)
+                    lat, lon = job.latitude, job.longitude
+                at += (job.travel_minutes + job.service_minutes) * 60.0
+                job.eta = at
+        if jobs:
+            with self.db.connection() as conn:
+                conn.executemany("UPDATE technician_jobs SET travel_minutes = ?, eta = ? WHERE id = ?",
+                                 [(job.travel_minutes, _iso(job.eta), job.id) for job in jobs])
+                conn.commit()
@@ -0,0 +1,285 @@
+# dispatch/registry.py
+import threading
+import logging
+
+from dispatch.geo import nearest_k
+from dispatch.spatial import GeoGridIndex
+
+logger = logging.getLogger(__name__)
+
+# Known specializations get fixed bits; anything new found in the table is given the next free bit
+SPECIALIZATIONS = ["AC", "Refrigerator", "Washing Machine", "TV", "Geyser",
+                   "Microwave", "Induction", "Dishwasher", "Water Purifier"]
+
+# Below this many candidates a direct vectorized scan beats walking grid rings
+SMALL_CANDIDATE_SET = 256
+
+
+class TechnicianRecord:
+    """Compact in-memory copy of one technicians row; specializations are a bitmask."""
+    __slots__ = ('id', 'name', 'contact_no', 'latitude', 'longitude', 'status', 'specialization', 'spec_mask',
+                 'capacity', 'active_jobs')
+
+    def __init__(self, id, name, contact_no, latitude, longitude, status, specialization, spec_mask,
+                 capacity=1, active_jobs=0):
+        self.id = id
+        self.name = name
+        self.contact_no = contact_no
+        self.latitude = latitude
+        self.longitude = longitude
+        self.status = status
+        self.specialization = specialization
+        self.spec_mask = spec_mask
+        self.capacity = capacity # Open jobs this technician can hold at once
+        self.active_jobs = active_jobs
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'name': self.name,
+            'contact_no': self.contact_no,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'specialization': self.specialization,
+        }
+
+
+class TechnicianRegistry:
+    """
+    Technician roster loaded once at startup and kept in memory.
+    - Specializations are parsed once into bitmasks, so matching is a single AND.
+    - Per-specialization sets of available technician ids answer "who can take this job"
+      without a scan; positions are kept in a GeoGridIndex for nearest lookups.
+    - Status/position changes are written through to the technicians table.
+    A technician is 'available' while they have a free job slot, 'busy' once active_jobs
+    reaches capacity, and 'off_duty' when taken out of rotation by hand.
+    """
+
+    def __init__(self, db):
+        self.db = db # db.Database holding the technicians table
+        self.index = GeoGridIndex()
+        self._records = {} # {technician id: TechnicianRecord}
+        self._bits = {spec.upper(): 1 << i for i, spec in enumerate(SPECIALIZATIONS)}
+        self._available_by_bit = {bit: set() for bit in self._bits.values()} # {bit: {available ids}}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._records)
+
+    def load(self):
+        """(Re)loads every technician from SQLite."""
+        with self.db.connection() as conn:
+            rows = conn.execute("""
+                SELECT id, name, contact_no, latitude, longitude, status, specialization, capacity, active_jobs
+                FROM technicians
+            """).fetchall()
+        with self._lock:
+            self._records.clear()
+            for bit_set in self._available_by_bit.values():
+                bit_set.clear()
+            for tech_id, name, contact_no, lat, lon, status, specialization, capacity, active_jobs in rows:
+                record = TechnicianRecord(tech_id, name, contact_no, lat, lon, status, specialization,
+                                          self._mask_for_names((specialization or '').split(',')),
+                                          capacity or 1, active_jobs or 0)
+                self._records[tech_id] = record
+                self._set_available(record, status == 'available')
+                if lat is not None and lon is not None:
+                    self.index.insert(tech_id, lat, lon)
+        logger.info(f"TechnicianRegistry loaded {len(rows)} technician(s), {len(self.index)} with coordinates.")
+
+    # --- Specialization bitmasks ---
+
+    def _mask_for_names(self, names) -> int:
+        """Bitmask for specialization names, allocating bits for names not seen before."""
+        mask = 0
+        for name in names:
+            key = name.strip().upper()
+            if not key:
+                continue
+            if key not in self._bits:
+                self._bits[key] = 1 << len(self._bits)
+                self._available_by_bit[self._bits[key]] = set()
+            mask |= self._bits[key]
+        return mask
+
+    def spec_mask(self, specializations) -> int:
+        """Bitmask for the given specialization names (unknown names contribute nothing)."""
+        mask = 0
+        for name in specializations:
+            mask |= self._bits.get(name.strip().upper(), 0)
+        return mask
+
+    def _set_available(self, record, available: bool):
+        mask = record.spec_mask
+        while mask:
+            bit = mask & -mask
+            if available:
+                self._available_by_bit[bit].add(record.id)
+            else:
+                self._available_by_bit[bit].discard(record.id)
+            mask ^= bit
+
+    # --- Queries ---
+
+    def get(self, tech_id):
+        """Returns the TechnicianRecord for an id, or None."""
+        return self._records.get(tech_id)
+
+    def available_ids(self, required_mask: int) -> set:
+        """Ids of available technicians with at least one of the required specializations."""
+        candidates = set()
+        mask = required_mask
+        while mask:
+            bit = mask & -mask
+            candidates |= self._available_by_bit.get(bit, set())
+            mask ^= bit
+        return candidates
+
+    def available_records(self) -> list:
+        """Snapshot of every available technician, in id order."""
+        with self._lock:
+            return sorted((record for record in self._records.values() if record.status == 'available'),
+                          key=lambda record: record.id)
+
+    def has_available(self) -> bool:
+        return any(record.status == 'available' for record in self._records.values())
+
+    def find_nearest(self, lat, lon, required_mask: int, k: int = 1) -> list:
+        """
+        The k nearest available technicians with a required specialization.
+        Without coordinates, technicians are returned in id order with distance inf.
+        Returns:
+            list: (distance_km, TechnicianRecord) tuples, closest first.
+        """
+        with self._lock:
+            candidates = self.available_ids(required_mask)
+            if not candidates:
+                return []
+            if lat is None or lon is None:
+                return [(float('inf'), self._records[tech_id]) for tech_id in sorted(candidates)[:k]]
+
+            located = [tech_id for tech_id in candidates if tech_id in self.index]
+            if len(located) <= SMALL_CANDIDATE_SET:
+                # Few candidates: one vectorized pass over just their coordinates
+                lats = [self._records[tech_id].latitude for tech_id in located]
+                lons = [self._records[tech_id].longitude for tech_id in located]
+                order, distances = nearest_k(lat, lon, lats, lons, k)
+                found = [(distance, located[i]) for i, distance in zip(order.tolist(), distances.tolist())]
+            else:
+                found = self.index.nearest(lat, lon, k=k, accept=candidates.__contains__)
+            results = [(distance, self._records[tech_id]) for distance, tech_id in found]
+            if len(results) < k:
+                # Technicians without coordinates come after every located match
+                unlocated = sorted(tech_id for tech_id in candidates if tech_id not in self.index)
+                results += [(float('inf'), self._records[tech_id]) for tech_id in unlocated[:k - len(results)]]
+            return results
+
+    # --- Write-through updates ---
+
+    def claim(self, tech_id, conn=None) -> bool:
+        """
+        Atomically takes one of an available technician's job slots.
+        The conditional UPDATE only succeeds while the technician is 'available' and below
+        capacity, so when concurrent requests race for the last slot exactly one of them
+        wins; no lock is held across candidate selection. Filling the last slot marks the
+        technician 'busy'.
+        Args:
+            conn (sqlite3.Connection, optional): Run inside the caller's transaction
+                (e.g. together with inserting the job row); the caller commits.
+        Returns:
+            bool: True if this caller now owns a slot.
+        """
+        def run(connection):
+            cursor = connection.execute("""
+                UPDATE technicians
+                SET active_jobs = active_jobs + 1,
+                    status = CASE WHEN active_jobs + 1 >= capacity THEN 'busy' ELSE status END
+                WHERE id = ? AND status = 'available' AND active_jobs < capacity
+            """, (tech_id,))
+            return cursor.rowcount == 1, self._read_state(connection, tech_id)
+
+        claimed, state = self._write(run, conn)
+        self._sync(tech_id, *state)
+        return claimed
+
+    def release(self, tech_id, conn=None) -> bool:
+        """
+        Gives back one job slot (job completed or moved away). A 'busy' technician becomes
+        'available' again; an 'off_duty' one stays off duty.
+        Returns:
+            bool: False if there is no such technician.
+        """
+        def run(connection):
+            cursor = connection.execute("""
+                UPDATE technicians
+                SET active_jobs = MAX(active_jobs - 1, 0),
+                    status = CASE WHEN status = 'busy' THEN 'available' ELSE status END
+                WHERE id = ?
+            """, (tech_id,))
+            return cursor.rowcount == 1, self._read_state(connection, tech_id)
+
+        released, state = self._write(run, conn)
+        self._sync(tech_id, *state)
+        return released
+
+    def set_status(self, tech_id, status: str) -> bool:
+        """Updates a technician's status in SQLite and in memory. Returns False if unknown."""
+        return self.update(tech_id, status=status)
+
+    def update(self, tech_id, status: str = None, latitude: float = None, longitude: float = None) -> bool:
+        """
+        Writes a technician's new status and/or position to SQLite, then to memory.
+        Asking for 'available' while every slot is taken leaves the technician 'busy'.
+        Returns:
+            bool: False if there is no such technician.
+        """
+        with self.db.connection() as conn:
+            cursor = conn.execute("""
+                UPDATE technicians
+                SET status = CASE WHEN ? = 'available' AND active_jobs >= capacity THEN 'busy' ELSE COALESCE(?, status) END,
+                    latitude = COALESCE(?, latitude), longitude = COALESCE(?, longitude)
+                WHERE id = ?
+            """, (status, status, latitude, longitude, tech_id))
+            if cursor.rowcount == 0:
+                return False
+            state = self._read_state(conn, tech_id)
+            conn.commit()
+        self._sync(tech_id, *state)
+        if latitude is not None and longitude is not None:
+            with self._lock:
+                record = self._records.get(tech_id)
+                if record is not None:
+                    record.latitude, record.longitude = latitude, longitude
+                    self.index.insert(tech_id, latitude, longitude)
+        return True
+
+    def refresh(self, tech_id):
+        """Re-reads one technician's status and job count, e.g. after a rolled-back transaction."""
+        with self.db.connection() as conn:
+            state = self._read_state(conn, tech_id)
+        self._sync(tech_id, *state)
+
+    def _write(self, run, conn):
+        """Runs run(connection) in the caller's transaction, or in its own committed one."""
+        if conn is not None:
+            return run(conn)
+        with self.db.connection() as own_conn:
+            result = run(own_conn)
+            own_conn.commit()
+            return result
+
+    @staticmethod
+    def _read_state(conn, tech_id):
+        row = conn.execute("SELECT status, active_jobs FROM technicians WHERE id = ?", (tech_id,)).fetchone()
+        return row if row is not None else (None, None)
+
+    def _sync(self, tech_id, status, active_jobs):
+        """Mirrors a technician's status and job count from SQLite into memory."""
+        if status is None:
+            return
+        with self._lock:
+            record = self._records.get(tech_id)
+            if record is not None:
+                record.status = status
+                record.active_jobs = active_jobs
+                self._set_available(record, status == 'available')
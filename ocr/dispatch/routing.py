@@ -0,0 +1,155 @@
+# dispatch/routing.py
+import threading
+import logging
+
+import numpy as np
+
+from dispatch.geo import haversine_matrix
+from dispatch.jobs import UNKNOWN_TRAVEL_MINUTES, travel_minutes
+
+logger = logging.getLogger(__name__)
+
+IMPROVEMENT_EPSILON_KM = 1e-9 # 2-opt stops once no move shortens the route by more than this
+
+
+def nearest_neighbour_order(dist: np.ndarray) -> list:
+    """Greedy open path from node 0: always drive to the closest unvisited stop."""
+    n = dist.shape[0]
+    visited = np.zeros(n, dtype=bool)
+    visited[0] = True
+    order = [0]
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, dist[order[-1]])
+        nxt = int(np.argmin(row))
+        visited[nxt] = True
+        order.append(nxt)
+    return order
+
+
+def two_opt(dist: np.ndarray, order: list) -> list:
+    """
+    Improves an open path that starts at order[0] with 2-opt moves (reversing a segment).
+    Every candidate move is scored at once as an (i, j) delta matrix; the best one is
+    applied until none shortens the path. The path end is open, which is modelled as a
+    virtual final node at zero distance from every stop.
+    """
+    n = len(order)
+    if n < 3:
+        return list(order)
+    padded = np.zeros((n + 1, n + 1))
+    padded[:n, :n] = dist
+    route = np.array(list(order) + [n]) # n = virtual end node
+    upper = np.triu(np.ones((n - 1, n - 1), dtype=bool), k=1)
+    while True:
+        prev = route[:-2] # p[i-1] for i = 1..n-1
+        first = route[1:-1] # p[i]
+        last = route[1:-1] # p[j] for j = 1..n-1
+        after = route[2:] # p[j+1]
+        # Reversing p[i..j] swaps edges (p[i-1], p[i]) + (p[j], p[j+1]) for (p[i-1], p[j]) + (p[i], p[j+1])
+        delta = (padded[prev[:, None], last[None, :]] + padded[first[:, None], after[None, :]]
+                 - padded[prev, first][:, None] - padded[last, after][None, :])
+        delta = np.where(upper, delta, 0.0)
+        best = int(np.argmin(delta))
+        if delta.flat[best] >= -IMPROVEMENT_EPSILON_KM:
+            break
+        i, j = divmod(best, n - 1)
+        route[i + 1:j + 2] = route[i + 1:j + 2][::-1]
+    return route[:-1].tolist()
+
+
+def route_length(dist: np.ndarray, order: list) -> float:
+    """Length of an open path through the distance matrix nodes in `order`."""
+    return float(sum(dist[a, b] for a, b in zip(order, order[1:])))
+
+
+def plan_route(start_lat: float, start_lon: float, lats, lons) -> tuple:
+    """
+    Near-optimal order to visit the stops from a start point (no return leg):
+    nearest-neighbour construction followed by 2-opt over a vectorized distance matrix.
+    Returns:
+        tuple: (visiting order as indices into lats/lons, leg distances in km).
+    """
+    points_lat = np.concatenate(([start_lat], np.asarray(lats, dtype=np.float64)))
+    points_lon = np.concatenate(([start_lon], np.asarray(lons, dtype=np.float64)))
+    dist = haversine_matrix(points_lat, points_lon, points_lat, points_lon)
+    order = two_opt(dist, nearest_neighbour_order(dist))
+    legs = [float(dist[a, b]) for a, b in zip(order, order[1:])]
+    return [stop - 1 for stop in order[1:]], legs
+
+
+class RoutePlanner:
+    """
+    Plans the visiting order of a technician's open jobs, starting from their position.
+    Plans are cached per technician and reused until the set of open jobs (or the
+    technician's position) changes.
+    """
+
+    def __init__(self, registry, job_board):
+        self.registry = registry
+        self.job_board = job_board
+        self._cache = {} # {technician id: (signature, plan)}
+        self._lock = threading.Lock()
+
+    def plan(self, tech_id) -> dict:
+        """
+        Returns:
+            dict: The ordered stops with leg distances and times, or None for an unknown technician.
+        """
+        record = self.registry.get(tech_id)
+        if record is None:
+            return None
+        jobs = self.job_board.queue(tech_id)
+        signature = (tuple(job.id for job in jobs), record.latitude, record.longitude)
+        with self._lock:
+            cached = self._cache.get(tech_id)
+        if cached is not None and cached[0] == signature:
+            return {**cached[1], "cached": True}
+
+        plan = self._build(record, jobs)
+        with self._lock:
+            self._cache[tech_id] = (signature, plan)
+        return {**plan, "cached": False}
+
+    def _build(self, record, jobs) -> dict:
+        located = [job for job in jobs if job.latitude is not None and job.longitude is not None]
+        unlocated = [job for job in jobs if job not in located] # Cannot be routed; visited last, in queue order
+        ordered, legs = [], []
+        if located and record.latitude is not None and record.longitude is not None:
+            order, legs = plan_route(record.latitude, record.longitude,
+                                     [job.latitude for job in located], [job.longitude for job in located])
+            ordered = [located[i] for i in order]
+            queue_order_km = _path_km(record, located) # Assignment order, to show what the plan saves
+        else:
+            ordered, queue_order_km = located, None
+            legs = [None] * len(located)
+
+        stops = []
+        elapsed = 0.0
+        for job, leg_km in zip(ordered + unlocated, legs + [None] * len(unlocated)):
+            leg_minutes = travel_minutes(leg_km) if leg_km is not None else UNKNOWN_TRAVEL_MINUTES
+            elapsed += leg_minutes + job.service_minutes
+            stops.append({
+                "job_id": job.id,
+                "complaint_id": job.complaint_id,
+                "latitude": job.latitude,
+                "longitude": job.longitude,
+                "leg_km": round(leg_km, 3) if leg_km is not None else None,
+                "leg_minutes": round(leg_minutes, 1),
+                "finish_after_minutes": round(elapsed, 1),
+            })
+        total_km = sum(leg for leg in legs if leg is not None)
+        return {
+            "technician_id": record.id,
+            "start": {"latitude": record.latitude, "longitude": record.longitude},
+            "stops": stops,
+            "total_km": round(total_km, 3),
+            "queue_order_km": round(queue_order_km, 3) if queue_order_km is not None else None,
+            "total_minutes": round(elapsed, 1),
+        }
+
+
+def _path_km(record, jobs) -> float:
+    """Length of the path from the technician through the jobs in the given order."""
+    lats = np.array([record.latitude] + [job.latitude for job in jobs], dtype=np.float64)
+    lons = np.array([record.longitude] + [job.longitude for job in jobs], dtype=np.float64)
+    return route_length(haversine_matrix(lats, lons, lats, lons), list(range(len(lats))))
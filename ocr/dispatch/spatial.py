@@ -0,0 +1,175 @@
+# dispatch/spatial.py
+import heapq
+import math
+import threading
+from collections import defaultdict
+import logging
+
+import numpy as np
+
+from dispatch.geo import EARTH_RADIUS_KM, haversine_vector
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CELL_DEGREES = 0.05 # ~5.5 km of latitude per grid cell
+
+
+class GeoGridIndex:
+    """
+    Spatial index over technician coordinates: a fixed lat/lon grid (a simple geohash).
+    Each cell holds the ids of the points inside it, so a k-nearest query only looks at
+    the cells in rings around the query point, expanding outwards until no unvisited ring
+    can contain anything closer than the k-th match found so far.
+    Columns wrap around at the antimeridian, so rings (and results) cross it.
+    Inserting an id again moves it, so positions stay current as technicians travel.
+    """
+
+    def __init__(self, cell_degrees: float = DEFAULT_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self._columns = max(1, round(360 / cell_degrees))
+        self._column_degrees = 360 / self._columns # Divides the globe exactly, for the wrap
+        self._cells = defaultdict(set) # {(row, col): {id, ...}}
+        self._points = {} # {id: (lat, lon)}
+        self._bounds = None # (min_row, max_row, min_col, max_col) of cells ever occupied
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, item_id):
+        return item_id in self._points
+
+    def _cell(self, lat, lon):
+        return (math.floor(lat / self.cell_degrees), math.floor((lon + 180) % 360 / self._column_degrees) % self._columns)
+
+    def _column_gap(self, col, col0):
+        """Columns between two cells the short way round the globe."""
+        gap = abs(col - col0)
+        return min(gap, self._columns - gap)
+
+    def insert(self, item_id, lat: float, lon: float):
+        """Adds a point, or moves it if the id is already indexed."""
+        cell = self._cell(lat, lon)
+        with self._lock:
+            old = self._points.get(item_id)
+            if old is not None:
+                old_cell = self._cell(*old)
+                if old_cell != cell:
+                    self._discard(item_id, old_cell)
+            self._points[item_id] = (lat, lon)
+            self._cells[cell].add(item_id)
+            row, col = cell
+            if self._bounds is None:
+                self._bounds = (row, row, col, col)
+            else:
+                min_row, max_row, min_col, max_col = self._bounds
+                self._bounds = (min(min_row, row), max(max_row, row), min(min_col, col), max(max_col, col))
+
+    def remove(self, item_id):
+        """Removes a point (no-op if the id is not indexed)."""
+        with self._lock:
+            old = self._points.pop(item_id, None)
+            if old is not None:
+                self._discard(item_id, self._cell(*old))
+
+    def _discard(self, item_id, cell):
+        members = self._cells.get(cell)
+        if members is not None:
+            members.discard(item_id)
+            if not members:
+                del self._cells[cell]
+
+    def position(self, item_id):
+        """Returns (lat, lon) of an indexed id, or None."""
+        return self._points.get(item_id)
+
+    def _rings(self, center, max_radius):
+        """Yields (radius, occupied cells at Chebyshev distance radius) outwards from center."""
+        row0, col0 = center
+        radius = 0
+        while radius <= max_radius:
+            if 8 * radius > len(self._cells):
+                # Sparse grid: cheaper to bucket the occupied cells by ring once than to probe
+                # every cell of every ring (rings near the poles span thousands of columns)
+                rings = defaultdict(list)
+                for (row, col), members in self._cells.items():
+                    distance = max(abs(row - row0), self._column_gap(col, col0))
+                    if distance >= radius:
+                        rings[distance].append(members)
+                for distance in sorted(rings):
+                    yield distance, rings[distance]
+                return
+            # Top and bottom rows take every column within radius, the rows between only the two
+            # at exactly radius
+            span = [(col0 + offset) % self._columns for offset in range(-radius, radius + 1)]
+            sides = [(col0 - radius) % self._columns, (col0 + radius) % self._columns]
+            if 2 * radius + 1 >= self._columns: # The ring wraps round to meet itself
+                span = set(span)
+                sides = {col for col in sides if self._column_gap(col, col0) == radius}
+            ring = []
+            for row in range(row0 - radius, row0 + radius + 1):
+                for col in span if row in (row0 - radius, row0 + radius) else sides:
+                    members = self._cells.get((row, col))
+                    if members:
+                        ring.append(members)
+            yield radius, ring
+            radius += 1
+
+    def _max_radius(self, center):
+        """Ring radius beyond which no occupied cell can exist."""
+        if self._bounds is None:
+            return -1
+        min_row, max_row, min_col, max_col = self._bounds
+        row0, col0 = center
+        if min_col <= (col0 + self._columns // 2) % self._columns <= max_col:
+            column_radius = self._columns // 2 # The occupied columns reach the far side of the globe
+        else:
+            column_radius = max(self._column_gap(min_col, col0), self._column_gap(max_col, col0))
+        return max(row0 - min_row, max_row - row0, column_radius)
+
+    def _ring_lower_bound_km(self, lat, radius):
+        """Minimum distance from the query point to any point in rings beyond `radius`."""
+        # Such a point is at least radius cells away in latitude, or in longitude, i.e. beyond
+        # the meridians radius columns east and west. The distance to a meridian at longitude
+        # offset d is asin(cos(lat) sin(d)), which shrinks to nothing towards the poles, and
+        # from d = 90 degrees on the meridian's closest point is the pole itself.
+        lat_gap = math.radians(radius * self.cell_degrees)
+        lon_gap = math.radians(min(radius * self._column_degrees, 90.0))
+        meridian_gap = math.asin(min(1.0, math.cos(math.radians(lat)) * math.sin(lon_gap)))
+        return EARTH_RADIUS_KM * min(lat_gap, meridian_gap)
+
+    def nearest(self, lat: float, lon: float, k: int = 1, accept=None, max_radius_km: float = None) -> list:
+        """
+        Finds the k nearest indexed points to (lat, lon).
+        Args:
+            lat, lon (float): Query point.
+            k (int): Number of matches wanted.
+            accept (callable, optional): Filter called with each candidate id
+                (e.g. available and has the required specialization).
+            max_radius_km (float, optional): Ignore points further away than this.
+        Returns:
+            list: Up to k (distance_km, id) tuples, closest first.
+        """
+        center = self._cell(lat, lon)
+        best = [] # Max-heap of the k best so far, stored as (-distance, id)
+        with self._lock:
+            for radius, ring in self._rings(center, self._max_radius(center)):
+                # Score every accepted candidate in the ring with one vectorized distance pass
+                ids = [item_id for members in ring for item_id in members
+                       if accept is None or accept(item_id)]
+                if ids:
+                    coords = np.array([self._points[item_id] for item_id in ids])
+                    distances = haversine_vector(lat, lon, coords[:, 0], coords[:, 1])
+                    for distance, item_id in zip(distances.tolist(), ids):
+                        if max_radius_km is not None and distance > max_radius_km:
+                            continue
+                        if len(best) < k:
+                            heapq.heappush(best, (-distance, item_id))
+                        elif distance < -best[0][0]:
+                            heapq.heapreplace(best, (-distance, item_id))
+                bound = self._ring_lower_bound_km(lat, radius)
+                if max_radius_km is not None and bound > max_radius_km:
+                    break
+                if len(best) == k and -best[0][0] <= bound:
+                    break
+        return sorted((-negative_distance, item_id) for negative_distance, item_id in best)
@@ -0,0 +1,179 @@
+# dispatch/specs.py
+import json
+import os
+import re
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "specializations.json")
+RELOAD_CHECK_SECONDS = 2.0 # How often infer() looks at the rules file's mtime
+
+# Keywords only match whole words: "ac" must not fire inside "machine", nor "E1" on "E12"
+_WORD_START = r"(?<!\w)"
+_WORD_END = r"(?!\w)"
+
+
+class _CompiledRules:
+    """One immutable compiled snapshot of the rules table, swapped in whole on reload."""
+    __slots__ = ('keyword_pattern', 'code_pattern', 'groups', 'specializations')
+
+    def __init__(self, keyword_pattern, code_pattern, groups, specializations):
+        self.keyword_pattern = keyword_pattern
+        self.code_pattern = code_pattern
+        self.groups = groups # {regex group name: (specialization, is_hint)}
+        self.specializations = specializations
+
+
+_SEPARATOR = object() # Trie key for the gap between words of a phrase
+_SEPARATOR_REGEX = r"[\s\-]*" # Words of a phrase may be split by spaces/hyphens or run together
+_KEYWORD_END = r"s?" + _WORD_END # A keyword may be followed by a plural 's'
+_CODE_FAMILY_END = r"\w*" + _WORD_END # "F0*" matches the whole code family: F01, F02...
+
+
+def _keyword_key(keyword: str) -> list:
+    """Trie path for a keyword: its lowercase characters, with _SEPARATOR between words."""
+    key = []
+    for i, word in enumerate(keyword.lower().split()):
+        if i:
+            key.append(_SEPARATOR)
+        key.extend(word)
+    return key
+
+
+def _trie_regex(entries) -> str:
+    """
+    Compiles (path, terminal regex, group name) entries into one regex shaped like a prefix
+    trie, so at each text position the engine tests a single character against the branch
+    heads instead of retrying every alternative. Longer continuations are tried before a
+    terminal, so the longest keyword wins; the empty named group at each terminal tells
+    which entry matched (match.lastgroup).
+    """
+    trie = {}
+    for path, end, name in entries:
+        node = trie
+        for step in path:
+            node = node.setdefault(step, {})
+        node.setdefault(None, []).append((end, name))
+
+    def emit(node):
+        branches = []
+        for step in sorted((step for step in node if step is not None), key=lambda step: (step is _SEPARATOR, str(step))):
+            head = _SEPARATOR_REGEX if step is _SEPARATOR else re.escape(step)
+            branches.append(head + emit(node[step]))
+        branches += [f"{end}(?P<{name}>)" for end, name in node.get(None, [])]
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return _WORD_START + emit(trie)
+
+
+def compile_rules(table: dict) -> _CompiledRules:
+    """
+    Compiles a rules table into two single-pass matchers (problem text, error codes).
+    Table format: {specialization: {"keywords": [...], "hints": [...], "error_codes": [...]}}.
+    - keywords: words/phrases in the problem text that name the appliance.
+    - hints: weaker words ("cooling", "display") used only when no keyword or code matched.
+    - error_codes: codes in the error code field; "F0*" matches the whole F0x family.
+    Raises:
+        ValueError: If the table is malformed.
+    """
+    if not isinstance(table, dict) or not table:
+        raise ValueError("Specialization rules must be a non-empty JSON object")
+    keyword_entries = []
+    code_entries = []
+    groups = {}
+    for spec, rule in table.items():
+        if not isinstance(rule, dict):
+            raise ValueError(f"Rule for '{spec}' must be an object")
+        for field, is_hint in (("keywords", False), ("hints", True), ("error_codes", False)):
+            entries = rule.get(field, [])
+            if not isinstance(entries, list) or not all(isinstance(e, str) and e.strip() for e in entries):
+                raise ValueError(f"'{field}' for '{spec}' must be a list of non-empty strings")
+            for entry in entries:
+                name = f"g{len(groups)}"
+                groups[name] = (spec, is_hint)
+                entry = entry.strip()
+                if field != "error_codes":
+                    keyword_entries.append((_keyword_key(entry), _KEYWORD_END, name))
+                elif entry.endswith("*"):
+                    code_entries.append((list(entry[:-1].lower()), _CODE_FAMILY_END, name))
+                else:
+                    code_entries.append((list(entry.lower()), _WORD_END, name))
+
+    def build(entries):
+        return re.compile(_trie_regex(entries), re.IGNORECASE) if entries else None
+
+    return _CompiledRules(build(keyword_entries), build(code_entries), groups, tuple(table))
+
+
+class SpecializationRules:
+    """
+    Infers the specializations a complaint needs from its problem text and error code.
+    The keyword -> specialization table lives in a JSON file and is compiled into one
+    trie-shaped word-boundary regex per field, so inference is a single linear scan of
+    each field whatever the size of the table.
+    The file is re-read when its mtime changes (checked at most every reload_interval
+    seconds); a broken edit is logged and the previous rules stay in effect.
+    """
+
+    def __init__(self, path: str = DEFAULT_RULES_PATH, reload_interval: float = RELOAD_CHECK_SECONDS):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._rules = None
+        self._mtime = None
+        self._next_check = 0.0
+        self._reload_lock = threading.Lock()
+        if not self.reload(force=True):
+            raise ValueError(f"Could not load specialization rules from {path}")
+
+    @property
+    def specializations(self) -> tuple:
+        return self._rules.specializations
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Recompiles the rules if the file changed (or always, with force).
+        Returns:
+            bool: True if new rules were loaded.
+        """
+        with self._reload_lock:
+            self._next_check = time.monotonic() + self.reload_interval
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError as e:
+                logger.error(f"Specialization rules file unavailable: {e}")
+                return False
+            if not force and mtime == self._mtime:
+                return False
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    rules = compile_rules(json.load(f))
+            except (OSError, ValueError, re.error) as e:
+                logger.error(f"Failed to load specialization rules from {self.path}, keeping the previous rules: {e}")
+                self._mtime = mtime # Report a broken edit once, not on every check
+                return False
+            self._rules, self._mtime = rules, mtime
+        logger.info(f"Loaded specialization rules for {len(rules.specializations)} specialization(s) from {self.path}.")
+        return True
+
+    def infer(self, problem: str, error_code: str = "") -> set:
+        """
+        Specializations named by the problem text or error code(s).
+        Returns:
+            set: Specialization names; empty if nothing matched.
+        """
+        if time.monotonic() >= self._next_check:
+            self.reload()
+        rules = self._rules
+        found = set()
+        hinted = set()
+        if rules.keyword_pattern is not None and problem:
+            for match in rules.keyword_pattern.finditer(problem):
+                spec, is_hint = rules.groups[match.lastgroup]
+                (hinted if is_hint else found).add(spec)
+        if rules.code_pattern is not None and error_code:
+            for match in rules.code_pattern.finditer(error_code):
+                found.add(rules.groups[match.lastgroup][0])
+        return found or hinted
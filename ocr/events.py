@@ -0,0 +1,175 @@
+# events.py
+import json
+import queue
+import threading
+import logging
+
+from migrations import data_version
+
+logger = logging.getLogger(__name__)
+
+CLIENT_QUEUE_SIZE = 256 # Events buffered per client; a client this far behind is dropped
+MAX_CLIENTS = 200
+HEARTBEAT_SECONDS = 15.0 # Comment lines on idle streams, so dead connections are noticed
+CHANGE_CHECK_SECONDS = 1.0 # How often the feed looks for writes made by other processes (the bot)
+
+# Columns sent with complaint / technician events (what the dashboard shows)
+COMPLAINT_EVENT_FIELDS = ("id", "chat_id", "problem", "error_code", "address", "contact_no",
+                          "assigned_technician_name", "media_path", "timestamp", "status", "row_version")
+TECHNICIAN_EVENT_FIELDS = ("id", "name", "contact_no", "latitude", "longitude", "status", "specialization",
+                           "capacity", "active_jobs", "row_version")
+
+
+class Subscription:
+    """One client's bounded event buffer. Iterating yields Server-Sent Events messages."""
+
+    def __init__(self, broker, max_queue: int):
+        self.broker = broker
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = False # Set by the broker when the client fell too far behind
+
+    def __iter__(self):
+        while True:
+            if self.dropped:
+                # Events were lost: tell the client to resync and end the stream (it reconnects)
+                yield "event: resync\ndata: {}\n\n"
+                return
+            try:
+                yield self.queue.get(timeout=HEARTBEAT_SECONDS)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+
+
+class EventBroker:
+    """
+    In-process fan-out of events to Server-Sent Events clients.
+    publish() never blocks: each event is serialized once and offered to every client's
+    bounded queue; a client whose queue is full is dropped (and told to resync) instead of
+    slowing down the writer that published the event.
+    """
+
+    def __init__(self, max_queue: int = CLIENT_QUEUE_SIZE, max_clients: int = MAX_CLIENTS):
+        self.max_queue = max_queue
+        self.max_clients = max_clients
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._sequence = 0
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        """Returns a new Subscription, or None if the client limit is reached."""
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None
+            subscription = Subscription(self, self.max_queue)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event_type: str, data: dict):
+        """Sends an event to every client. Returns the number of clients dropped for being slow."""
+        with self._lock:
+            self._sequence += 1
+            message = f"id: {self._sequence}\nevent: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+            subscribers = list(self._subscribers)
+        dropped = []
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(message)
+            except queue.Full:
+                subscription.dropped = True
+                dropped.append(subscription)
+        if dropped:
+            with self._lock:
+                self._subscribers.difference_update(dropped)
+            logger.warning(f"Dropped {len(dropped)} slow event stream client(s).")
+        return len(dropped)
+
+
+class ChangeFeed:
+    """
+    Turns database changes into complaint-created, complaint-updated and
+    technician-status-changed events, followed by a version event with the change version
+    they bring the client up to.
+    One background thread follows the change version (see migrations.data_version): it is
+    woken by every local write (Database.add_write_listener) and also checks once a second
+    for writes by other processes. Each change is read once here, whatever the number of clients.
+    """
+
+    def __init__(self, db, broker, interval_seconds: float = CHANGE_CHECK_SECONDS):
+        self.db = db
+        self.broker = broker
+        self.interval_seconds = interval_seconds
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._listeners = [] # callback(version) after each change found, see add_listener
+        with db.connection() as conn:
+            self.version = data_version(conn)
+            self._max_complaint_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM complaints").fetchone()[0]
+
+    def add_listener(self, callback):
+        """Registers callback(version), run whenever the feed finds new changes (from any process)."""
+        self._listeners.append(callback)
+
+    def notify(self):
+        """Wakes the feed to look for changes now."""
+        self._wakeup.set()
+
+    def start(self):
+        """Starts the feed thread (idempotent)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="change-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.interval_seconds)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                return
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"ChangeFeed failed to read changes: {e}", exc_info=True)
+
+    def poll(self) -> int:
+        """Publishes the changes made since the last poll. Returns the number of events."""
+        with self.db.connection() as conn:
+            version = data_version(conn)
+            if version == self.version:
+                return 0
+            complaints = conn.execute(
+                f"SELECT {', '.join(COMPLAINT_EVENT_FIELDS)} FROM complaints INDEXED BY idx_complaints_row_version "
+                f"WHERE row_version > ? ORDER BY row_version", (self.version,)).fetchall()
+            technicians = conn.execute(
+                f"SELECT {', '.join(TECHNICIAN_EVENT_FIELDS)} FROM technicians "
+                f"WHERE row_version > ? ORDER BY row_version", (self.version,)).fetchall()
+        self.version = version
+        for listener in list(self._listeners):
+            listener(version)
+        for row in complaints:
+            complaint = dict(zip(COMPLAINT_EVENT_FIELDS, row))
+            created = complaint["id"] > self._max_complaint_id
+            self._max_complaint_id = max(self._max_complaint_id, complaint["id"])
+            self.broker.publish("complaint-created" if created else "complaint-updated",
+                                {"complaint": complaint, "version": version})
+        for row in technicians:
+            self.broker.publish("technician-status-changed",
+                                {"technician": dict(zip(TECHNICIAN_EVENT_FIELDS, row)), "version": version})
+        # Clients that saw every event up to here hold everything up to this change version
+        self.broker.publish("version", {"version": version})
+        return len(complaints) + len(technicians)
@@ -1,39 +1,18 @@
 import sqlite3
 from datetime import datetime
 
+from migrations import migrate
+
 def create_new_database():
     conn = sqlite3.connect('complaints.db')
-    cursor = conn.cursor()
     
-    # Create complaints table with updated schema
-    cursor.execute("""
-    CREATE TABLE complaints (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        chat_id INTEGER NOT NULL,
-        problem TEXT NOT NULL,
-        address TEXT NOT NULL,
-        contact_no TEXT NOT NULL,
-        error_code TEXT,
-        media_path TEXT,
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-        status TEXT DEFAULT 'pending',
-        predicted_solution TEXT,
-        needs_engineer INTEGER
-    )
-    """)
-    
-    # Create technicians table
-    cursor.execute("""
-    CREATE TABLE technicians (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        contact_no TEXT NOT NULL,
-        latitude REAL,
-        longitude REAL,
-        status TEXT DEFAULT 'available',
-        specialization TEXT
-    )
-    """)
+    # Same versioned schema as the Flask app and the bot (see migrations.py)
+    migrate(conn)
+    cursor = conn.cursor()
+    if cursor.execute("SELECT COUNT(*) FROM technicians").fetchone()[0]:
+        conn.close()
+        print("✅ Database is up to date (technicians already present)")
+        return
     
     # Insert sample technicians
     sample_technicians = [
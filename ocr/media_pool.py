@@ -0,0 +1,182 @@
+# media_pool.py
+import asyncio
+import os
+import re
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+MEDIA_WORKERS = int(os.environ.get("MEDIA_WORKERS", min(2, os.cpu_count() or 1)))
+# Photos admitted to the pool at once (running + waiting for a worker)
+MEDIA_QUEUE_SIZE = int(os.environ.get("MEDIA_QUEUE_SIZE", 8))
+# How long a photo may wait for a free queue slot before the user is asked to retry
+MEDIA_QUEUE_WAIT = float(os.environ.get("MEDIA_QUEUE_WAIT", 10))
+# OCR input is decoded at 1/2, 1/4 or 1/8 scale while its long side stays at least this big
+OCR_MIN_SIDE = 640
+REDUCED_READ_MODES = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                      (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+
+# --- Placeholder for AI Modules ---
+class EasyOCRPlaceholder:
+    def readtext(self, image, detail=0):
+        """
+        A placeholder for EasyOCR's readtext function (image is a file path or a decoded BGR array).
+        Simulates OCR output based on dummy logic.
+        """
+        if not isinstance(image, str):
+            logging.info(f"EasyOCR placeholder: Reading text from a {image.shape[1]}x{image.shape[0]} image")
+            return ["NO", "CODE", "FOUND", "1234", "OK"]
+        image_path = image
+        logging.info(f"EasyOCR placeholder: Reading text from {image_path}")
+        # Simulate different outputs based on image path
+        if "error" in image_path.lower() or "e5" in image_path.lower():
+            return ["E5", "ERROR", "CODE"]
+        if "f0" in image_path.lower():
+            return ["F0", "FAULT"]
+        if "h1" in image_path.lower():
+            return ["H1", "HIGH", "TEMP"]
+        return ["NO", "CODE", "FOUND", "1234", "OK"] # Default for other cases
+
+class ErrorRecognizer:
+    def __init__(self):
+        self.easyocr = EasyOCRPlaceholder() # Use the placeholder OCR
+        logging.info("ErrorRecognizer initialized (placeholder).")
+
+    def extract_codes(self, image) -> list:
+        """
+        Extracts potential error codes from an image (path or decoded array) using a placeholder OCR.
+        Identifies common Haier-like error code patterns.
+        """
+        full_text_list = self.easyocr.readtext(image, detail=0)
+        full_text = ' '.join(full_text_list).upper()
+        logging.info(f"ErrorRecognizer: Detected text for code extraction: {full_text}")
+
+        detected_codes = []
+        # Regex to find patterns like E1, F0, H1, ERR123, 1234 (2-4 digits)
+        pattern = r'\b(?:E\d{1,3}|F\d{1,3}|H\d{1,3}|ERR\d{1,3}|ER\d{1,3}|\d{2,4})\b'
+        matches = re.findall(pattern, full_text)
+
+        # A list of common Haier error codes for better filtering
+        known_haier_codes = [
+            'E1', 'E2', 'E3', 'E4', 'E5', 'E6', 'E7', 'E8', 'E9', 'E0',
+            'F0', 'F1', 'F2', 'F3', 'F4', 'F5', 'F6', 'F7', 'F8', 'F9', 'F0',
+            'H0', 'H1', 'H2', 'H3', 'H4', 'H5', 'H6', 'H7', 'H8', 'H9'
+        ]
+
+        for match in matches:
+            cleaned_match = re.sub(r'[^A-Z0-9]', '', match).strip() # Remove non-alphanumeric
+            if cleaned_match:
+                # Prioritize known Haier codes
+                if cleaned_match in known_haier_codes and cleaned_match not in detected_codes:
+                    detected_codes.append(cleaned_match)
+                # Allow general 2-4 digit numbers if not already captured
+                elif cleaned_match.isdigit() and 2 <= len(cleaned_match) <= 4 and cleaned_match not in detected_codes:
+                    detected_codes.append(cleaned_match)
+                # Allow patterns like ERR/ER followed by digits
+                elif re.match(r'(ERR|ER)\d{1,3}', cleaned_match) and cleaned_match not in detected_codes:
+                    detected_codes.append(cleaned_match)
+
+        logging.info(f"ErrorRecognizer: Extracted codes: {detected_codes}")
+        return detected_codes if detected_codes else ["NOT_RECOGNIZED"]
+
+# --- End Placeholder ---
+
+
+_recognizer = None # Loaded once in each pool worker by _init_worker
+
+
+def _init_worker():
+    global _recognizer
+    _recognizer = ErrorRecognizer() # The OCR model is loaded here, not per photo
+
+
+def _ready(_):
+    return os.getpid()
+
+
+def ocr_read_mode(path: str, min_side: int = OCR_MIN_SIDE) -> int:
+    """
+    The cv2.imread flag for the OCR input: the strongest IMREAD_REDUCED_* scale that keeps
+    the long side at least min_side. JPEG decoders apply it while decoding (DCT scaling),
+    so the full-size image is never built. Only the header is read to get the size.
+    """
+    try:
+        with Image.open(path) as image:
+            long_side = max(image.size)
+    except (OSError, ValueError): # Not an image; imread will report it
+        return cv2.IMREAD_COLOR
+    for factor, mode in REDUCED_READ_MODES:
+        if long_side // factor >= min_side:
+            return mode
+    return cv2.IMREAD_COLOR
+
+
+def _process_photo(path: str):
+    """Reads error codes from the saved photo, decoded at reduced size. Returns None if it does not decode."""
+    img = cv2.imread(path, ocr_read_mode(path))
+    if img is None:
+        return None
+    return _recognizer.extract_codes(img)
+
+
+class MediaPoolBusy(Exception):
+    """No queue slot freed up within the wait limit; the user should retry shortly."""
+
+
+class MediaPool:
+    """
+    Runs photo decoding and OCR in a process pool, off the bot's event loop.
+    Photos are passed by path: the original file is written once by the downloader and
+    only a reduced-size decode of it is made, for OCR.
+    - Each worker loads the recognizer once (_init_worker) and keeps it for every photo.
+    - At most max_pending photos are admitted at once; further photos wait up to
+      queue_wait seconds for a slot and then fail with MediaPoolBusy (backpressure), so a
+      burst of uploads cannot pile up unbounded work and memory.
+    Workers are started by start(), before the bot's event loop and threads exist.
+    """
+
+    def __init__(self, workers: int = MEDIA_WORKERS, max_pending: int = MEDIA_QUEUE_SIZE,
+                 queue_wait: float = MEDIA_QUEUE_WAIT):
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.queue_wait = queue_wait
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._executor = None
+        self.pending = 0 # Photos admitted and not finished yet
+
+    def start(self):
+        """Starts the workers and waits until every one has loaded the recognizer (idempotent)."""
+        if self._executor is not None:
+            return
+        self._executor = ProcessPoolExecutor(self.workers, initializer=_init_worker)
+        list(self._executor.map(_ready, range(self.workers))) # Launches the workers now
+        logger.info(f"MediaPool ready: {self.workers} worker(s), queue of {self.max_pending}.")
+
+    async def process_photo(self, path: str):
+        """Returns the error codes read from the photo saved at path (None if it does not decode)."""
+        if self._slots.locked(): # Queue full: wait a little for a slot (queue_wait=0 turns it away at once)
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_wait)
+            except asyncio.TimeoutError:
+                raise MediaPoolBusy(f"{self.pending} photo(s) already queued") from None
+        else:
+            await self._slots.acquire()
+        self.pending += 1
+        try:
+            self.start()
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, _process_photo, path)
+        finally:
+            self.pending -= 1
+            self._slots.release()
+
+    def close(self):
+        """Shuts down the workers, dropping photos that have not started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,227 @@
+# migrations.py
+import logging
+
+from dispatch.jobs import DEFAULT_CAPACITY
+
+logger = logging.getLogger(__name__)
+
+
+def _columns(conn, table: str) -> set:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _add_columns(conn, table: str, columns: dict):
+    """Adds the columns ({name: declaration}) a table is missing."""
+    existing = _columns(conn, table)
+    for name, declaration in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {declaration}")
+
+
+def _baseline(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS complaints (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id INTEGER,
+            problem TEXT,
+            address TEXT,
+            complaint_latitude REAL,  -- Latitude of the complaint
+            complaint_longitude REAL, -- Longitude of the complaint
+            error_code TEXT,
+            contact_no TEXT,
+            media_path TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            status TEXT DEFAULT 'pending', -- e.g., 'pending_assignment', 'assigned', 'resolved'
+            assigned_technician_id INTEGER, -- Foreign key to technicians table
+            assigned_technician_name TEXT,  -- Redundant but useful for quick lookup
+            synced_to_server BOOLEAN DEFAULT 0
+        )
+    """)
+    # Databases first created by the bot or by init_db.py have narrower complaints tables
+    _add_columns(conn, "complaints", {
+        "address": "TEXT",
+        "complaint_latitude": "REAL",
+        "complaint_longitude": "REAL",
+        "error_code": "TEXT",
+        "contact_no": "TEXT",
+        "media_path": "TEXT",
+        "status": "TEXT DEFAULT 'pending'",
+        "assigned_technician_id": "INTEGER",
+        "assigned_technician_name": "TEXT",
+        "synced_to_server": "BOOLEAN DEFAULT 0",
+    })
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS technicians (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            contact_no TEXT,
+            latitude REAL,
+            longitude REAL,
+            status TEXT, -- 'available', 'busy' (every job slot taken) or 'off_duty'
+            specialization TEXT -- e.g., 'AC,Refrigerator,TV'
+        )
+    """)
+
+
+def _job_queues(conn):
+    had_active_jobs = "active_jobs" in _columns(conn, "technicians")
+    _add_columns(conn, "technicians", {
+        "capacity": f"INTEGER DEFAULT {DEFAULT_CAPACITY}", # Open jobs the technician can hold at once
+        "active_jobs": "INTEGER DEFAULT 0", # Open jobs currently in their queue
+    })
+    # Per-technician job queues; open jobs are 'queued', in service order by id
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS technician_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            technician_id INTEGER NOT NULL,
+            complaint_id INTEGER NOT NULL,
+            status TEXT DEFAULT 'queued', -- 'queued', 'completed', 'reassigned' or 'cancelled'
+            latitude REAL, -- Job location (the complaint's)
+            longitude REAL,
+            travel_minutes REAL, -- Estimated drive from the previous job / technician position
+            service_minutes REAL, -- Estimated on-site time
+            eta DATETIME, -- Predicted completion time
+            assigned_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            completed_at DATETIME
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_technician_jobs_open ON technician_jobs (status, technician_id)")
+    if not had_active_jobs:
+        # 'busy' now means "every slot taken". Earlier busy flags were set by hand per job, so
+        # count the technician's open jobs (none, before queues existed) and keep them busy only
+        # if that fills their capacity; otherwise they are available for assignment again.
+        released = conn.execute("""
+            UPDATE technicians SET
+                active_jobs = (SELECT COUNT(*) FROM technician_jobs
+                               WHERE technician_id = technicians.id AND status = 'queued'),
+                status = CASE WHEN (SELECT COUNT(*) FROM technician_jobs
+                                    WHERE technician_id = technicians.id AND status = 'queued') >= capacity
+                              THEN 'busy' ELSE 'available' END
+            WHERE status = 'busy'
+        """).rowcount
+        if released:
+            logger.warning(f"Job queues: {released} technician(s) flagged 'busy' re-checked against their open "
+                           f"jobs; those with free slots are 'available' again.")
+
+
+def _query_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_complaints_timestamp ON complaints (timestamp)") # Newest-first listings
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_complaints_chat_id ON complaints (chat_id)") # A user's complaints
+    # The backlog and /api/complaints filter by status or technician and page newest first:
+    # with the timestamp in the index, the filter, the date range and the keyset cursor are
+    # one range scan with no sort (and the plain status/technician lookups use the prefix)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_complaints_status_timestamp ON complaints (status, timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_complaints_technician_timestamp "
+                 "ON complaints (assigned_technician_id, timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_technicians_status ON technicians (status)")
+
+
+def _change_versions(conn):
+    # One database-wide change counter. Every complaint or technician write bumps it and
+    # stamps the row with the new value, so pollers can ask for "rows changed after version N"
+    # and compare a single number for ETags. Triggers catch every writer (app, batch
+    # assigner, bot), and the ledger bumps the counter itself when a block is sealed.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sync_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO sync_state (id, version) VALUES (1, 1)")
+    for table in ("complaints", "technicians"):
+        _add_columns(conn, table, {"row_version": "INTEGER"})
+        conn.execute(f"UPDATE {table} SET row_version = 1 WHERE row_version IS NULL")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_row_version ON {table} (row_version)")
+        stamp = f"""
+            UPDATE sync_state SET version = version + 1;
+            UPDATE {table} SET row_version = (SELECT version FROM sync_state) WHERE id = NEW.id;
+        """
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table}_insert_version AFTER INSERT ON {table} "
+                     f"BEGIN {stamp} END")
+        # The stamping UPDATE changes row_version, which keeps this from firing on it
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table}_update_version AFTER UPDATE ON {table} "
+                     f"WHEN NEW.row_version IS OLD.row_version BEGIN {stamp} END")
+
+
+def _outbox_index(conn):
+    # The bot's outbox re-sends complaints saved with synced_to_server = 0. A partial index
+    # holds only those rows, so finding the backlog stays cheap however large the table grows
+    # (and costs nothing to maintain once rows are marked synced).
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_complaints_unsynced ON complaints (id) WHERE synced_to_server = 0")
+
+
+def _idempotency_keys(conn):
+    # Submissions carry a key from the sender (the bot's chat id, local complaint id and save
+    # time), so a POST retried after a lost response returns the complaint it already created
+    # instead of inserting another. Unique, and only over rows that have one.
+    _add_columns(conn, "complaints", {"idempotency_key": "TEXT"})
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_complaints_idempotency_key "
+                 "ON complaints (idempotency_key) WHERE idempotency_key IS NOT NULL")
+
+
+def _sealed_complaints(conn):
+    # Which complaints the server's ledger has sealed, and in which block. The server re-queues
+    # every complaint missing here at startup, so this has to outlive the ledger's own files;
+    # a separate table keeps the row_version triggers (and change events) out of sealing.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sealed_complaints (
+            complaint_id INTEGER PRIMARY KEY,
+            block_index INTEGER NOT NULL
+        )
+    """)
+
+
+# Applied in order; a database's PRAGMA user_version is the number of steps it has had.
+# Every step is idempotent, because databases from before versioning start at 0 whatever
+# their actual shape. Append new steps; never edit or reorder released ones.
+MIGRATIONS = [
+    ("complaints and technicians tables", _baseline),
+    ("technician capacity and job queues", _job_queues),
+    ("indexes for dashboard, assignment and listing queries", _query_indexes),
+    ("change version counter for delta sync", _change_versions),
+    ("partial index of complaints waiting in the bot's outbox", _outbox_index),
+    ("idempotency keys for complaint submissions", _idempotency_keys),
+    ("sealed complaints, for re-queuing unsealed ones", _sealed_complaints),
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def data_version(conn) -> int:
+    """The change counter: bumped by every complaint, technician and ledger write."""
+    return conn.execute("SELECT version FROM sync_state WHERE id = 1").fetchone()[0]
+
+
+def bump_data_version(conn) -> int:
+    """Records a change that is not a complaints/technicians row (e.g. a sealed block)."""
+    conn.execute("UPDATE sync_state SET version = version + 1 WHERE id = 1")
+    return data_version(conn)
+
+
+def migrate(conn) -> int:
+    """
+    Brings a database up to SCHEMA_VERSION. Each step runs in its own write transaction
+    together with the user_version bump, so a failed step leaves the database at the
+    previous version, and the app and the bot starting at once cannot both apply a step.
+    Returns:
+        int: The schema version the database is now at.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    for version, (description, step) in enumerate(MIGRATIONS, start=1):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        logger.info(f"Database migrated to version {version}: {description}.")
+    return schema_version(conn)
@@ -0,0 +1,201 @@
+# outbox.py
+import os
+import random
+import asyncio
+import logging
+from contextlib import contextmanager
+
+import httpx
+
+from backend_client import RETRY_STATUSES
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_INTERVAL = float(os.environ.get("OUTBOX_INTERVAL", 30)) # Seconds between passes while the backend is up
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 20)) # Unsynced rows read per query
+OUTBOX_MAX_IN_FLIGHT = int(os.environ.get("OUTBOX_MAX_IN_FLIGHT", 4)) # Resync requests sent at once
+OUTBOX_MAX_BACKOFF = float(os.environ.get("OUTBOX_MAX_BACKOFF", 300)) # Longest wait between passes while it is down
+
+# synced_to_server of a row the user was told to submit again: never resent
+ABANDONED = -1
+
+# The columns the bot saves, sent in the same shape as telegram_bot.submit_complaint's payload
+COMPLAINT_PAYLOAD_FIELDS = ("chat_id", "problem", "address", "complaint_latitude", "complaint_longitude",
+                            "contact_no", "error_code", "media_path")
+
+
+def idempotency_key(complaint_id, chat_id, timestamp) -> str:
+    """
+    The key a submission of local row complaint_id is sent with: the backend stores it on the
+    complaint and answers a resend with that complaint rather than a new one. The row's save
+    time keeps it unique should the bot's database (and so its ids) ever start over.
+    """
+    return f"{chat_id}:{complaint_id}:{timestamp}"
+
+
+def is_backend_down(error: Exception) -> bool:
+    """Connection errors, timeouts and RETRY_STATUSES: worth retrying later, unlike a rejected row."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRY_STATUSES
+    return isinstance(error, httpx.TransportError)
+
+
+class ComplaintOutbox:
+    """
+    Re-sends complaints the bot saved locally (synced_to_server = 0) but could not deliver,
+    e.g. while the backend or its tunnel was down.
+    - Each pass walks the backlog in id order, batch_size rows per query, through the partial
+      index idx_complaints_unsynced; at most max_in_flight requests are out at once.
+    - Delivered rows are marked synced one batch per UPDATE, and on_synced(row, response) can
+      tell the user their complaint was registered after all.
+    - A pass sends one row at a time until one is delivered, so a down or recovering backend
+      gets a single probe rather than a batch. When it is unreachable the pass stops and the
+      next one waits interval doubled per consecutive failure (up to max_backoff, jittered).
+    - A row the backend rejects outright (4xx, 500) is logged and skipped until the bot restarts
+      instead of blocking the rows behind it.
+    - Rows being submitted by a conversation are claim()ed and left alone, and rows whose
+      submission the backend refused are abandon()ed for good (the user resubmits them).
+    Each row is sent with its idempotency_key(), so a row resent after a response was lost
+    (the backend stored it) gets back the complaint it already created, not a duplicate.
+    """
+
+    def __init__(self, db, backend, batch_size: int = OUTBOX_BATCH_SIZE, max_in_flight: int = OUTBOX_MAX_IN_FLIGHT,
+                 interval: float = OUTBOX_INTERVAL, max_backoff: float = OUTBOX_MAX_BACKOFF):
+        self.db = db
+        self.backend = backend
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.on_synced = None # Optional coroutine function (row, response), see start()
+        self.failures = 0 # Consecutive passes that found the backend down
+        self.synced = 0 # Rows delivered since start
+        self._claimed = set() # Local ids a conversation is submitting right now
+        self._rejected = set() # Local ids the backend refused; not retried until restart
+        self._wake = asyncio.Event()
+        self._task = None
+
+    @contextmanager
+    def claim(self, complaint_id):
+        """Keeps the outbox off a row while its conversation submits it."""
+        self._claimed.add(complaint_id)
+        try:
+            yield
+        finally:
+            self._claimed.discard(complaint_id)
+
+    async def abandon(self, complaint_id):
+        """Takes a row out of the backlog for good (synced_to_server = ABANDONED)."""
+        await asyncio.to_thread(self._set_synced, [complaint_id], ABANDONED)
+
+    def backend_reachable(self):
+        """A conversation just got through to the backend: if backing off, retry the backlog now."""
+        if self.failures:
+            self._wake.set()
+
+    # The sqlite work below runs in a worker thread (asyncio.to_thread) so that a slow or locked
+    # database never stalls the bot's event loop
+
+    def _backlog(self, after_id: int, limit: int) -> list:
+        names = ("id", "timestamp") + COMPLAINT_PAYLOAD_FIELDS
+        columns = ", ".join(names)
+        with self.db.connection() as conn:
+            conn.row_factory = lambda cursor, row: dict(zip(names, row))
+            return conn.execute(f"""
+                SELECT {columns} FROM complaints
+                WHERE synced_to_server = 0 AND id > ? ORDER BY id LIMIT ?
+            """, (after_id, limit)).fetchall()
+
+    def _set_synced(self, ids: list, synced: int = 1):
+        with self.db.connection() as conn:
+            conn.execute(f"UPDATE complaints SET synced_to_server = ? WHERE id IN ({','.join('?' * len(ids))})",
+                         [synced, *ids])
+
+    async def _send(self, row: dict, slots: asyncio.Semaphore) -> dict:
+        async with slots:
+            payload = {field: row[field] for field in COMPLAINT_PAYLOAD_FIELDS}
+            payload["idempotency_key"] = idempotency_key(row["id"], row["chat_id"], row["timestamp"])
+            # One attempt: retrying is this class's job, paced by its own backoff
+            return await self.backend.submit_complaint(payload, max_attempts=1)
+
+    async def flush(self) -> int:
+        """
+        One pass over the backlog; returns the number of rows delivered. Raises the first
+        connection/availability error (after recording what was delivered before it).
+        """
+        slots = asyncio.Semaphore(self.max_in_flight)
+        after_id, delivered = 0, 0
+        while True:
+            rows = await asyncio.to_thread(self._backlog, after_id, self.batch_size if delivered else 1)
+            if not rows:
+                return delivered
+            after_id = rows[-1]["id"]
+            rows = [row for row in rows if row["id"] not in self._claimed and row["id"] not in self._rejected]
+            results = await asyncio.gather(*(self._send(row, slots) for row in rows), return_exceptions=True)
+            sent = [(row, result) for row, result in zip(rows, results) if not isinstance(result, Exception)]
+            if sent:
+                await asyncio.to_thread(self._set_synced, [row["id"] for row, _ in sent])
+                delivered += len(sent)
+                self.synced += len(sent)
+            down = None
+            for row, result in zip(rows, results):
+                if not isinstance(result, Exception):
+                    continue
+                if is_backend_down(result):
+                    down = down or result
+                else:
+                    self._rejected.add(row["id"])
+                    logger.error(f"Backend rejected unsynced complaint {row['id']}, skipping it: {result!r}")
+            if sent:
+                self.failures = 0
+            for row, response in sent:
+                await self._announce(row, response)
+            if down:
+                raise down
+
+    async def _announce(self, row: dict, response: dict):
+        if self.on_synced is None:
+            return
+        try:
+            await self.on_synced(row, response)
+        except Exception as e: # The complaint is registered either way
+            logger.warning(f"Could not tell chat {row['chat_id']} that complaint {row['id']} was synced: {e!r}")
+
+    def next_delay(self) -> float:
+        if not self.failures:
+            return self.interval
+        delay = min(self.max_backoff, self.interval * 2 ** self.failures)
+        return random.uniform(delay / 2, delay) # Jittered, but never straight back at a down backend
+
+    async def run(self):
+        """Resyncs forever: a pass, then a wait of next_delay() (cut short by backend_reachable())."""
+        while True:
+            self._wake.clear() # Before the pass: a backend_reachable() during it still cuts the wait short
+            try:
+                delivered = await self.flush()
+                if delivered:
+                    logger.info(f"Outbox resynced {delivered} complaint(s) with the backend.")
+            except Exception as e:
+                self.failures += 1
+                if is_backend_down(e):
+                    logger.warning(f"Outbox: backend still unreachable ({e!r}), {self.failures} failed pass(es).")
+                else:
+                    logger.error(f"Outbox pass failed: {e!r}", exc_info=True)
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.next_delay())
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self, on_synced=None):
+        """Runs the outbox as a task on the current event loop."""
+        self.on_synced = on_synced
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,52 @@
+# snapshot.py
+import itertools
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CachedSnapshot:
+    """
+    A value built by `build()` and served from memory until invalidated.
+    - invalidate() is cheap and safe from any thread: it only takes a new generation number,
+      so a burst of writes costs nothing until someone reads.
+    - get() rebuilds at most once per generation: concurrent readers of a stale snapshot
+      wait for a single rebuild (single flight) instead of each running the queries.
+    An invalidation that lands during a rebuild leaves the new snapshot stale, so the
+    next get() rebuilds again; a change is never lost.
+    """
+
+    def __init__(self, build):
+        self._build = build
+        self._generations = itertools.count(1) # next() is atomic, so concurrent invalidations never collide
+        self._generation = 0 # Replaced by a new number on every invalidate()
+        self._built_generation = -1 # Generation the current value was built at
+        self._value = None
+        self._build_lock = threading.Lock()
+        self.rebuilds = 0
+        self.last_build_seconds = None
+
+    def invalidate(self, *_):
+        """Marks the snapshot stale (accepts and ignores listener arguments)."""
+        self._generation = next(self._generations)
+
+    def peek(self):
+        """The current value without rebuilding it (None before the first build)."""
+        return self._value
+
+    def get(self):
+        generation = self._generation
+        if self._built_generation == generation:
+            return self._value
+        with self._build_lock:
+            generation = self._generation
+            if self._built_generation == generation:
+                return self._value # Rebuilt by another reader while we waited
+            started = time.perf_counter()
+            value = self._build()
+            self.last_build_seconds = time.perf_counter() - started
+            self._value, self._built_generation = value, generation
+            self.rebuilds += 1
+            return value
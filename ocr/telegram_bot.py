@@ -8,7 +8,7 @@ from collections import Counter # Not explicitly used for core logic, but good t
 import io # Not explicitly used, but good for byte streams
 
 # Third-Party Packages
-import requests
+import httpx
 from telegram import Update, InputFile, KeyboardButton, ReplyKeyboardMarkup, ReplyKeyboardRemove
 from telegram.ext import (
     Application,
@@ -18,71 +18,17 @@ from telegram.ext import (
     ContextTypes,
     ConversationHandler,
 )
-import cv2 # For image processing (used in error recognition)
-import numpy as np # For numerical operations with cv2
 import sqlite3 # For local database operations on the bot side
 from PIL import Image # Potentially useful for image manipulation (e.g., resizing)
+from db import Database
+from migrations import migrate
+from backend_client import BackendClient
+from media_pool import MediaPool, MediaPoolBusy
+from update_processor import ChatOrderedUpdateProcessor
+from outbox import ComplaintOutbox, idempotency_key, is_backend_down
 
 # --- Placeholder for AI Modules ---
-class EasyOCRPlaceholder:
-    def readtext(self, image_path, detail=0):
-        """
-        A placeholder for EasyOCR's readtext function.
-        Simulates OCR output based on dummy logic.
-        """
-        logging.info(f"EasyOCR placeholder: Reading text from {image_path}")
-        # Simulate different outputs based on image path
-        if "error" in image_path.lower() or "e5" in image_path.lower():
-            return ["E5", "ERROR", "CODE"]
-        if "f0" in image_path.lower():
-            return ["F0", "FAULT"]
-        if "h1" in image_path.lower():
-            return ["H1", "HIGH", "TEMP"]
-        return ["NO", "CODE", "FOUND", "1234", "OK"] # Default for other cases
-
-class ErrorRecognizer:
-    def __init__(self):
-        self.easyocr = EasyOCRPlaceholder() # Use the placeholder OCR
-        logging.info("ErrorRecognizer initialized (placeholder).")
-
-    def extract_codes(self, image_path: str) -> list:
-        """
-        Extracts potential error codes from an image using a placeholder OCR.
-        Identifies common Haier-like error code patterns.
-        """
-        full_text_list = self.easyocr.readtext(image_path, detail=0)
-        full_text = ' '.join(full_text_list).upper()
-        logging.info(f"ErrorRecognizer: Detected text for code extraction: {full_text}")
-
-        detected_codes = []
-        # Regex to find patterns like E1, F0, H1, ERR123, 1234 (2-4 digits)
-        pattern = r'\b(?:E\d{1,3}|F\d{1,3}|H\d{1,3}|ERR\d{1,3}|ER\d{1,3}|\d{2,4})\b'
-        matches = re.findall(pattern, full_text)
-        
-        # A list of common Haier error codes for better filtering
-        known_haier_codes = [
-            'E1', 'E2', 'E3', 'E4', 'E5', 'E6', 'E7', 'E8', 'E9', 'E0',
-            'F0', 'F1', 'F2', 'F3', 'F4', 'F5', 'F6', 'F7', 'F8', 'F9', 'F0',
-            'H0', 'H1', 'H2', 'H3', 'H4', 'H5', 'H6', 'H7', 'H8', 'H9'
-        ]
-        
-        for match in matches:
-            cleaned_match = re.sub(r'[^A-Z0-9]', '', match).strip() # Remove non-alphanumeric
-            if cleaned_match:
-                # Prioritize known Haier codes
-                if cleaned_match in known_haier_codes and cleaned_match not in detected_codes:
-                    detected_codes.append(cleaned_match)
-                # Allow general 2-4 digit numbers if not already captured
-                elif cleaned_match.isdigit() and 2 <= len(cleaned_match) <= 4 and cleaned_match not in detected_codes:
-                    detected_codes.append(cleaned_match)
-                # Allow patterns like ERR/ER followed by digits
-                elif re.match(r'(ERR|ER)\d{1,3}', cleaned_match) and cleaned_match not in detected_codes:
-                    detected_codes.append(cleaned_match)
-
-        logging.info(f"ErrorRecognizer: Extracted codes: {detected_codes}")
-        return detected_codes if detected_codes else ["NOT_RECOGNIZED"]
-
-
+# (EasyOCRPlaceholder and ErrorRecognizer live in media_pool.py, loaded by each pool worker)
 class ComplaintPredictor:
     def __init__(self):
         logging.info("ComplaintPredictor initialized (placeholder).")
@@ -90,7 +36,9 @@ class ComplaintPredictor:
 # --- End Placeholder ---
 
 # Initialize AI/Utility Modules
-recognizer = ErrorRecognizer()
+# Photo decoding and OCR run in worker processes, each with its own preloaded recognizer,
+# so a slow OCR pass never holds up other users' updates
+media_pool = MediaPool()
 predictor = ComplaintPredictor()
 
 # Configure logging for bot
@@ -110,6 +58,24 @@ FLASK_SERVER_URL = "https://e6fa-2401-4900-57a1-c4ab-e180-a88f-9c4a-b215.ngrok-f
 
 TIMEOUT = timedelta(minutes=5) # Conversation timeout for `ConversationHandler`
 
+# Updates processed at once (each chat's updates still one at a time, in order); 1 = sequential
+CONCURRENT_UPDATES = int(os.environ.get("BOT_CONCURRENT_UPDATES", 32))
+# "polling" (default) or "webhook". Webhook mode needs `pip install "python-telegram-bot[webhooks]"`
+# and a public HTTPS URL forwarding to the local listener (e.g. ngrok http 8443).
+BOT_MODE = os.environ.get("BOT_MODE", "polling")
+WEBHOOK_URL = os.environ.get("WEBHOOK_URL", "") # Public base URL, e.g. https://<RANDOM_ID>.ngrok-free.app
+WEBHOOK_LISTEN = os.environ.get("WEBHOOK_LISTEN", "127.0.0.1")
+WEBHOOK_PORT = int(os.environ.get("WEBHOOK_PORT", 8443))
+WEBHOOK_PATH = os.environ.get("WEBHOOK_PATH", "telegram")
+WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET") # Telegram sends it back; other requests are rejected
+# Pooled WAL-mode connections (same layer as the Flask app, so the two share the file without lock errors)
+db = Database("complaints.db")
+# One async HTTP client for every conversation: pooled keep-alive connections, per-request
+# timeouts and jittered retries, without blocking the event loop while the backend works
+backend = BackendClient(FLASK_SERVER_URL)
+# Background resync of complaints saved locally while the backend was unreachable
+outbox = ComplaintOutbox(db, backend)
+
 # Conversation states - used to manage the flow of the conversation
 PROBLEM, CONTACT, LOCATION_OR_ADDRESS, MEDIA = range(4)
 
@@ -119,26 +85,10 @@ def init_db():
     """
     Initialize SQLite database for complaints on the bot's side.
     This local DB acts as a cache/queue for complaints that might not immediately sync to the server.
+    It is migrated to the same versioned schema as the Flask app's.
     """
-    conn = sqlite3.connect("complaints.db")
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS complaints (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            chat_id INTEGER,
-            problem TEXT,
-            error_code TEXT,
-            address TEXT,
-            complaint_latitude REAL,  -- Store latitude locally
-            complaint_longitude REAL, -- Store longitude locally
-            contact_no TEXT,
-            media_path TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            synced_to_server BOOLEAN DEFAULT 0 -- Flag to track successful sync
-        )
-    """)
-    conn.commit()
-    conn.close()
+    with db.connection() as conn:
+        migrate(conn)
     logger.info("Bot's local database initialized/checked.")
 
 def validate_phone(phone: str) -> bool:
@@ -296,33 +246,39 @@ async def media(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
             # Define temporary path to save the photo
             temp_media_path = os.path.join("media", f'{update.message.chat_id}_{timestamp}.jpg')
             
-            # Download photo as bytes, convert to numpy array for OpenCV, then save
-            img_bytes = await photo_file.download_as_bytearray()
-            nparr = np.frombuffer(img_bytes, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            if img is not None:
-                cv2.imwrite(temp_media_path, img) # Save the image
+            # Stream the original JPEG straight to disk (no decode/re-encode); the media pool
+            # decodes a reduced-size copy for OCR only
+            await photo_file.download_to_drive(custom_path=temp_media_path)
+            status_message = await update.message.reply_text("⏳ Processing your photo…")
+            try:
+                detected_codes = await media_pool.process_photo(temp_media_path)
+            except MediaPoolBusy as e:
+                logger.warning(f"Media pool busy, photo from {update.message.chat_id} not accepted: {e}")
+                os.remove(temp_media_path) # The user sends it again
+                await status_message.edit_text(
+                    "⏳ We're processing a lot of photos right now. Please send it again in a minute, or /skip."
+                )
+                return MEDIA # Stay in MEDIA state to allow retry
+
+            if detected_codes is not None:
                 logger.info(f"Received and saved photo to: {temp_media_path}")
                 media_path = temp_media_path
                 
-                # Attempt to extract error codes from the saved photo
-                detected_codes = recognizer.extract_codes(temp_media_path)
-                
                 if detected_codes and detected_codes != ["NOT_RECOGNIZED"]:
                     error_code = ",".join(detected_codes) # Join multiple codes if found
-                    await update.message.reply_text(
+                    await status_message.edit_text(
                         f"✅ Detected Error Code(s): `{error_code}`\n"
                         "We've added this to your complaint. Submitting now..."
                     )
                 else:
-                    await update.message.reply_text(
+                    await status_message.edit_text(
                         f"⚠️ No standard error codes found in the photo. Your complaint will be processed without a specific code.\n"
                         "Submitting complaint..."
                     )
             else:
                 logger.error("Failed to decode image bytes from Telegram.")
-                await update.message.reply_text("❌ Failed to process the image. Please try again or /skip.")
+                os.remove(temp_media_path)
+                await status_message.edit_text("❌ Failed to process the image. Please try again or /skip.")
                 return MEDIA # Stay in MEDIA state to allow retry
 
         elif update.message.video:
@@ -398,19 +354,19 @@ async def submit_complaint(update: Update, context: ContextTypes.DEFAULT_TYPE):
     }
 
     complaint_id = None # To store local DB ID if saved
+    saved_at = datetime.now().isoformat()
     try:
         # Save complaint locally first (as a temporary queue/backup)
-        conn = sqlite3.connect("complaints.db")
-        cursor = conn.cursor()
-        cursor.execute(
-            """INSERT INTO complaints 
-            (chat_id, problem, error_code, address, complaint_latitude, complaint_longitude, contact_no, media_path, timestamp, synced_to_server) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (chat_id, problem, error_code, address, complaint_latitude, complaint_longitude, contact_no, media_path, datetime.now().isoformat(), 0) # 0 for not synced yet
-        )
-        complaint_id = cursor.lastrowid # Get the ID of the locally saved complaint
-        conn.commit()
-        conn.close()
+        with db.connection() as conn:
+            cursor = conn.execute(
+                """INSERT INTO complaints 
+                (chat_id, problem, error_code, address, complaint_latitude, complaint_longitude, contact_no, media_path, timestamp, synced_to_server) 
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (chat_id, problem, error_code, address, complaint_latitude, complaint_longitude, contact_no, media_path, saved_at, 0) # 0 for not synced yet
+            )
+            complaint_id = cursor.lastrowid # Get the ID of the locally saved complaint
+        # The key the outbox would resend it with: retries of either kind never register it twice
+        data_to_submit["idempotency_key"] = idempotency_key(complaint_id, chat_id, saved_at)
         logger.info(f"Complaint saved locally with ID: {complaint_id}")
     except sqlite3.Error as e:
         logger.error(f"Local DB error saving complaint: {e}", exc_info=True)
@@ -419,96 +375,89 @@ async def submit_complaint(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "Attempting to submit to server anyway."
         )
 
-    max_retries = 3 # Number of attempts to send to Flask server
-    for attempt in range(max_retries):
-        try:
-            logger.info(f"Attempt {attempt + 1}/{max_retries} to send complaint to Flask server at {FLASK_SERVER_URL}.")
-            response = requests.post(
-                FLASK_SERVER_URL,
-                json=data_to_submit,
-                headers={'Content-Type': 'application/json'},
-                timeout=45 # Increased timeout for server processing (DB, blockchain, assignment)
-            )
-            response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
-            api_response = response.json() # Parse JSON response from Flask
-
-            # If successfully sent to server, update local DB status
+    try:
+        # Retries with backoff happen inside the client; awaiting it leaves other chats responsive
+        logger.info(f"Sending complaint to Flask server at {FLASK_SERVER_URL}.")
+        with outbox.claim(complaint_id): # The outbox only picks the row up if this fails
+            api_response = await backend.submit_complaint(data_to_submit)
+    except httpx.HTTPStatusError as e:
+        # Catch HTTP errors (e.g., 400 Bad Request, 500 Internal Server Error from Flask)
+        logger.error(f"HTTP Error from Flask server: {e.response.status_code} - {e.response.text}", exc_info=True)
+        if is_backend_down(e): # Rate limited or unavailable: the outbox resends it
+            follow_up = "Your complaint has been saved locally and will be synced later."
+        else: # Refused: the user is asked to resubmit, so the outbox must not send it as well
             if complaint_id:
                 try:
-                    conn = sqlite3.connect("complaints.db")
-                    cursor = conn.cursor()
-                    cursor.execute("UPDATE complaints SET synced_to_server = 1 WHERE id = ?", (complaint_id,))
-                    conn.commit()
-                    conn.close()
-                    logger.info(f"Local complaint ID {complaint_id} marked as synced.")
-                except sqlite3.Error as e:
-                    logger.warning(f"Failed to update synced_to_server for ID {complaint_id}: {e}", exc_info=True)
-
-            # Construct the success message for the user
-            message = (
-                "✅ Complaint Registered Successfully!\n\n"
-                f"Complaint ID: #{api_response.get('complaint_id', 'N/A')}\n"
-                f"Problem: {problem}\n"
-                f"Address: {address}\n"
-                f"Contact No: {contact_no}\n"
-                f"Error Code: {api_response.get('details', {}).get('error_code', 'N/A')}\n"
-            )
-            
-            assigned_tech = api_response.get('assigned_technician')
-            if assigned_tech and assigned_tech.get('status') == 'assigned':
-                message += f"👨‍🔧 Assigned Technician: {assigned_tech['name']} (Contact: {assigned_tech['contact_no']})\n"
-                message += "They will contact you shortly!"
-            elif assigned_tech and assigned_tech.get('message'): # If assignment failed with a specific message
-                message += f"⚠️ Assignment Info: {assigned_tech['message']}\n"
-                message += "We'll manually review and assign a technician soon."
-            else: # Generic pending assignment
-                message += "⚠️ Technician assignment is pending. We'll assign one shortly."
-
-            if 'blockchain_hash' in api_response:
-                message += f"\nBlockchain Receipt: `{api_response['blockchain_hash'][:12]}...`\n" # Show a truncated hash
-            
-            await update.message.reply_text(message)
-            logger.info("Complaint successfully sent to Flask server.")
-            return # Exit function after successful submission
-            
-        except requests.exceptions.ConnectionError as e:
-            logger.warning(f"Attempt {attempt + 1} failed to connect to Flask server (ConnectionError): {e}")
-            if attempt < max_retries - 1: # If not the last attempt, wait and retry
-                await asyncio.sleep(2) # Wait for 2 seconds before retrying
-            else:
-                await update.message.reply_text(
-                    "❌ Failed to connect to the backend server after multiple attempts. "
-                    "Your complaint has been saved locally and will be synced later."
-                )
-                logger.error("Max retries reached. Could not connect to Flask server.")
-        except requests.exceptions.Timeout:
-            logger.warning(f"Attempt {attempt + 1} timed out connecting to Flask server.")
-            if attempt < max_retries - 1:
-                await asyncio.sleep(2)
-            else:
-                await update.message.reply_text(
-                    "❌ The backend server timed out. "
-                    "Your complaint has been saved locally and will be synced later."
-                )
-                logger.error("Max retries reached. Flask server timeout.")
-        except requests.exceptions.HTTPError as e:
-            # Catch HTTP errors (e.g., 400 Bad Request, 500 Internal Server Error from Flask)
-            logger.error(f"HTTP Error from Flask server: {e.response.status_code} - {e.response.text}", exc_info=True)
-            await update.message.reply_text(
-                f"❌ The server returned an error: {e.response.status_code}. "
-                "Your complaint has been saved locally. Please try again later or contact support."
-            )
-            return # Exit function on HTTP error as retries won't help here
-        except Exception as e:
-            # Catch any other unexpected errors during submission
-            logger.error(f"Unexpected error during server submission: {e}", exc_info=True)
-            await update.message.reply_text(
-                "❌ An unexpected error occurred during complaint submission. "
-                "Your complaint has been saved locally and will be synced later."
-            )
-            return
+                    await outbox.abandon(complaint_id)
+                except sqlite3.Error as db_error:
+                    logger.warning(f"Failed to take complaint {complaint_id} out of the outbox: {db_error}", exc_info=True)
+            follow_up = "Your complaint has been saved locally. Please try again later or contact support."
+        await update.message.reply_text(f"❌ The server returned an error: {e.response.status_code}. {follow_up}")
+        return
+    except httpx.TimeoutException:
+        logger.error("Max retries reached. Flask server timeout.")
+        await update.message.reply_text(
+            "❌ The backend server timed out. "
+            "Your complaint has been saved locally and will be synced later."
+        )
+        return
+    except httpx.TransportError as e:
+        logger.error(f"Max retries reached. Could not connect to Flask server: {e!r}")
+        await update.message.reply_text(
+            "❌ Failed to connect to the backend server after multiple attempts. "
+            "Your complaint has been saved locally and will be synced later."
+        )
+        return
+    except Exception as e:
+        # Catch any other unexpected errors during submission
+        logger.error(f"Unexpected error during server submission: {e}", exc_info=True)
+        await update.message.reply_text(
+            "❌ An unexpected error occurred during complaint submission. "
+            "Your complaint has been saved locally and will be synced later."
+        )
+        return
 
-    logger.error("All server submission attempts failed.") # This line is reached if all retries failed
+    outbox.backend_reachable() # Backend is up: replay any backlog without waiting out the backoff
+    # If successfully sent to server, update local DB status
+    if complaint_id:
+        try:
+            with db.connection() as conn:
+                conn.execute("UPDATE complaints SET synced_to_server = 1 WHERE id = ?", (complaint_id,))
+            logger.info(f"Local complaint ID {complaint_id} marked as synced.")
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to update synced_to_server for ID {complaint_id}: {e}", exc_info=True)
+
+    # Construct the success message for the user
+    message = (
+        "✅ Complaint Registered Successfully!\n\n"
+        f"Complaint ID: #{api_response.get('complaint_id', 'N/A')}\n"
+        f"Problem: {problem}\n"
+        f"Address: {address}\n"
+        f"Contact No: {contact_no}\n"
+        f"Error Code: {api_response.get('details', {}).get('error_code', 'N/A')}\n"
+    )
+
+    assigned_tech = api_response.get('assigned_technician')
+    if assigned_tech and assigned_tech.get('status') == 'assigned':
+        message += f"👨‍🔧 Assigned Technician: {assigned_tech['name']} (Contact: {assigned_tech['contact_no']})\n"
+        if assigned_tech.get('eta'):
+            # ISO timestamp from the server, e.g. 2025-06-12T15:40:00 -> "12 Jun, 15:40"
+            eta = datetime.fromisoformat(assigned_tech['eta']).strftime('%d %b, %H:%M')
+            message += f"🕒 Expected completion: {eta}\n"
+        message += "They will contact you shortly!"
+    elif assigned_tech and assigned_tech.get('message'): # If assignment failed with a specific message
+        message += f"⚠️ Assignment Info: {assigned_tech['message']}\n"
+        message += "We'll manually review and assign a technician soon."
+    else: # Generic pending assignment
+        message += "⚠️ Technician assignment is pending. We'll assign one shortly."
+
+    receipt = api_response.get('blockchain_receipt')
+    if receipt:
+        # The block is sealed in the background, so the receipt starts out as 'pending'
+        message += f"\nBlockchain Receipt: `{receipt['receipt_id'][:12]}...` ({receipt.get('status', 'pending')})\n" # Show a truncated receipt id
+
+    await update.message.reply_text(message)
+    logger.info("Complaint successfully sent to Flask server.")
 
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """
@@ -522,12 +471,43 @@ async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     return ConversationHandler.END # End the conversation
 
 
+async def announce_synced(bot, row: dict, api_response: dict) -> None:
+    """Tells the user that a complaint saved while the backend was down has now been registered."""
+    await bot.send_message(
+        row["chat_id"],
+        "✅ Your earlier complaint has now been registered with our server.\n\n"
+        f"Complaint ID: #{api_response.get('complaint_id', 'N/A')}\n"
+        f"Problem: {row['problem']}\n"
+        "We'll assign a technician shortly."
+    )
+
+
+async def start_workers(application: Application) -> None:
+    """Starts the outbox on the bot's event loop once the application is initialized."""
+    outbox.start(lambda row, api_response: announce_synced(application.bot, row, api_response))
+
+
+async def close_workers(application: Application) -> None:
+    """Stops the outbox, then closes the pooled backend connections and the media workers."""
+    await outbox.stop()
+    await backend.aclose()
+    media_pool.close()
+
+
 def main() -> None:
     """Start the bot."""
     init_db() # Initialize the bot's local database on startup
+    media_pool.start() # Fork the OCR workers before the event loop and its threads start
 
     # Build the Telegram Application instance
-    application = Application.builder().token(TOKEN).build()
+    application = (
+        Application.builder()
+        .token(TOKEN)
+        .concurrent_updates(ChatOrderedUpdateProcessor(CONCURRENT_UPDATES))
+        .post_init(start_workers)
+        .post_shutdown(close_workers)
+        .build()
+    )
 
     # Define the conversation handler with states and fallbacks
     conv_handler = ConversationHandler(
@@ -539,6 +519,9 @@ def main() -> None:
                 MessageHandler(filters.LOCATION, location_handler), # Handles shared location
                 MessageHandler(filters.TEXT & ~filters.COMMAND, address_manual_handler) # Handles manually typed address
             ],
+            # Blocking on purpose: other chats keep being served by ChatOrderedUpdateProcessor,
+            # while this chat's next update (/cancel, a resent photo) waits for the submission
+            # instead of being dropped by a conversation still pending on it
             MEDIA: [
                 MessageHandler(filters.PHOTO | filters.VIDEO, media), # Handles photos or videos
                 CommandHandler("skip", skip_media) # Handles /skip command
@@ -551,9 +534,24 @@ def main() -> None:
     # Add the conversation handler to the application
     application.add_handler(conv_handler)
 
-    logger.info("Bot is running...")
-    # Start polling for updates from Telegram
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    if BOT_MODE == "webhook":
+        if not WEBHOOK_URL:
+            raise SystemExit("BOT_MODE=webhook needs WEBHOOK_URL (the public HTTPS URL of this listener).")
+        logger.info(f"Bot is running (webhook on {WEBHOOK_LISTEN}:{WEBHOOK_PORT}/{WEBHOOK_PATH}, "
+                    f"{CONCURRENT_UPDATES} concurrent updates)...")
+        # Telegram pushes each update to the local listener as it happens: no polling round trips
+        application.run_webhook(
+            listen=WEBHOOK_LISTEN,
+            port=WEBHOOK_PORT,
+            url_path=WEBHOOK_PATH,
+            webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{WEBHOOK_PATH}",
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=Update.ALL_TYPES,
+        )
+    else:
+        logger.info(f"Bot is running (polling, {CONCURRENT_UPDATES} concurrent updates)...")
+        # Start polling for updates from Telegram
+        application.run_polling(allowed_updates=Update.ALL_TYPES)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,145 @@
+# test_assignment_stress.py
+# Fires hundreds of concurrent /submit_complaint requests at the Flask app and checks
+# that no technician is ever booked beyond their job capacity. Runs against a throwaway DB.
+# Usage: python test_assignment_stress.py [--submissions 400] [--threads 32]
+import argparse
+import atexit
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@contextmanager
+def throwaway_app():
+    """
+    Imports app.py with its database and ledger in a temporary directory (the working
+    directory meanwhile). Afterwards its background threads are stopped, the directory is
+    removed and the working directory, environment and import path are restored.
+    """
+    previous_cwd, previous_path, previous_env = os.getcwd(), list(sys.path), dict(os.environ)
+    with tempfile.TemporaryDirectory(prefix="assign_stress_") as work_dir:
+        os.chdir(work_dir)
+        try:
+            os.environ.setdefault("LEDGER_DIR", os.path.join(work_dir, "ledger_data"))
+            os.environ.setdefault("MINING_WORKERS", "1")
+            os.environ.setdefault("MINING_DIFFICULTY_BITS", "8")
+            os.environ.setdefault("BATCH_ASSIGN_INTERVAL", "0") # Only the submissions under test assign technicians
+            sys.path.insert(0, APP_DIR)
+            import app
+            app.limiter.max_requests = 10**9 # The stress test is one IP firing far more than 100 requests
+            try:
+                yield app
+            finally:
+                app.block_builder.stop(flush=False)
+                atexit.unregister(app.seal_pending_complaints) # Its ledger is about to be deleted
+                app.change_feed.stop()
+                app.miner.close()
+                app.ledger.store.close()
+                sys.modules.pop("app", None)
+        finally:
+            os.chdir(previous_cwd)
+            sys.path[:] = previous_path
+            os.environ.clear()
+            os.environ.update(previous_env)
+
+
+def test_no_overbooking(submissions=400, threads=32):
+    with throwaway_app() as app:
+        run_submissions(app, submissions, threads)
+
+
+def run_submissions(app, submissions, threads):
+
+    # Start from a fully available roster with empty queues so every submission competes for slots
+    with sqlite3.connect("complaints.db") as conn:
+        conn.execute("UPDATE technicians SET status = 'available', active_jobs = 0")
+        conn.execute("DELETE FROM technician_jobs")
+        available, slots = conn.execute("SELECT COUNT(*), SUM(capacity) FROM technicians").fetchone()
+    app.technician_registry.load()
+    app.job_board.load()
+
+    problems = ["AC not cooling", "TV display broken", "Fridge not cooling", "Washing machine leaking",
+                "Geyser not heating", "Microwave sparks", "Water purifier noise"]
+    random.seed(7)
+    payloads = [{
+        "chat_id": 1000 + i,
+        "problem": random.choice(problems),
+        "address": "Stress Test Lane, Pune",
+        "contact_no": "9876543210",
+        "error_code": "NOT_PROVIDED",
+        # Cluster submissions around Shivajinagar so they fight over the same technicians
+        "complaint_latitude": 18.5204 + random.uniform(-0.05, 0.05),
+        "complaint_longitude": 73.8567 + random.uniform(-0.05, 0.05),
+    } for i in range(submissions)]
+
+    results = []
+    errors = []
+    results_lock = threading.Lock()
+    start_barrier = threading.Barrier(threads)
+
+    def worker(chunk):
+        client = app.app.test_client()
+        start_barrier.wait()
+        for payload in chunk:
+            response = client.post("/submit_complaint", json=payload)
+            with results_lock:
+                if response.status_code == 200:
+                    results.append(response.get_json())
+                else:
+                    errors.append((response.status_code, response.get_data(as_text=True)))
+
+    chunks = [payloads[i::threads] for i in range(threads)]
+    workers = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    with sqlite3.connect("complaints.db") as conn:
+        overbooked = conn.execute("""
+            SELECT t.id, t.capacity, COUNT(j.id) FROM technicians t
+            JOIN technician_jobs j ON j.technician_id = t.id AND j.status = 'queued'
+            GROUP BY t.id HAVING COUNT(j.id) > t.capacity
+        """).fetchall()
+        miscounted = conn.execute("""
+            SELECT t.id FROM technicians t
+            WHERE t.active_jobs != (SELECT COUNT(*) FROM technician_jobs j WHERE j.technician_id = t.id AND j.status = 'queued')
+               OR (t.status = 'busy') != (t.active_jobs >= t.capacity)
+        """).fetchall()
+        mismatched = conn.execute("""
+            SELECT c.id FROM complaints c
+            LEFT JOIN technician_jobs j ON j.complaint_id = c.id AND j.status = 'queued'
+            WHERE c.status = 'assigned' AND (j.technician_id IS NULL OR j.technician_id != c.assigned_technician_id)
+        """).fetchall()
+        assigned = conn.execute("SELECT COUNT(*) FROM complaints WHERE assigned_technician_id IS NOT NULL").fetchone()[0]
+        jobs = conn.execute("SELECT COUNT(*) FROM technician_jobs WHERE status = 'queued'").fetchone()[0]
+        busy = conn.execute("SELECT COUNT(*) FROM technicians WHERE status = 'busy'").fetchone()[0]
+
+    print(f"Submissions: {submissions} over {threads} threads in {elapsed:.2f}s "
+          f"({submissions / elapsed:.0f} submissions/s, {assigned / elapsed:.0f} assignments/s)")
+    print(f"Technicians: {available} total with {slots} job slots; {assigned} complaints assigned, "
+          f"{busy} technicians full; errors: {len(errors)}")
+
+    assert not errors, f"Failed submissions: {errors[:3]}"
+    assert not overbooked, f"Technicians over capacity: {overbooked}"
+    assert not miscounted, f"active_jobs/status out of step with the job queue: {miscounted}"
+    assert not mismatched, f"Assigned complaints without a matching open job: {mismatched}"
+    assert assigned == jobs == sum(1 for r in results if r["assigned_technician"].get("status") == "assigned")
+    print("✅ No technician was booked beyond capacity.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent technician assignment stress test")
+    parser.add_argument("--submissions", type=int, default=400)
+    parser.add_argument("--threads", type=int, default=32)
+    args = parser.parse_args()
+    test_no_overbooking(args.submissions, args.threads)
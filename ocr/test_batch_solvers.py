@@ -0,0 +1,80 @@
+# test_batch_solvers.py
+# Checks the batch assigner's min-cost matching solvers against brute force over every
+# assignment: hungarian and auction on square and wide matrices, and solve_assignment (with
+# its own solvers, not SciPy's) on square, wide and tall ones, including infeasible pairs.
+# Usage: python test_batch_solvers.py
+import itertools
+import os
+import sys
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, APP_DIR)
+
+from dispatch import batch
+from dispatch.batch import INFEASIBLE_COST, auction, hungarian, solve_assignment
+
+# (rows, columns) shapes small enough to enumerate every assignment
+WIDE_SHAPES = [(1, 1), (2, 2), (3, 3), (5, 5), (6, 6), (1, 4), (2, 5), (3, 6), (4, 7)]
+
+
+def cost_matrix(rng, shape):
+    """Whole-minute completion times, as the auction's rounding needs, with some infeasible pairs."""
+    cost = rng.integers(5, 240, size=shape).astype(np.float64)
+    cost[rng.random(shape) < 0.15] = INFEASIBLE_COST
+    return cost
+
+
+def brute_force(cost):
+    """The lowest total cost of matching min(n, m) rows and columns one to one."""
+    n, m = cost.shape
+    if n <= m:
+        return min(cost[np.arange(n), list(columns)].sum() for columns in itertools.permutations(range(m), n))
+    return min(cost[list(rows), np.arange(m)].sum() for rows in itertools.permutations(range(n), m))
+
+
+def assert_one_to_one(rows, columns, cost):
+    assert len(rows) == len(columns) == min(cost.shape)
+    assert len(set(rows.tolist())) == len(rows) and len(set(columns.tolist())) == len(columns)
+
+
+def test_solvers_match_brute_force(trials=20):
+    rng = np.random.default_rng(11)
+    for shape in WIDE_SHAPES:
+        for _ in range(trials):
+            cost = cost_matrix(rng, shape)
+            best = brute_force(cost)
+            for solver in (hungarian, auction):
+                columns = solver(cost)
+                assert_one_to_one(np.arange(shape[0]), columns, cost)
+                assert cost[np.arange(shape[0]), columns].sum() == best, (solver.__name__, cost)
+    print(f"✅ hungarian and auction optimal on {len(WIDE_SHAPES) * trials} square and wide matrices.")
+
+
+def test_solve_assignment_square_wide_and_tall(trials=20):
+    rng = np.random.default_rng(12)
+    shapes = WIDE_SHAPES + [(columns, rows) for rows, columns in WIDE_SHAPES if rows != columns]
+    scipy_solver, batch.linear_sum_assignment = batch.linear_sum_assignment, None # This module's own solvers
+    hungarian_max_size = batch.HUNGARIAN_MAX_SIZE
+    try:
+        for batch.HUNGARIAN_MAX_SIZE in (hungarian_max_size, 0): # 0: near-square ones go to the auction
+            for shape in shapes:
+                for _ in range(trials):
+                    cost = cost_matrix(rng, shape)
+                    rows, columns = solve_assignment(cost)
+                    assert_one_to_one(rows, columns, cost)
+                    assert list(rows) == sorted(rows), rows
+                    assert cost[rows, columns].sum() == brute_force(cost), cost
+        empty_rows, empty_columns = solve_assignment(np.empty((0, 3)))
+        assert len(empty_rows) == len(empty_columns) == 0
+    finally:
+        batch.linear_sum_assignment = scipy_solver
+        batch.HUNGARIAN_MAX_SIZE = hungarian_max_size
+    print(f"✅ solve_assignment optimal on {len(shapes) * trials} square, wide and tall (transposed) matrices, "
+          f"through either solver.")
+
+
+if __name__ == "__main__":
+    test_solvers_match_brute_force()
+    test_solve_assignment_square_wide_and_tall()
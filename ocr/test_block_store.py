@@ -0,0 +1,81 @@
+# test_block_store.py
+# Checks BlockStore crash recovery: after torn index/receipt writes, reopening the store
+# re-indexes the blocks and rebuilds their receipts, so every sealed complaint still has a
+# committed receipt and a Merkle proof, not just a chain of the right length.
+# Usage: python test_block_store.py
+import os
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, APP_DIR)
+
+from blockchain.ledger import ComplaintLedger
+from blockchain.storage import INDEX_ENTRY, RECEIPT_ENTRY, BlockStore
+
+
+def sealed_chain(store_dir, blocks=3, per_block=2):
+    """Genesis plus blocks - 1 sealed blocks; returns the receipt ids by complaint db_id."""
+    store = BlockStore(store_dir, fsync=False)
+    ledger = ComplaintLedger(difficulty_bits=4, store=store)
+    receipts = {}
+    for block in range(1, blocks):
+        for i in range(per_block):
+            db_id = block * 100 + i
+            receipts[db_id] = ledger.add_complaint({'db_id': db_id, 'problem': f'AC fault {db_id}'})['receipt_id']
+        ledger.seal_block()
+    store.close()
+    return receipts
+
+
+def truncate(path, entries, entry):
+    with open(path, 'r+b') as f:
+        f.truncate(entries * entry.size)
+
+
+def reopen(store_dir):
+    return ComplaintLedger(difficulty_bits=4, store=BlockStore(store_dir, fsync=False))
+
+
+def assert_all_provable(ledger, receipts):
+    for db_id, receipt_id in receipts.items():
+        status = ledger.receipt_status(receipt_id)
+        assert status and status['status'] == 'committed', (db_id, status)
+        proof = ledger.complaint_proof(db_id)
+        assert proof and proof['receipt_id'] == receipt_id and proof['status'] == 'committed', (db_id, proof)
+
+
+def test_reindexed_blocks_get_their_receipts_back():
+    with tempfile.TemporaryDirectory() as store_dir:
+        receipts = sealed_chain(store_dir)
+        # Crash after the last block's segment write: its index and receipt entries are gone
+        truncate(os.path.join(store_dir, 'index.bin'), 2, INDEX_ENTRY)
+        truncate(os.path.join(store_dir, 'receipts.bin'), 2, RECEIPT_ENTRY)
+        ledger = reopen(store_dir)
+        assert len(ledger.chain) == 3 and ledger.verify_chain(full=True)
+        assert_all_provable(ledger, receipts)
+        ledger.store.close()
+    print(f"✅ Re-indexed block's {len(receipts) // 2} receipt(s) rebuilt; all {len(receipts)} complaints provable.")
+
+
+def test_receipts_trailing_the_index_are_rebuilt():
+    with tempfile.TemporaryDirectory() as store_dir:
+        receipts = sealed_chain(store_dir)
+        # Crash between the index and receipts writes, with the previous block's receipts cut short too
+        truncate(os.path.join(store_dir, 'receipts.bin'), 1, RECEIPT_ENTRY)
+        ledger = reopen(store_dir)
+        assert len(ledger.chain) == 3 and ledger.verify_chain(full=True)
+        assert_all_provable(ledger, receipts)
+        ledger.store.close()
+        # Recovery wrote them back: a clean reopen finds the same receipts without rebuilding
+        with open(os.path.join(store_dir, 'receipts.bin'), 'rb') as f:
+            assert len(f.read()) == len(receipts) * RECEIPT_ENTRY.size
+        ledger = reopen(store_dir)
+        assert_all_provable(ledger, receipts)
+        ledger.store.close()
+    print(f"✅ Receipts trailing the index rebuilt; all {len(receipts)} complaints provable after two reopens.")
+
+
+if __name__ == "__main__":
+    test_reindexed_blocks_get_their_receipts_back()
+    test_receipts_trailing_the_index_are_rebuilt()
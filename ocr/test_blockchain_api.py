@@ -0,0 +1,82 @@
+# test_blockchain_api.py
+# Checks the blockchain read API: /api/blockchain pages through the chain with the after
+# cursor (clamping limit, rejecting bad values, leaving complaints out with headers_only),
+# /api/blockchain/block/<ref> finds blocks by index or hash, and /api/blockchain/export
+# streams the whole chain as NDJSON. Runs against a throwaway DB.
+# Usage: python test_blockchain_api.py
+import json
+import os
+import sys
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, APP_DIR)
+
+from test_assignment_stress import throwaway_app
+
+
+def sealed_chain(app, blocks):
+    """Seals blocks - 1 blocks of two complaints after the genesis block, plus one pending complaint."""
+    app.block_builder.stop(flush=False) # The test seals the blocks itself
+    for block in range(1, blocks):
+        for i in range(2):
+            app.ledger.add_complaint({'db_id': block * 100 + i, 'problem': 'AC not cooling'})
+        app.ledger.seal_block()
+    app.ledger.add_complaint({'db_id': 9999, 'problem': 'Fridge not cooling'})
+    return [app.ledger.chain[position] for position in range(len(app.ledger.chain))]
+
+
+def test_paging_blocks_and_export(blocks=7):
+    with throwaway_app() as app:
+        chain = sealed_chain(app, blocks)
+        client = app.app.test_client()
+
+        # Walk the chain with the cursor, three blocks a page
+        seen, after, pages = [], 0, 0
+        while after is not None:
+            page = client.get(f'/api/blockchain?after={after}&limit=3').get_json()
+            assert page["length"] == blocks and page["pending_count"] == 1
+            assert [complaint['db_id'] for complaint in page["pending_complaints"]] == [9999]
+            seen += page["chain"]
+            after, pages = page["next_after"], pages + 1
+        assert seen == chain and pages == 3, (len(seen), pages)
+        assert client.get(f'/api/blockchain?after={blocks}').get_json()["chain"] == []
+
+        # Oversized limits are clamped to BLOCKCHAIN_MAX_PAGE_SIZE
+        app.BLOCKCHAIN_MAX_PAGE_SIZE = 4
+        page = client.get('/api/blockchain?limit=1000').get_json()
+        assert [block['index'] for block in page["chain"]] == [1, 2, 3, 4] and page["next_after"] == 4
+
+        # headers_only: hashes and counts, no complaint payloads (sealed or pending)
+        page = client.get('/api/blockchain?after=1&limit=2&headers_only=1').get_json()
+        assert [header['index'] for header in page["chain"]] == [2, 3]
+        for header, block in zip(page["chain"], chain[1:3]):
+            assert 'complaints' not in header and header['complaint_count'] == 2
+            assert header['hash'] == block['hash'] and header['merkle_root'] == block['merkle_root']
+        assert "pending_complaints" not in page and page["pending_count"] == 1
+
+        for bad in ('after=-1', 'after=abc', 'after=1.5', 'limit=0', 'limit=x'):
+            response = client.get(f'/api/blockchain?{bad}')
+            assert response.status_code == 400 and "error" in response.get_json(), bad
+
+        # Single blocks by index or by hash (either case)
+        assert client.get('/api/blockchain/block/3').get_json() == chain[2]
+        assert client.get(f'/api/blockchain/block/{chain[4]["hash"]}').get_json() == chain[4]
+        assert client.get(f'/api/blockchain/block/{chain[4]["hash"].upper()}').get_json() == chain[4]
+        for missing in ('0', str(blocks + 1), 'f' * 64, 'not-a-block'):
+            assert client.get(f'/api/blockchain/block/{missing}').status_code == 404, missing
+
+        # The export streams every block, one JSON document per line
+        response = client.get('/api/blockchain/export')
+        assert response.status_code == 200 and response.mimetype == 'application/x-ndjson'
+        assert 'attachment' in response.headers['Content-Disposition']
+        lines = response.get_data(as_text=True).splitlines()
+        assert [json.loads(line) for line in lines] == chain
+        tail = client.get('/api/blockchain/export?after=5&headers_only=1').get_data(as_text=True).splitlines()
+        assert [json.loads(line)['index'] for line in tail] == [6, 7]
+        assert all('complaints' not in json.loads(line) for line in tail)
+        assert client.get('/api/blockchain/export?after=abc').status_code == 400
+    print(f"✅ {blocks} blocks paged in {pages} pages, looked up by index and hash, and exported as {len(lines)} NDJSON lines.")
+
+
+if __name__ == "__main__":
+    test_paging_blocks_and_export()
@@ -0,0 +1,64 @@
+# test_events.py
+# Checks the live event fan-out: every client gets each event, a client that stops reading
+# is dropped (and told to resync) without blocking the publisher, and database writes
+# reach clients through the ChangeFeed. Runs against a throwaway DB.
+# Usage: python test_events.py
+import os
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, APP_DIR)
+
+from db import Database
+from events import ChangeFeed, EventBroker
+from migrations import migrate
+
+
+def test_slow_client_is_dropped(events=1000, queue_size=16):
+    broker = EventBroker(max_queue=queue_size)
+    fast, slow = broker.subscribe(), broker.subscribe()
+    fast_stream = iter(fast)
+    received = 0
+    started = time.perf_counter()
+    for i in range(events):
+        broker.publish("complaint-created", {"complaint": {"id": i}})
+        next(fast_stream) # The fast client keeps up
+        received += 1
+    elapsed = time.perf_counter() - started
+    assert received == events
+    assert slow.dropped and len(broker) == 1, "a client that stopped reading must be dropped"
+    messages = list(iter(slow))
+    assert messages == ["event: resync\ndata: {}\n\n"], "a dropped client gets one resync event, then the stream ends"
+    print(f"✅ {events} events to a live client in {elapsed * 1000:.1f} ms; the stalled client was dropped.")
+
+
+def test_writes_become_events():
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = Database(os.path.join(work_dir, "complaints.db"))
+        with db.connection() as conn:
+            migrate(conn)
+            conn.execute("INSERT INTO technicians (name, status) VALUES ('Ravi Patil', 'available')")
+        broker = EventBroker()
+        feed = ChangeFeed(db, broker)
+        subscription = broker.subscribe()
+        with db.connection() as conn:
+            conn.execute("INSERT INTO complaints (chat_id, problem, status) VALUES (1, 'AC not cooling', 'assigned')")
+            conn.execute("UPDATE technicians SET status = 'busy' WHERE id = 1")
+        feed.poll()
+        with db.connection() as conn:
+            conn.execute("UPDATE complaints SET status = 'resolved' WHERE id = 1")
+        feed.poll()
+        kinds = []
+        while not subscription.queue.empty():
+            kinds.append(subscription.queue.get().split("\n")[1].removeprefix("event: "))
+        assert kinds == ["complaint-created", "technician-status-changed", "version",
+                         "complaint-updated", "version"], kinds
+        db.close()
+        print("✅ Complaint and technician writes were published as events.")
+
+
+if __name__ == "__main__":
+    test_slow_client_is_dropped()
+    test_writes_become_events()
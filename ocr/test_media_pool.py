@@ -0,0 +1,91 @@
+# test_media_pool.py
+# Checks the bot's media pool: saved photos are decoded (at reduced size) and read in
+# worker processes while the event loop stays responsive, undecodable files are reported
+# instead of crashing a worker, and photos beyond the queue limit are turned away (backpressure).
+# Usage: python test_media_pool.py
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, APP_DIR)
+
+from media_pool import MediaPool, MediaPoolBusy, ocr_read_mode
+
+
+def phone_photo(path, width=4000, height=3000) -> str:
+    """Saves a 12 MP JPEG of noise: slow to decode, like a real phone photo."""
+    pixels = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    cv2.imwrite(path, pixels)
+    return path
+
+
+async def _watch_loop(stop, waits, tick=0.01):
+    while not stop.is_set():
+        scheduled = time.perf_counter()
+        await asyncio.sleep(tick)
+        waits.append(time.perf_counter() - scheduled - tick)
+
+
+def test_ocr_input_is_decoded_reduced():
+    with tempfile.TemporaryDirectory() as work_dir:
+        assert ocr_read_mode(phone_photo(os.path.join(work_dir, "12mp.jpg"))) == cv2.IMREAD_REDUCED_COLOR_4
+        assert ocr_read_mode(phone_photo(os.path.join(work_dir, "hd.jpg"), 1280, 960)) == cv2.IMREAD_REDUCED_COLOR_2
+        assert ocr_read_mode(phone_photo(os.path.join(work_dir, "small.jpg"), 200, 100)) == cv2.IMREAD_COLOR
+    print("✅ OCR input is decoded at the smallest scale that keeps a 640 px long side.")
+
+
+def test_photos_are_processed_off_the_loop(photos=4):
+    pool = MediaPool(workers=2, max_pending=photos)
+    pool.start()
+
+    async def run(image, bad):
+        stop, waits = asyncio.Event(), []
+        watcher = asyncio.create_task(_watch_loop(stop, waits))
+        results = await asyncio.gather(*(pool.process_photo(image) for _ in range(photos)))
+        unreadable = await pool.process_photo(bad)
+        stop.set()
+        await watcher
+        return results, unreadable, max(waits)
+
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            bad = os.path.join(work_dir, "bad.jpg")
+            with open(bad, "wb") as f:
+                f.write(b"not a jpeg")
+            results, unreadable, worst_wait = asyncio.run(run(phone_photo(os.path.join(work_dir, "0.jpg")), bad))
+            assert all(codes for codes in results), results
+            assert unreadable is None
+    finally:
+        pool.close()
+    assert worst_wait < 0.1, f"the event loop stalled for {worst_wait * 1000:.0f} ms"
+    print(f"✅ {photos} 12 MP photos processed in workers; the event loop never waited more than "
+          f"{worst_wait * 1000:.1f} ms.")
+
+
+def test_full_queue_turns_photos_away(photos=4):
+    pool = MediaPool(workers=1, max_pending=1, queue_wait=0)
+    pool.start()
+
+    async def run(image):
+        return await asyncio.gather(*(pool.process_photo(image) for _ in range(photos)), return_exceptions=True)
+
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            results = asyncio.run(run(phone_photo(os.path.join(work_dir, "0.jpg"))))
+    finally:
+        pool.close()
+    busy = sum(isinstance(result, MediaPoolBusy) for result in results)
+    assert busy == photos - 1, results
+    print(f"✅ With a queue of 1, {busy} of {photos} simultaneous photos were turned away.")
+
+
+if __name__ == "__main__":
+    test_ocr_input_is_decoded_reduced()
+    test_photos_are_processed_off_the_loop()
+    test_full_queue_turns_photos_away()
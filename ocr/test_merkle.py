@@ -0,0 +1,81 @@
+# test_merkle.py
+# Checks the complaint Merkle trees: every leaf's audit path verifies against the root for odd
+# and even leaf counts and a tampered leaf or path does not, and a submitted complaint's receipt
+# goes from pending to committed with a checkable proof through /api/blockchain/receipt/<id>
+# and /api/blockchain/proof/<db_id>. The endpoint part runs against a throwaway DB.
+# Usage: python test_merkle.py
+import hashlib
+import os
+import sys
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, APP_DIR)
+
+from blockchain.ledger import ComplaintLedger
+from blockchain.merkle import EMPTY_ROOT, merkle_proof, merkle_root, verify_proof
+from test_assignment_stress import throwaway_app
+
+
+def leaf(i):
+    return hashlib.sha256(f"complaint {i}".encode()).hexdigest()
+
+
+def test_proofs_round_trip(max_leaves=17):
+    assert merkle_root([]) == EMPTY_ROOT
+    for count in range(1, max_leaves + 1):
+        leaves = [leaf(i) for i in range(count)]
+        root = merkle_root(leaves)
+        for position in range(count):
+            proof = merkle_proof(leaves, position)
+            assert len(proof) <= (count - 1).bit_length(), (count, position, len(proof))
+            assert verify_proof(leaves[position], proof, root), (count, position)
+            # Another leaf, or this one tampered with, does not verify on the same path
+            assert not verify_proof(leaf(count), proof, root), (count, position)
+            if count > 1:
+                assert not verify_proof(leaves[position - 1], proof, root), (count, position)
+                tampered = [dict(step) for step in proof]
+                tampered[0]['hash'] = leaf(-1)
+                assert not verify_proof(leaves[position], tampered, root), (count, position)
+    print(f"✅ Merkle proofs verify for every leaf of 1-{max_leaves} leaf trees; tampered leaves and paths are rejected.")
+
+
+def test_receipt_lifecycle_through_the_api():
+    with throwaway_app() as app:
+        client = app.app.test_client()
+        response = client.post('/submit_complaint', json={
+            "chat_id": 42, "problem": "AC not cooling", "address": "FC Road, Pune",
+            "contact_no": "9876543210", "error_code": "E1",
+        })
+        assert response.status_code == 200, response.get_json()
+        submitted = response.get_json()
+        db_id, receipt_id = submitted["complaint_id"], submitted["blockchain_receipt"]["receipt_id"]
+        assert submitted["blockchain_receipt"]["status"] == "pending"
+
+        assert client.get(f'/api/blockchain/receipt/{receipt_id}').get_json() == \
+            {"receipt_id": receipt_id, "status": "pending"}
+        assert client.get(f'/api/blockchain/proof/{db_id}').get_json() == \
+            {"db_id": db_id, "receipt_id": receipt_id, "status": "pending"}
+
+        app.block_builder.stop(flush=True) # Seal it now rather than after max_wait_seconds
+
+        status = client.get(f'/api/blockchain/receipt/{receipt_id}').get_json()
+        assert status["status"] == "committed" and status["block_index"] == len(app.ledger.chain), status
+        proof = client.get(f'/api/blockchain/proof/{db_id}').get_json()
+        assert proof["status"] == "committed" and proof["receipt_id"] == receipt_id
+        assert proof["block_index"] == status["block_index"] and proof["block_hash"] == status["block_hash"]
+        # What a client checks: complaint -> receipt id -> Merkle root -> header -> block hash
+        assert ComplaintLedger.hash_complaint(proof["complaint"]) == receipt_id
+        assert verify_proof(receipt_id, proof["proof"], proof["merkle_root"])
+        assert proof["block_header"]["merkle_root"] == proof["merkle_root"]
+        assert ComplaintLedger.hash_block(proof["block_header"]) == proof["block_hash"]
+
+        assert client.get(f'/api/blockchain/receipt/{"0" * 64}').status_code == 404
+        assert client.get('/api/blockchain/receipt/not-a-receipt').status_code == 404
+        assert client.get(f'/api/blockchain/proof/{db_id + 1000}').status_code == 404
+    print(f"✅ Complaint {db_id}: receipt pending, then committed in block {status['block_index']} "
+          f"with a proof that checks out; unknown receipts and complaints are 404s.")
+
+
+if __name__ == "__main__":
+    test_proofs_round_trip()
+    test_receipt_lifecycle_through_the_api()
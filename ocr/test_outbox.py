@@ -0,0 +1,154 @@
+# test_outbox.py
+# Checks the bot's outbox: unsynced complaints are resent in batches with a capped number of
+# requests in flight and marked synced; rows a conversation is submitting are left alone,
+# rejected and abandoned rows are skipped, and while the backend is down the outbox backs off and probes
+# with one row at a time until it recovers.
+# Usage: python test_outbox.py
+import asyncio
+import os
+import sys
+import tempfile
+
+import httpx
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, APP_DIR)
+
+from db import Database
+from migrations import migrate
+from outbox import ComplaintOutbox
+
+
+class FakeBackend:
+    """Stands in for BackendClient: records payloads and how many requests overlapped."""
+
+    def __init__(self, latency=0.01):
+        self.latency = latency
+        self.down = False
+        self.received = []
+        self.attempts = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def submit_complaint(self, complaint, max_attempts=None):
+        self.attempts += 1
+        down = self.down # Decided when the request is made, like a refused connection
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            request = httpx.Request("POST", "http://backend/submit_complaint")
+            if down:
+                raise httpx.ConnectError("backend down", request=request)
+            if complaint["problem"] == "reject me":
+                response = httpx.Response(400, request=request)
+                raise httpx.HTTPStatusError("400 Bad Request", request=request, response=response)
+            self.received.append(complaint)
+            return {"complaint_id": len(self.received)}
+        finally:
+            self.in_flight -= 1
+
+
+def bot_database(work_dir, unsynced, synced=0, problem="AC not cooling"):
+    db = Database(os.path.join(work_dir, "bot.db"))
+    with db.connection() as conn:
+        migrate(conn)
+        conn.executemany("""
+            INSERT INTO complaints (chat_id, problem, contact_no, timestamp, synced_to_server)
+            VALUES (?, ?, '9876543210', datetime('now'), ?)
+        """, [(1000 + i, problem, 0) for i in range(unsynced)] + [(2000 + i, problem, 1) for i in range(synced)])
+    return db
+
+
+def unsynced_ids(db):
+    with db.connection() as conn:
+        return [row[0] for row in conn.execute("SELECT id FROM complaints WHERE synced_to_server = 0 ORDER BY id")]
+
+
+def test_backlog_resynced_in_capped_batches(rows=50):
+    backend = FakeBackend()
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = bot_database(work_dir, rows, synced=5)
+        with db.connection() as conn:
+            conn.execute("UPDATE complaints SET problem = 'reject me' WHERE id = 7")
+        outbox = ComplaintOutbox(db, backend, batch_size=8, max_in_flight=3)
+        asyncio.run(outbox.abandon(5)) # The user was told to submit row 5 again
+        announced = []
+
+        async def run():
+            outbox.on_synced = lambda row, response: asyncio.sleep(0, announced.append(row["id"]))
+            with outbox.claim(3): # A conversation is submitting row 3 itself
+                return await outbox.flush()
+
+        delivered = asyncio.run(run())
+        assert delivered == rows - 3, delivered
+        assert unsynced_ids(db) == [3, 7]
+        assert asyncio.run(outbox.flush()) == 1 # Row 3 once released; the rejected row is not retried
+        assert unsynced_ids(db) == [7]
+    assert len(backend.received) == rows - 2 and backend.attempts == rows - 1
+    assert backend.max_in_flight == 3, backend.max_in_flight
+    # Every row goes out under its own key, so the backend can recognise a resend
+    assert len({complaint["idempotency_key"] for complaint in backend.received}) == len(backend.received)
+    assert sorted(announced) == sorted(set(range(1, rows + 1)) - {5, 7})
+    print(f"✅ {rows - 2} of {rows} unsynced complaints resent (one rejected, one abandoned), never more than "
+          f"{backend.max_in_flight} requests in flight.")
+
+
+def test_backs_off_while_down_then_catches_up(rows=30):
+    backend = FakeBackend(latency=0.001)
+    backend.down = True
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = bot_database(work_dir, rows)
+        outbox = ComplaintOutbox(db, backend, batch_size=10, max_in_flight=4, interval=0.01, max_backoff=0.05)
+
+        async def run():
+            outbox.start()
+            await asyncio.sleep(0.3)
+            down_attempts, failures = backend.attempts, outbox.failures
+            backend.down = False
+            outbox.backend_reachable()
+            for _ in range(100):
+                if not unsynced_ids(db):
+                    break
+                await asyncio.sleep(0.01)
+            await outbox.stop()
+            return down_attempts, failures
+
+        down_attempts, failures = asyncio.run(run())
+        assert not unsynced_ids(db)
+    assert failures >= 3, failures
+    # Each pass while down sends a single probe row, not a batch
+    assert down_attempts <= failures + 1, (down_attempts, failures)
+    assert outbox.failures == 0 and len(backend.received) == rows
+    print(f"✅ While down: {down_attempts} probe requests over {failures} backed-off passes; "
+          f"all {rows} complaints synced after recovery.")
+
+
+def test_recovery_during_a_pass_cuts_the_backoff_short(rows=5):
+    backend = FakeBackend(latency=0.2)
+    backend.down = True
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = bot_database(work_dir, rows)
+        outbox = ComplaintOutbox(db, backend, interval=10, max_backoff=60)
+        outbox.failures = 1 # Already backing off
+
+        async def run():
+            outbox.start()
+            await asyncio.sleep(0.1) # The probe of the first pass is in flight
+            backend.down = False
+            outbox.backend_reachable() # A conversation got through meanwhile
+            for _ in range(200):
+                if not unsynced_ids(db):
+                    break
+                await asyncio.sleep(0.01)
+            await outbox.stop()
+
+        asyncio.run(run())
+        assert not unsynced_ids(db), "the outbox slept out its backoff"
+    print(f"✅ Backend recovery noticed during a failing pass: {rows} complaints synced without waiting out the backoff.")
+
+
+if __name__ == "__main__":
+    test_backlog_resynced_in_capped_batches()
+    test_backs_off_while_down_then_catches_up()
+    test_recovery_during_a_pass_cuts_the_backoff_short()
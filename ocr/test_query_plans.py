@@ -0,0 +1,167 @@
+# test_query_plans.py
+# Migrates fresh and old-style databases to the current schema, then checks with
+# EXPLAIN QUERY PLAN that the dashboard and assignment queries are served by indexes
+# instead of full table scans. Runs against throwaway DBs.
+# Usage: python test_query_plans.py
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, APP_DIR)
+
+from migrations import SCHEMA_VERSION, bump_data_version, data_version, migrate
+
+EXPECTED_INDEXES = {
+    "idx_complaints_timestamp", "idx_complaints_status_timestamp", "idx_complaints_chat_id",
+    "idx_complaints_technician_timestamp", "idx_technicians_status", "idx_technician_jobs_open",
+    "idx_complaints_row_version", "idx_technicians_row_version", "idx_complaints_unsynced",
+    "idx_complaints_idempotency_key",
+}
+
+# Schemas that existing complaints.db files were created with before versioning
+OLD_SCHEMAS = {
+    "bot": """
+        CREATE TABLE complaints (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, chat_id INTEGER, problem TEXT, error_code TEXT, address TEXT,
+            complaint_latitude REAL, complaint_longitude REAL, contact_no TEXT, media_path TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, synced_to_server BOOLEAN DEFAULT 0
+        )
+    """,
+    "init_db.py": """
+        CREATE TABLE complaints (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, chat_id INTEGER NOT NULL, problem TEXT NOT NULL,
+            address TEXT NOT NULL, contact_no TEXT NOT NULL, error_code TEXT, media_path TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, status TEXT DEFAULT 'pending',
+            predicted_solution TEXT, needs_engineer INTEGER
+        );
+        CREATE TABLE technicians (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, contact_no TEXT NOT NULL,
+            latitude REAL, longitude REAL, status TEXT DEFAULT 'available', specialization TEXT
+        );
+        INSERT INTO technicians (name, contact_no, status) VALUES ('Ravi Patil', '9876543210', 'busy');
+    """,
+}
+
+# (name, query, parameters, index that must serve it, whether its ORDER BY must come from the index)
+HOT_QUERIES = [
+    ("dashboard recent complaints", "SELECT * FROM complaints ORDER BY timestamp DESC, id DESC LIMIT 50", (),
+     "idx_complaints_timestamp", True),
+    ("/api/complaints next page", """
+        SELECT id, timestamp, problem, status FROM complaints
+        WHERE (timestamp, id) < (?, ?) ORDER BY timestamp DESC, id DESC LIMIT 51
+     """, ("2026-01-01 00:00:00", 900), "idx_complaints_timestamp", True),
+    ("/api/complaints by status", """
+        SELECT * FROM complaints
+        WHERE status = ? AND timestamp >= ? AND (timestamp, id) < (?, ?) ORDER BY timestamp DESC, id DESC LIMIT 51
+     """, ("resolved", "2025-01-01 00:00:00", "2026-01-01 00:00:00", 900), "idx_complaints_status_timestamp", True),
+    ("/api/complaints by technician", """
+        SELECT * FROM complaints
+        WHERE assigned_technician_id = ? AND timestamp >= ? AND timestamp < ? ORDER BY timestamp DESC, id DESC LIMIT 51
+     """, (7, "2025-01-01 00:00:00", "2026-01-01 00:00:00"), "idx_complaints_technician_timestamp", True),
+    ("/api/complaints date range", """
+        SELECT * FROM complaints WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp DESC, id DESC LIMIT 51
+     """, ("2025-01-01 00:00:00", "2026-01-01 00:00:00"), "idx_complaints_timestamp", True),
+    ("/api/complaints total by status", "SELECT COUNT(*) FROM complaints WHERE status = ?", ("assigned",),
+     "idx_complaints_status_timestamp", False),
+    ("/api/complaints changes since a version", """
+        SELECT id, timestamp, status FROM complaints INDEXED BY idx_complaints_row_version
+        WHERE row_version > ? ORDER BY timestamp DESC, id DESC LIMIT 51
+     """, (4990,), "idx_complaints_row_version", False),
+    ("/api/technicians_live changes since a version", "SELECT * FROM technicians WHERE row_version > ?", (4990,),
+     "idx_technicians_row_version", False),
+    ("retried submission", """
+        SELECT id FROM complaints WHERE idempotency_key = ?
+     """, ("1000:7:2025-06-12T15:40:00",), "idx_complaints_idempotency_key", False),
+    ("bot outbox backlog", """
+        SELECT id, chat_id, problem FROM complaints
+        WHERE synced_to_server = 0 AND id > ? ORDER BY id LIMIT 20
+     """, (100,), "idx_complaints_unsynced", True),
+    ("batch backlog", """
+        SELECT id, problem, error_code, complaint_latitude, complaint_longitude
+        FROM complaints
+        WHERE status = 'pending_assignment' AND timestamp <= datetime('now', ?)
+        ORDER BY id
+     """, ("-30 seconds",), "idx_complaints_status_timestamp", False),
+    ("a user's complaints", "SELECT * FROM complaints WHERE chat_id = ?", (42,), "idx_complaints_chat_id", False),
+    ("a technician's complaints", "SELECT id, status FROM complaints WHERE assigned_technician_id = ?", (7,),
+     "idx_complaints_technician_timestamp", False),
+    ("available technicians", "SELECT id, latitude, longitude, specialization FROM technicians WHERE status = 'available'",
+     (), "idx_technicians_status", False),
+    ("open jobs", """
+        SELECT id, technician_id, complaint_id, latitude, longitude, travel_minutes, service_minutes, eta
+        FROM technician_jobs
+        WHERE status = 'queued'
+        ORDER BY technician_id, id
+     """, (), "idx_technician_jobs_open", False),
+]
+
+FULL_SCAN = re.compile(r"^SCAN (TABLE )?\w+$") # "SCAN complaints" without "USING ... INDEX"
+
+
+def test_migrations():
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name, schema in [("fresh", "")] + list(OLD_SCHEMAS.items()):
+            conn = sqlite3.connect(os.path.join(work_dir, f"{name}.db"))
+            conn.executescript(schema)
+            assert migrate(conn) == SCHEMA_VERSION, name
+            assert migrate(conn) == SCHEMA_VERSION, name # Re-running is a no-op
+            indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+            assert EXPECTED_INDEXES <= indexes, f"{name}: missing {EXPECTED_INDEXES - indexes}"
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(complaints)")}
+            assert {"status", "assigned_technician_id", "complaint_latitude", "synced_to_server"} <= columns, name
+            technicians = conn.execute("SELECT status, active_jobs FROM technicians").fetchall()
+            # A pre-queue 'busy' flag has no open jobs behind it: the technician is available again
+            assert all(row == ("available", 0) for row in technicians), f"{name}: {technicians}"
+            conn.close()
+            print(f"✅ {name} database migrated to version {SCHEMA_VERSION}.")
+
+
+def test_change_versions():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    start = data_version(conn)
+    conn.execute("INSERT INTO technicians (name, status, capacity, active_jobs) VALUES ('a', 'available', 1, 0)")
+    conn.execute("INSERT INTO complaints (problem) VALUES ('AC not cooling')")
+    claimed = conn.execute("UPDATE technicians SET active_jobs = 1 WHERE id = 1 AND active_jobs < capacity").rowcount
+    assert claimed == 1, "the version triggers must not change the rowcount that claims rely on"
+    assert data_version(conn) == start + 3
+    assert conn.execute("SELECT row_version FROM technicians").fetchone()[0] == start + 3
+    assert conn.execute("SELECT row_version FROM complaints").fetchone()[0] == start + 2
+    assert bump_data_version(conn) == start + 4 # Sealed blocks bump it without a row
+    conn.close()
+    print("✅ Complaint and technician writes bump the change version.")
+
+
+def test_hot_queries_use_indexes(complaints=5000, technicians=100):
+    with tempfile.TemporaryDirectory() as work_dir:
+        conn = sqlite3.connect(os.path.join(work_dir, "complaints.db"))
+        migrate(conn)
+        conn.executemany("INSERT INTO technicians (name, status, specialization) VALUES (?, ?, 'AC')",
+                         [(f"tech {i}", ("available", "busy", "off_duty")[i % 3]) for i in range(technicians)])
+        conn.executemany("""
+            INSERT INTO complaints (chat_id, problem, status, assigned_technician_id, timestamp, synced_to_server)
+            VALUES (?, 'AC not cooling', ?, ?, datetime('now', ?), ?)
+        """, [(i % 300, ("pending_assignment", "assigned", "resolved")[i % 3], i % technicians, f"-{i} minutes",
+               int(i % 50 != 0)) for i in range(complaints)])
+        conn.commit()
+
+        for name, query, params, index, ordered_by_index in HOT_QUERIES:
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+            scans = [step for step in plan if FULL_SCAN.match(step)]
+            assert not scans, f"{name}: full table scan {scans}"
+            assert any("INDEX" in step for step in plan), f"{name}: no index used {plan}"
+            if index is not None:
+                assert any(index in step for step in plan), f"{name}: expected {index}, got {plan}"
+            if ordered_by_index:
+                assert not any("TEMP B-TREE" in step for step in plan), f"{name}: sorts instead of using the index {plan}"
+            print(f"✅ {name}: {' / '.join(plan)}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    test_migrations()
+    test_change_versions()
+    test_hot_queries_use_indexes()
@@ -0,0 +1,60 @@
+# test_requeue.py
+# Kills the Flask app (no atexit flush) while complaints 1, 3 and 5 are still pending and 2 and 4
+# are sealed, then restarts it: exactly the unsealed complaints are queued for the next block,
+# also when the ledger directory is replaced by a fresh one. Runs against a throwaway DB.
+# Usage: python test_requeue.py
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# One life of the server; it ends with os._exit, as if killed, so nothing pending gets sealed
+SERVER_LIFE = """
+import json, os, sys
+import app
+app.block_builder.stop(flush=False) # The script decides what gets sealed
+if sys.argv[1] == "first":
+    with app.db.connection() as conn:
+        conn.executemany('''
+            INSERT INTO complaints (id, chat_id, problem, address, error_code, contact_no, timestamp, status)
+            VALUES (?, 1000, 'AC not cooling', 'MG Road, Pune', 'E1', '9876543210', datetime('now'), ?)
+        ''', [(i, 'assigned') for i in range(1, 6)] + [(6, 'pending')]) # 6: a bot's local copy
+        conn.row_factory = app.sqlite3.Row
+        rows = {row['id']: dict(row) for row in conn.execute('SELECT * FROM complaints')}
+    for complaint_id in (2, 4):
+        app.ledger.add_complaint(app.complaint_ledger_record(rows[complaint_id]))
+    app.ledger.seal_block()
+    for complaint_id in (1, 3, 5): # Waiting for the next block when the server dies
+        app.ledger.add_complaint(app.complaint_ledger_record(rows[complaint_id]))
+print(json.dumps(sorted(complaint['db_id'] for complaint in app.ledger.current_complaints)))
+sys.stdout.flush()
+os._exit(0)
+"""
+
+
+def server_life(work_dir, step, ledger_dir):
+    env = dict(os.environ, PYTHONPATH=APP_DIR, LEDGER_DIR=ledger_dir, MINING_WORKERS="1",
+               MINING_DIFFICULTY_BITS="4", BATCH_ASSIGN_INTERVAL="0")
+    result = subprocess.run([sys.executable, "-c", SERVER_LIFE, step], cwd=work_dir, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_restart_requeues_every_unsealed_complaint():
+    with tempfile.TemporaryDirectory(prefix="requeue_") as work_dir:
+        ledger_dir = os.path.join(work_dir, "ledger_data")
+        assert server_life(work_dir, "first", ledger_dir) == [1, 3, 5]
+        # Complaint 4 was sealed after 3, yet 1 and 3 come back along with 5
+        assert server_life(work_dir, "restart", ledger_dir) == [1, 3, 5]
+        # A new ledger directory does not re-queue what the old one had already sealed
+        assert server_life(work_dir, "restart", os.path.join(work_dir, "fresh_ledger")) == [1, 3, 5]
+    print("✅ Killed with complaints 1, 3 and 5 pending: re-queued on restart, 2 and 4 not, "
+          "with the old or a fresh ledger directory.")
+
+
+if __name__ == "__main__":
+    test_restart_requeues_every_unsealed_complaint()
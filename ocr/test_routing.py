@@ -0,0 +1,36 @@
+# test_routing.py
+# Checks the route planner's 2-opt pass on random stops around Pune: starting from the
+# nearest-neighbour order or a random one, it keeps the technician's position first, visits
+# every stop once and never returns a longer route than it was given.
+# Usage: python test_routing.py
+import os
+import sys
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, APP_DIR)
+
+from dispatch.geo import haversine_matrix
+from dispatch.routing import nearest_neighbour_order, route_length, two_opt
+
+
+def test_two_opt_never_lengthens_a_route(trials=200):
+    rng = np.random.default_rng(14)
+    improved = 0
+    for trial in range(trials):
+        stops = int(rng.integers(1, 12))
+        lats = 18.5 + rng.uniform(-0.2, 0.2, stops + 1)
+        lons = 73.85 + rng.uniform(-0.2, 0.2, stops + 1)
+        dist = haversine_matrix(lats, lons, lats, lons)
+        for start_order in (nearest_neighbour_order(dist), [0] + rng.permutation(np.arange(1, stops + 1)).tolist()):
+            order = two_opt(dist, start_order)
+            assert order[0] == 0, (trial, order)
+            assert sorted(order) == list(range(stops + 1)), (trial, order)
+            assert route_length(dist, order) <= route_length(dist, start_order) + 1e-9, trial
+            improved += route_length(dist, order) < route_length(dist, start_order) - 1e-9
+    print(f"✅ two_opt kept the start and never lengthened any of {2 * trials} routes ({improved} shortened).")
+
+
+if __name__ == "__main__":
+    test_two_opt_never_lengthens_a_route()
@@ -0,0 +1,57 @@
+# test_snapshot.py
+# Checks the shared dashboard snapshot: many concurrent readers after one invalidation cause
+# a single rebuild, and an invalidation that lands during a rebuild is not lost.
+# Usage: python test_snapshot.py
+import os
+import sys
+import threading
+import time
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, APP_DIR)
+
+from snapshot import CachedSnapshot
+
+
+def test_concurrent_readers_share_one_rebuild(readers=50):
+    builds = []
+
+    def build():
+        time.sleep(0.05) # Long enough for every reader to arrive while the rebuild runs
+        builds.append(len(builds))
+        return len(builds)
+
+    snapshot = CachedSnapshot(build)
+    assert snapshot.get() == 1
+    snapshot.invalidate()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(snapshot.get())) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [2] * readers, results
+    assert snapshot.rebuilds == 2, f"{readers} readers after one invalidation rebuilt {snapshot.rebuilds - 1} times"
+    print(f"✅ {readers} concurrent readers after one invalidation shared a single rebuild.")
+
+
+def test_invalidation_during_rebuild_is_kept():
+    snapshot = None
+    calls = []
+
+    def build():
+        calls.append(None)
+        if len(calls) == 1:
+            snapshot.invalidate() # A write commits while this rebuild is reading
+        return len(calls)
+
+    snapshot = CachedSnapshot(build)
+    assert snapshot.get() == 1
+    assert snapshot.get() == 2, "the write during the first build must trigger another rebuild"
+    assert snapshot.get() == 2
+    print("✅ A write during a rebuild leaves the snapshot stale until rebuilt again.")
+
+
+if __name__ == "__main__":
+    test_concurrent_readers_share_one_rebuild()
+    test_invalidation_during_rebuild_is_kept()
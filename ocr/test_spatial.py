@@ -0,0 +1,88 @@
+# test_spatial.py
+# Checks the technician lookups against brute force: GeoGridIndex.nearest and geo.nearest_k
+# return the same k closest points as scalar haversine over every point, for random
+# technicians around Pune, queries on grid cell edges, across the antimeridian and near the poles.
+# Usage: python test_spatial.py
+import os
+import random
+import sys
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, APP_DIR)
+
+from dispatch.geo import haversine_distance, nearest_k
+from dispatch.spatial import DEFAULT_CELL_DEGREES, GeoGridIndex
+
+# (name, latitude range, longitude range) technicians and queries are drawn from
+REGIONS = [
+    ("Pune", (18.3, 18.8), (73.6, 74.1)),
+    ("antimeridian", (-5.0, 5.0), (179.8, 180.0)), # Half the points are moved across it, see region_points
+    ("north pole", (89.5, 90.0), (-180.0, 180.0)),
+    ("south pole", (-90.0, -89.5), (-180.0, 180.0)),
+]
+
+
+def brute_force(points, lat, lon, k):
+    distances = sorted((haversine_distance(lat, lon, p_lat, p_lon), item_id) for item_id, (p_lat, p_lon) in points.items())
+    return distances[:k]
+
+
+def region_points(rng, lat_range, lon_range, count):
+    points = {}
+    for item_id in range(count):
+        lon = rng.uniform(*lon_range)
+        if lon_range == (179.8, 180.0) and item_id % 2:
+            lon -= 360.0 # Just east of the antimeridian, at -180..-179.8
+        points[item_id] = (rng.uniform(*lat_range), lon)
+    return points
+
+
+def queries(rng, points, lat_range, lon_range, count):
+    """Random points, points on cell edges and corners, and the indexed points themselves."""
+    found = [(rng.uniform(*lat_range), rng.uniform(*lon_range)) for _ in range(count)]
+    for lat, lon in list(points.values())[:count]:
+        edge_lat = round(lat / DEFAULT_CELL_DEGREES) * DEFAULT_CELL_DEGREES
+        edge_lon = round(lon / DEFAULT_CELL_DEGREES) * DEFAULT_CELL_DEGREES
+        found += [(lat, lon), (edge_lat, lon), (lat, edge_lon), (min(edge_lat, 90.0), edge_lon)]
+    return found
+
+
+def assert_same_matches(found, expected, context):
+    # Ties aside, the same ids at the same distances
+    assert len(found) == len(expected), (context, found, expected)
+    for (distance, item_id), (expected_distance, expected_id) in zip(found, expected):
+        assert abs(distance - expected_distance) < 1e-6, (context, found, expected)
+        assert item_id == expected_id or abs(distance - expected_distance) < 1e-9, (context, found, expected)
+
+
+def test_nearest_matches_brute_force(points_per_region=200, queries_per_region=25):
+    rng = random.Random(7)
+    checked = 0
+    for name, lat_range, lon_range in REGIONS:
+        points = region_points(rng, lat_range, lon_range, points_per_region)
+        index = GeoGridIndex()
+        for item_id, (lat, lon) in points.items():
+            index.insert(item_id, lat, lon)
+        ids = list(points)
+        lats = np.array([points[item_id][0] for item_id in ids])
+        lons = np.array([points[item_id][1] for item_id in ids])
+        for lat, lon in queries(rng, points, lat_range, lon_range, queries_per_region):
+            for k in (1, 5, points_per_region + 1):
+                expected = brute_force(points, lat, lon, k)
+                assert_same_matches(index.nearest(lat, lon, k=k), expected, (name, lat, lon, k))
+                order, distances = nearest_k(lat, lon, lats, lons, k)
+                assert_same_matches(list(zip(distances.tolist(), [ids[i] for i in order])), expected,
+                                    (name, lat, lon, k, "nearest_k"))
+                checked += 1
+            radius_km = expected[0][0] + 5.0
+            assert_same_matches(index.nearest(lat, lon, k=5, max_radius_km=radius_km),
+                                [match for match in brute_force(points, lat, lon, 5) if match[0] <= radius_km],
+                                (name, lat, lon, radius_km))
+    print(f"✅ GeoGridIndex.nearest and nearest_k match brute-force haversine on {checked} queries "
+          f"(Pune, cell edges, antimeridian, both poles).")
+
+
+if __name__ == "__main__":
+    test_nearest_matches_brute_force()
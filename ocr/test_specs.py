@@ -0,0 +1,83 @@
+# test_specs.py
+# Checks specialization inference: keywords and error codes match whole words only ("machine"
+# is not AC, error code E12 is not E1), plurals, phrases and code families match, hints count
+# only when nothing stronger did, and the rules file is hot-reloaded when its mtime changes
+# while a broken edit keeps the last good rules.
+# Usage: python test_specs.py
+import json
+import os
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, APP_DIR)
+
+from dispatch.specs import SpecializationRules
+
+# (problem, error code, expected specializations) against the shipped specializations.json
+CASES = [
+    ("Washing machine not draining", "", {"Washing Machine"}),
+    ("The machine makes a loud noise", "", set()), # "ac" inside "machine" is no match
+    ("Strange smell from the back", "E12", set()), # E1 is an AC code, E12 is not
+    ("Strange smell from the back", "E1", {"AC"}),
+    ("Strange smell from the back", "e1", {"AC"}),
+    ("Display flickers", "F03", {"Refrigerator"}), # F0* family, and the code beats the hint
+    ("Both our ACs are leaking", "", {"AC"}),
+    ("Two fridges stopped working", "", {"Refrigerator"}),
+    ("Air-conditioner rattles", "", {"AC"}),
+    ("airconditioner rattles", "", {"AC"}),
+    ("A.C. and T.V. both dead after the power cut", "", {"AC", "TV"}),
+    ("Not cooling at all", "", {"AC"}), # A hint, used since nothing else matched
+    ("Fridge not cooling", "", {"Refrigerator"}), # The keyword wins over the AC hint
+    ("Hot water is lukewarm", "", {"Geyser"}),
+    ("Router keeps rebooting", "", set()), # "ro" (water purifier) inside "router"
+    ("", "", set()),
+]
+
+
+def write_rules(path, table, mtime_ns):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(table if isinstance(table, str) else json.dumps(table))
+    os.utime(path, ns=(mtime_ns, mtime_ns)) # A distinct mtime even within the filesystem's resolution
+
+
+def test_word_boundaries_plurals_and_hints():
+    rules = SpecializationRules()
+    for problem, error_code, expected in CASES:
+        assert rules.infer(problem, error_code) == expected, (problem, error_code, rules.infer(problem, error_code))
+    print(f"✅ {len(CASES)} complaints inferred as expected: whole words and codes only, plurals, hints last.")
+
+
+def test_hot_reload_keeps_last_good_rules():
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "rules.json")
+        write_rules(path, {"AC": {"keywords": ["ac"]}}, 1_000_000_000_000_000_000)
+        rules = SpecializationRules(path, reload_interval=0)
+        assert rules.infer("Geyser leaking") == set()
+
+        write_rules(path, {"AC": {"keywords": ["ac"]}, "Geyser": {"keywords": ["geyser"]}}, 1_000_000_001_000_000_000)
+        assert rules.infer("Geyser leaking") == {"Geyser"}, "the edited rules were not picked up"
+        assert rules.specializations == ("AC", "Geyser")
+
+        for i, broken in enumerate(('{"AC": {"keywords": ["ac"]', '{"AC": {"keywords": "ac"}}', '[]')):
+            write_rules(path, broken, 1_000_000_002_000_000_000 + i)
+            assert not rules.reload()
+            assert rules.infer("Geyser leaking") == {"Geyser"}, f"lost the rules after a broken edit: {broken}"
+        assert not rules.reload(), "a broken edit is reported once, not reloaded on every check"
+
+        write_rules(path, {"Geyser": {"keywords": ["geyser", "water heater"]}}, 1_000_000_003_000_000_000)
+        assert rules.infer("Water heater leaking") == {"Geyser"} and rules.specializations == ("Geyser",)
+
+        write_rules(path, "not json", 1_000_000_004_000_000_000)
+        try:
+            SpecializationRules(path)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("a broken rules file with no previous rules must fail loudly")
+    print("✅ Rules reloaded on mtime change; broken edits logged with the last good rules kept.")
+
+
+if __name__ == "__main__":
+    test_word_boundaries_plurals_and_hints()
+    test_hot_reload_keeps_last_good_rules()
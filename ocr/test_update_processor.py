@@ -0,0 +1,79 @@
+# test_update_processor.py
+# Checks ChatOrderedUpdateProcessor: updates from different chats run concurrently,
+# updates from the same chat run one at a time in arrival order, idle chats leave no state
+# behind, and a chat flooding updates behind a stuck one does not hold other chats' slots.
+# Usage: python test_update_processor.py
+import asyncio
+import os
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, APP_DIR)
+
+from telegram import Chat, Message, Update
+
+from update_processor import ChatOrderedUpdateProcessor
+
+
+def _update(update_id, chat_id):
+    message = Message(update_id, None, Chat(chat_id, Chat.PRIVATE), text=str(update_id))
+    return Update(update_id, message=message)
+
+
+def test_per_chat_order_and_concurrency(chats=20, per_chat=5, delay=0.02):
+    processor = ChatOrderedUpdateProcessor(chats * per_chat)
+    seen = {}
+
+    async def handle(update):
+        # Later updates finish faster: without ordering they would overtake earlier ones
+        await asyncio.sleep(delay / (1 + update.update_id % per_chat))
+        seen.setdefault(update.effective_chat.id, []).append(update.update_id)
+
+    async def run():
+        updates = [_update(chat * per_chat + step, chat) for chat in range(chats) for step in range(per_chat)]
+        started = time.perf_counter()
+        await asyncio.gather(*(processor.process_update(update, handle(update)) for update in updates))
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(run())
+    for chat, update_ids in seen.items():
+        assert update_ids == sorted(update_ids), f"chat {chat} saw {update_ids}"
+    assert sum(len(update_ids) for update_ids in seen.values()) == chats * per_chat
+    assert elapsed < chats * delay, f"chats did not run concurrently ({elapsed:.2f} s)"
+    assert not processor._chat_locks, "idle chats should not keep a lock"
+    print(f"✅ {chats} chats x {per_chat} updates handled in {elapsed * 1000:.0f} ms, each chat in order.")
+
+
+def test_flooding_chat_does_not_starve_others(slots=2, flood=10):
+    processor = ChatOrderedUpdateProcessor(slots)
+    handled = []
+
+    async def run():
+        release = asyncio.Event()
+
+        async def handle(update):
+            if update.update_id == 1:
+                await release.wait() # A slow submission in chat 1
+            handled.append(update.update_id)
+
+        # Chat 1's first update blocks; the rest of its flood queues up behind it
+        flooding = [asyncio.create_task(processor.process_update(update, handle(update)))
+                    for update in (_update(i, 1) for i in range(1, flood + 1))]
+        await asyncio.sleep(0.01)
+        other = _update(100, 2)
+        try:
+            await asyncio.wait_for(processor.process_update(other, handle(other)), timeout=1.0)
+        finally:
+            release.set()
+            await asyncio.gather(*flooding)
+
+    asyncio.run(run())
+    assert handled[0] == 100, f"chat 2 waited for chat 1's flood: {handled}"
+    assert handled[1:] == list(range(1, flood + 1)), handled
+    print(f"✅ Chat 2 was answered while chat 1 had {flood} updates stuck behind a slow one ({slots} slots).")
+
+
+if __name__ == "__main__":
+    test_per_chat_order_and_concurrency()
+    test_flooding_chat_does_not_starve_others()
@@ -0,0 +1,85 @@
+# test_verify_chain.py
+# Checks ComplaintLedger.verify_chain and its verified_upto checkpoint: a block tampered with
+# after the checkpoint fails the routine check, one before it fails the full audit, and every
+# failure pulls the checkpoint back to the bad block (on disk too), so the routine checks that
+# follow re-verify from there and keep reporting it until it is repaired.
+# Usage: python test_verify_chain.py
+import os
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, APP_DIR)
+
+from blockchain.ledger import ComplaintLedger
+from blockchain.storage import BlockStore
+
+
+def sealed_ledger(blocks=5, store=None):
+    """Genesis plus blocks - 1 sealed blocks of two complaints each."""
+    ledger = ComplaintLedger(difficulty_bits=4, store=store)
+    while len(ledger.chain) < blocks:
+        for i in range(2):
+            ledger.add_complaint({'db_id': len(ledger.chain) * 100 + i, 'problem': 'AC not cooling'})
+        ledger.seal_block()
+    return ledger
+
+
+def test_tampering_after_the_checkpoint():
+    ledger = sealed_ledger(blocks=3)
+    assert ledger.verify_chain() and ledger.verified_upto == 3
+    for db_id in (300, 400): # Two blocks sealed since the last check
+        ledger.add_complaint({'db_id': db_id, 'problem': 'AC not cooling'})
+        ledger.seal_block()
+    assert len(ledger.chain) == 5
+
+    original = ledger.chain[3]['complaints'][0]['problem']
+    ledger.chain[3]['complaints'][0]['problem'] = 'Washing machine leaking'
+    assert not ledger.verify_chain(), "routine check missed a block past the checkpoint"
+    assert ledger.verified_upto == 3
+    assert not ledger.verify_chain(full=True)
+    assert ledger.verified_upto == 3
+
+    ledger.chain[3]['complaints'][0]['problem'] = original
+    assert ledger.verify_chain() and ledger.verified_upto == 5
+    print("✅ Block tampered with after the checkpoint: routine and full checks fail until it is restored.")
+
+
+def test_tampering_before_the_checkpoint():
+    ledger = sealed_ledger()
+    assert ledger.verify_chain() and ledger.verified_upto == 5
+    ledger.chain[1]['proof'] += 1 # Changes the header, so the stored hash no longer matches
+    # Routine checks cost O(new blocks) and trust the verified prefix; the full audit does not
+    assert ledger.verify_chain()
+    assert not ledger.verify_chain(full=True)
+    assert ledger.verified_upto == 1, ledger.verified_upto
+    # With the checkpoint pulled back, routine checks start at the bad block again
+    assert not ledger.verify_chain() and not ledger.verify_chain()
+
+    ledger.chain[1]['proof'] -= 1
+    assert ledger.verify_chain() and ledger.verified_upto == 5
+    print("✅ Block tampered with before the checkpoint: the full audit reports it and routine checks follow.")
+
+
+def test_failed_checkpoint_is_persisted():
+    with tempfile.TemporaryDirectory() as store_dir:
+        ledger = sealed_ledger(store=BlockStore(store_dir, fsync=False))
+        assert ledger.verify_chain() and ledger.store.load_checkpoint() == 5
+        # BlockStore caches blocks it has read; corrupt the cached copy of block 3
+        ledger.chain[2]['complaints'][1]['problem'] = 'Fridge not cooling'
+        assert not ledger.verify_chain(full=True)
+        assert ledger.store.load_checkpoint() == 2
+        ledger.store.close()
+
+        # After a restart the next routine check re-verifies from the failed block on
+        reopened = ComplaintLedger(difficulty_bits=4, store=BlockStore(store_dir, fsync=False))
+        assert reopened.verified_upto == 2
+        assert reopened.verify_chain() and reopened.store.load_checkpoint() == 5
+        reopened.store.close()
+    print("✅ A failed check saves the checkpoint at the bad block; the reopened ledger re-verifies from it.")
+
+
+if __name__ == "__main__":
+    test_tampering_after_the_checkpoint()
+    test_tampering_before_the_checkpoint()
+    test_failed_checkpoint_is_persisted()
@@ -0,0 +1,61 @@
+# update_processor.py
+import asyncio
+import logging
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+# Updates held at once, running or waiting for their chat (PTB's own limit, taken before
+# do_process_update); beyond this the update fetcher waits
+MAX_WAITING_UPDATES = 4096
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Runs up to max_concurrent_updates updates at once (kept as max_running_updates) while
+    keeping each chat's updates in arrival order.
+    ConversationHandler keeps one state per chat/user and expects that chat's updates one at
+    a time: a chat's next update waits for its previous one (asyncio.Lock wakes waiters
+    first-in, first-out), while updates from other chats run alongside. Updates without a
+    chat (e.g. poll answers) are not ordered.
+    An update takes one of the max_concurrent_updates running slots only once it holds its
+    chat's lock, so a chat with many updates queued behind a slow one (an album, repeated
+    taps) waits without holding slots other chats need. PTB's own semaphore is therefore
+    given MAX_WAITING_UPDATES, and max_concurrent_updates reports that wider limit.
+    """
+
+    __slots__ = ("_chat_locks", "_chat_waiters", "max_running_updates", "_running_slots")
+
+    def __init__(self, max_concurrent_updates: int):
+        if max_concurrent_updates < 1:
+            raise ValueError("`max_concurrent_updates` must be a positive integer!")
+        super().__init__(max(MAX_WAITING_UPDATES, max_concurrent_updates))
+        self.max_running_updates = max_concurrent_updates
+        self._running_slots = asyncio.Semaphore(max_concurrent_updates)
+        self._chat_locks = {} # chat id -> asyncio.Lock, only while the chat has updates in flight
+        self._chat_waiters = {} # chat id -> updates holding or waiting for the lock
+
+    async def do_process_update(self, update, coroutine) -> None:
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is None:
+            async with self._running_slots:
+                await coroutine
+            return
+        lock = self._chat_locks.setdefault(chat.id, asyncio.Lock())
+        self._chat_waiters[chat.id] = self._chat_waiters.get(chat.id, 0) + 1
+        try:
+            async with lock, self._running_slots: # Chat first: waiting for it holds no running slot
+                await coroutine
+        finally:
+            self._chat_waiters[chat.id] -= 1
+            if not self._chat_waiters[chat.id]: # Idle chats don't keep a lock around
+                del self._chat_waiters[chat.id]
+                del self._chat_locks[chat.id]
+
+    async def initialize(self) -> None:
+        """Nothing to allocate."""
+
+    async def shutdown(self) -> None:
+        """Nothing to free."""